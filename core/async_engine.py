@@ -0,0 +1,214 @@
+import asyncio
+import io
+import time
+
+import aiohttp
+import yarl
+from botocore.awsrequest import AWSResponse
+from botocore.config import Config
+from botocore.endpoint import convert_to_response_dict
+from botocore.exceptions import ClientError
+from botocore.httpchecksum import apply_request_checksum, handle_checksum_body, resolve_checksum_context
+from loguru import logger
+
+from core import const
+from core.models import ApiCall, newSuiteLocals
+from core.rate_limit import DEFERRED_WAIT
+from core.timing import CURRENT_TIMING, enterPhase
+
+
+class BufferedRaw(io.BytesIO):
+    """
+    已读取完毕的响应体，提供 botocore 读取 urllib3 响应时用到的 stream()
+    """
+
+    def stream(self, amt=1024 * 64, decode_content=None):
+        while chunk := self.read(amt):
+            yield chunk
+
+
+class AioHttpTransport:
+    """
+    asyncio 下的 S3 请求：序列化、签名和响应解析复用 client 上的 botocore 模型与事件（自定义 header、checksum 等），
+    只把 HTTP 发送替换为 aiohttp；不做 botocore 的自动重试
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.session = None
+
+    async def open(self, clientConfig):
+        connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit)
+        timeout = aiohttp.ClientTimeout(sock_connect=clientConfig.connect_timeout, sock_read=clientConfig.read_timeout)
+        # 保持响应体原样（GetObject 的 gzip 内容不自动解压），不添加签名之外的 Content-Type
+        self.session = aiohttp.ClientSession(connector=connector, timeout=timeout, auto_decompress=False,
+                                             skip_auto_headers=('Content-Type',))
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def makeApiCall(self, client, operationName, apiParams):
+        # 与 BaseClient._make_api_call 的处理流程一致
+        operationModel = client._service_model.operation_model(operationName)
+        requestContext = {
+            'client_region': client.meta.region_name,
+            'client_config': client.meta.config,
+            'has_streaming_input': operationModel.has_streaming_input,
+            'auth_type': operationModel.auth_type,
+        }
+        apiParams = client._emit_api_params(api_params=apiParams, operation_model=operationModel, context=requestContext)
+        endpointUrl, additionalHeaders = client._resolve_endpoint_ruleset(operationModel, apiParams, requestContext)
+        requestDict = client._convert_to_request_dict(api_params=apiParams, operation_model=operationModel, endpoint_url=endpointUrl,
+                                                      context=requestContext, headers=additionalHeaders)
+        resolve_checksum_context(requestDict, operationModel, apiParams)
+
+        serviceId = client._service_model.service_id.hyphenize()
+        token = DEFERRED_WAIT.set(0.0)
+        try:
+            handler, eventResponse = client.meta.events.emit_until_response(
+                f'before-call.{serviceId}.{operationName}', model=operationModel, params=requestDict,
+                request_signer=client._request_signer, context=requestContext)
+            delay = DEFERRED_WAIT.get()
+        finally:
+            DEFERRED_WAIT.reset(token)
+        if delay > 0:
+            # 限流等待不计入请求构建阶段，签名在等待之后进行
+            enterPhase(None)
+            await asyncio.sleep(delay)
+            enterPhase('build')
+        if eventResponse is not None:
+            httpResponse, parsedResponse = eventResponse
+        else:
+            apply_request_checksum(requestDict)
+            # noinspection PyProtectedMember
+            client._endpoint._update_retries_context(requestDict['context'], 1)
+            request = client._endpoint.create_request(requestDict, operationModel)
+            enterPhase('network')
+            httpResponse = await self.send(request)
+            enterPhase('parse')
+            parsedResponse = self.parse(client, operationModel, httpResponse, requestDict['context'])
+
+        client.meta.events.emit(f'after-call.{serviceId}.{operationName}', http_response=httpResponse, parsed=parsedResponse,
+                                model=operationModel, context=requestContext)
+        if httpResponse.status_code >= 300:
+            errorCode = parsedResponse.get('Error', {}).get('Code')
+            raise client.exceptions.from_code(errorCode)(parsedResponse, operationName)
+        return parsedResponse
+
+    async def send(self, request):
+        headers = {k: v.decode('utf-8') if isinstance(v, bytes) else v for k, v in request.headers.items()}
+        body = request.body
+        if hasattr(body, 'read'):
+            body = body.read()
+        # url 已经由 botocore 编码，避免再次编码导致签名不一致
+        async with self.session.request(request.method, yarl.URL(request.url, encoded=True), headers=headers, data=body) as resp:
+            content = await resp.read()
+            return AWSResponse(request.url, resp.status, resp.headers, BufferedRaw(content))
+
+    @staticmethod
+    def parse(client, operationModel, httpResponse, context):
+        responseDict = convert_to_response_dict(httpResponse, operationModel)
+        handle_checksum_body(httpResponse, responseDict, context, operationModel)
+        parser = client._endpoint._response_parser_factory.create_parser(operationModel.metadata['protocol'])
+        parsedResponse = parser.parse(responseDict, operationModel.output_shape)
+        if httpResponse.status_code >= 300:
+            # noinspection PyProtectedMember
+            client._endpoint._add_modeled_error_fields(responseDict, parsedResponse, operationModel, parser)
+        if 'ResponseMetadata' in parsedResponse:
+            parsedResponse['ResponseMetadata']['RetryAttempts'] = 0
+        serviceId = operationModel.service_model.service_id.hyphenize()
+        client.meta.events.emit(f'response-received.{serviceId}.{operationModel.name}', response_dict=responseDict,
+                                parsed_response=parsedResponse, context=context, exception=None)
+        return parsedResponse
+
+
+class AsyncEngine:
+    """
+    asyncio 执行引擎：每个 suite 为一个协程，同时执行的 suite 数由 concurrency 限制；
+    case 的执行逻辑与线程引擎相同（ServiceTestModel.runCaseSteps），ApiCall 通过 aiohttp 发送，其它阻塞调用放到线程池
+    """
+
+    def __init__(self, serviceModel):
+        self.serviceModel = serviceModel
+        self.transport = AioHttpTransport(serviceModel.maxPoolConnections)
+        self.loop = None
+
+    def run(self, suiteModels):
+        asyncio.run(self.runSuiteModels(suiteModels))
+
+    async def runSuiteModels(self, suiteModels):
+        self.loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.serviceModel.concurrency)
+        limiter = self.serviceModel.adaptiveLimiter
+        clients = list(self.serviceModel.clientDict.values())
+        # 没有配置 identity 时只执行预置函数，连接超时使用默认配置
+        await self.transport.open(clients[0].meta.config if clients else Config())
+        tasks = set()
+        try:
+            for suiteFile, suiteModel in suiteModels.items():
+                for suite in suiteModel:
+                    if not suite:
+                        continue
+                    # 控制同时存在的协程数，suite 按需展开
+                    await semaphore.acquire()
+                    if limiter is not None:
+                        # 只有当前协程等待，占用一个默认线程池的线程
+                        await self.loop.run_in_executor(None, limiter.acquire)
+                    task = asyncio.create_task(self.doRun(f'{suite[0][const.SUITE_ID]}', suite, newSuiteLocals()))
+                    tasks.add(task)
+                    task.add_done_callback(lambda t: (tasks.discard(t), limiter is not None and limiter.release(), semaphore.release()))
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            await self.transport.close()
+
+    async def doRun(self, suiteId, suite, suiteLocals):
+        serviceModel = self.serviceModel
+        autoClean = serviceModel.autoClean or serviceModel.bucketPool is not None
+        suiteExecPath = ''
+        start = time.perf_counter()
+        try:
+            for case in suite:
+                suiteExecPath, terminate = await self.runCase(case, suiteExecPath, suiteLocals, suite, suiteId)
+                if terminate:
+                    return
+            serviceModel.appendResult(serviceModel.suite_pass, suite)
+        except Exception as e:
+            logger.exception(e)
+        finally:
+            serviceModel.timingStats.recordSuite(suiteId, time.perf_counter() - start)
+            if autoClean:
+                await self.loop.run_in_executor(serviceModel.threadPool, serviceModel.runAutoClean, suiteLocals, suiteId)
+            if serviceModel.benchmark is not None:
+                serviceModel.benchmark.recordSuite(suite)
+
+    async def runCase(self, case, suiteExecPath, suiteLocals, suite, suiteId):
+        steps = self.serviceModel.runCaseSteps(case, suiteExecPath, suiteLocals, suite, suiteId)
+        try:
+            call = next(steps)
+            while True:
+                try:
+                    if isinstance(call, ApiCall):
+                        benchmark = self.serviceModel.benchmark
+                        response = await (self.sendApiCall(call) if benchmark is None else benchmark.callAsync(self.sendApiCall, call))
+                    else:
+                        response = await self.loop.run_in_executor(self.serviceModel.threadPool, call)
+                except Exception as e:
+                    call = steps.throw(e)
+                    continue
+                call = steps.send(response)
+        except StopIteration as e:
+            return e.value
+
+    async def sendApiCall(self, call):
+        token = CURRENT_TIMING.set(call.timing)
+        call.timing.enter('build')
+        try:
+            return await self.transport.makeApiCall(call.client, call.operationName, call.parameters)
+        except ClientError as e:
+            return e.response
+        finally:
+            call.timing.stop()
+            CURRENT_TIMING.reset(token)
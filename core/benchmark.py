@@ -0,0 +1,257 @@
+import asyncio
+import collections
+import itertools
+import math
+import threading
+import time
+
+from core import const
+
+# 直方图精度：每个 2 的幂区间线性分为 2**SUB_BUCKET_BITS 个桶，相对误差小于 1/2**(SUB_BUCKET_BITS-1)
+SUB_BUCKET_BITS = 8
+BENCHMARK_PERCENTILES = (50, 90, 99, 99.9)
+BENCHMARK_DURATION = 60
+
+
+class LatencyHistogram:
+    """
+    HDR 风格的延迟直方图：以微秒为单位，按指数分段、段内线性分桶，内存占用与样本数无关，可以跨进程合并
+    """
+
+    def __init__(self):
+        self.counts = collections.Counter()
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    @staticmethod
+    def bucketIndex(value):
+        exponent = max(0, value.bit_length() - SUB_BUCKET_BITS)
+        return (exponent << SUB_BUCKET_BITS) + (value >> exponent)
+
+    @staticmethod
+    def bucketUpperBound(index):
+        exponent, sub = index >> SUB_BUCKET_BITS, index & ((1 << SUB_BUCKET_BITS) - 1)
+        return ((sub + 1) << exponent) - 1
+
+    def record(self, micros):
+        micros = max(0, int(micros))
+        self.counts[self.bucketIndex(micros)] += 1
+        self.count += 1
+        self.total += micros
+        self.min = micros if self.min is None else min(self.min, micros)
+        self.max = micros if self.max is None else max(self.max, micros)
+
+    def merge(self, other):
+        self.counts.update(other.counts)
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def percentile(self, percentile):
+        if not self.count:
+            return 0
+        target = max(1, math.ceil(percentile / 100 * self.count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                # 与 HDR 一致取桶内最大可能值，不超过实际最大值
+                return min(self.bucketUpperBound(index), self.max)
+        return self.max
+
+    def summary(self):
+        # 输出单位为毫秒
+        return {
+            'count': self.count,
+            'min': round((self.min or 0) / 1000, 3),
+            'mean': round(self.total / self.count / 1000, 3) if self.count else 0,
+            'max': round((self.max or 0) / 1000, 3),
+            **{f'p{p:g}': round(self.percentile(p) / 1000, 3) for p in BENCHMARK_PERCENTILES},
+        }
+
+
+class BenchmarkStats:
+    """
+    压测统计：每个操作一个延迟直方图，以及请求数、错误数（异常和 5xx）、4xx 数、suite 数
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.errors = collections.Counter()
+        self.clientErrors = collections.Counter()
+        self.suites = 0
+        self.suitesFailed = 0
+        self.iterations = 0
+        self.started = None
+        self.finished = None
+
+    def record(self, operationName, micros, status):
+        with self.lock:
+            if (histogram := self.histograms.get(operationName)) is None:
+                histogram = self.histograms[operationName] = LatencyHistogram()
+            histogram.record(micros)
+            if status is None or status >= 500:
+                self.errors[operationName] += 1
+            elif status >= 400:
+                self.clientErrors[operationName] += 1
+
+    def recordSuite(self, passed):
+        with self.lock:
+            self.suites += 1
+            if not passed:
+                self.suitesFailed += 1
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def merge(self, other):
+        with self.lock:
+            for operationName, histogram in other.histograms.items():
+                self.histograms.setdefault(operationName, LatencyHistogram()).merge(histogram)
+            self.errors.update(other.errors)
+            self.clientErrors.update(other.clientErrors)
+            self.suites += other.suites
+            self.suitesFailed += other.suitesFailed
+            self.iterations = max(self.iterations, other.iterations)
+            if other.started is not None:
+                self.started = other.started if self.started is None else min(self.started, other.started)
+            if other.finished is not None:
+                self.finished = other.finished if self.finished is None else max(self.finished, other.finished)
+
+    def summary(self):
+        with self.lock:
+            seconds = self.finished - self.started if self.started is not None and self.finished is not None else 0.0
+            total = LatencyHistogram()
+            operations = {}
+            for operationName in sorted(self.histograms):
+                histogram = self.histograms[operationName]
+                total.merge(histogram)
+                operations[operationName] = self.operationSummary(histogram, self.errors[operationName], self.clientErrors[operationName], seconds)
+            return {
+                'seconds': round(seconds, 3),
+                'iterations': self.iterations,
+                'suites': self.suites,
+                'suitesFailed': self.suitesFailed,
+                **self.operationSummary(total, sum(self.errors.values()), sum(self.clientErrors.values()), seconds),
+                'operations': operations,
+            }
+
+    @staticmethod
+    def operationSummary(histogram, errors, clientErrors, seconds):
+        latency = histogram.summary()
+        return {
+            'requests': latency.pop('count'),
+            'throughput': round(histogram.count / seconds, 1) if seconds else 0,
+            'errors': errors,
+            'errorRate': errors / histogram.count if histogram.count else 0,
+            'clientErrors': clientErrors,
+            'latency': latency,
+        }
+
+
+class Benchmark:
+    """
+    压测模式：在 duration 秒内（或执行 iterations 轮）重复执行过滤后的 suites，第一轮之后的 suite 从模板重新展开，只统计不保留结果。
+    rate 为 0 时按 concurrency 闭环执行；否则为开环的目标请求速率，请求按计划时间发送，延迟从计划时间开始计算，
+    服务端变慢时排队的时间也计入延迟（避免 coordinated omission）
+    """
+
+    def __init__(self, duration=BENCHMARK_DURATION, iterations=0, rate=0):
+        self.duration = duration
+        self.iterations = iterations
+        self.rate = rate
+        self.stats = BenchmarkStats()
+        self.lock = threading.Lock()
+        self.nextSend = None
+
+    def iterSuites(self, suiteModels, expandSuites):
+        # 第一轮执行过滤后的 suite 并记录 suiteId；之后每轮通过 expandSuites 从模板重新展开，只执行第一轮选中的 suite，
+        # 不在内存中保留整轮的 suite
+        suites = (suite for suiteModel in suiteModels.values() for suite in suiteModel if suite)
+        if (first := next(suites, None)) is None:
+            return
+        self.stats.started = time.time()
+        deadline = time.perf_counter() + self.duration if self.duration else None
+        self.nextSend = time.perf_counter()
+        suiteIds = set()
+        for iteration in itertools.count():
+            if self.iterations and iteration >= self.iterations or not self.iterations and not deadline and iteration:
+                return
+            self.stats.iterations = iteration + 1
+            if iteration == 0:
+                roundSuites = itertools.chain((first,), suites)
+            else:
+                roundSuites = (self.copySuite(suite, suiteId, iteration) for suiteId, suite in expandSuites() if suite and suiteId in suiteIds)
+            for suite in roundSuites:
+                if deadline is not None and time.perf_counter() >= deadline:
+                    return
+                if iteration == 0:
+                    suiteIds.add(suite[0][const.SUITE_ID])
+                yield suite
+
+    @staticmethod
+    def copySuite(suite, suiteId, iteration):
+        # case 模板之上新建 overlay，不读取上一轮的执行结果
+        copied = [collections.ChainMap({}, *case.maps[1:]) for case in suite]
+        copied[0][const.SUITE_ID] = suiteId
+        copied[0][const.BENCHMARK_ITERATION] = iteration
+        return copied
+
+    @staticmethod
+    def retains(suite):
+        return not suite or const.BENCHMARK_ITERATION not in suite[0]
+
+    def finish(self):
+        self.stats.finished = time.time()
+
+    def recordSuite(self, suite):
+        self.stats.recordSuite(all(case[const.CASE_SUCCESS] if const.CASE_SUCCESS in case else False for case in suite if const.CASE_OPERATION in case))
+
+    def schedule(self):
+        if not self.rate:
+            return time.perf_counter()
+        with self.lock:
+            intended = self.nextSend
+            self.nextSend += 1 / self.rate
+        return intended
+
+    def record(self, operationName, intended, response):
+        status = None
+        if isinstance(response, dict) and 'ResponseMetadata' in response:
+            status = response['ResponseMetadata'].get('HTTPStatusCode')
+        self.stats.record(operationName, (time.perf_counter() - intended) * 1e6, status)
+
+    def call(self, send, call):
+        intended = self.schedule()
+        if (delay := intended - time.perf_counter()) > 0:
+            time.sleep(delay)
+        try:
+            response = send(call)
+        except Exception:
+            self.record(call.operationName, intended, None)
+            raise
+        self.record(call.operationName, intended, response)
+        return response
+
+    async def callAsync(self, send, call):
+        intended = self.schedule()
+        if (delay := intended - time.perf_counter()) > 0:
+            await asyncio.sleep(delay)
+        try:
+            response = await send(call)
+        except Exception:
+            self.record(call.operationName, intended, None)
+            raise
+        self.record(call.operationName, intended, response)
+        return response
@@ -0,0 +1,178 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.client import BaseClient
+from botocore.exceptions import ClientError
+from loguru import logger
+
+from core.predefind import DropBucket, DropObjects
+
+# 每种 CreateBucket 配置最多保留的空闲 bucket 数，超出时直接删除
+MAX_IDLE_PER_KEY = 32
+
+# 复位时只恢复 ACL 和 ownership，修改了其它 bucket 配置的 bucket 不再放回池中
+RESETTABLE_BUCKET_OPERATIONS = {'PutBucketAcl', 'PutBucketOwnershipControls', 'DeleteBucketOwnershipControls'}
+
+
+def isTaintOperation(operationName):
+    if operationName in RESETTABLE_BUCKET_OPERATIONS:
+        return False
+    return operationName.startswith(('PutBucket', 'DeleteBucket', 'PutObjectLock', 'PutPublicAccessBlock', 'DeletePublicAccessBlock')) or \
+        operationName == 'DropBucket'
+
+
+class BucketLease:
+    def __init__(self, key, client, createResponse):
+        self.key = key
+        self.client = client
+        self.createResponse = createResponse
+        self.ownershipControls = None
+        self.acl = None
+        self.tainted = False
+
+
+class BucketPool:
+    """
+    bucket 池：CreateBucket 按参数（除 Bucket 外）和 identity 分组，命中时复用已复位的空闲 bucket，不再调用 CreateBucket；
+    suite 结束时清空对象、恢复 ACL 和 ownership 后放回池中，运行结束时统一删除
+    """
+
+    def __init__(self, serviceModel, maxIdlePerKey=MAX_IDLE_PER_KEY):
+        self.serviceModel = serviceModel
+        self.maxIdlePerKey = maxIdlePerKey
+        self.lock = threading.Lock()
+        self.idle = {}
+        self.leases = {}
+        self.stats = {'hits': 0, 'misses': 0, 'resets': 0, 'drops': 0, 'resetFailures': 0}
+
+    @staticmethod
+    def bucketKey(client, parameters):
+        config = {k: v for k, v in parameters.items() if k != 'Bucket'}
+        return client.identityConfig['identity_name'], json.dumps(config, sort_keys=True, default=str)
+
+    def increase(self, name, increment=1):
+        with self.lock:
+            self.stats[name] += increment
+
+    def createBucket(self, client, suiteLocals, parameters):
+        key = self.bucketKey(client, parameters)
+        with self.lock:
+            bucketName = self.idle[key].pop() if key in self.idle and self.idle[key] else None
+            if bucketName is not None:
+                self.stats['hits'] += 1
+                lease = self.leases[bucketName]
+        if bucketName is not None:
+            # suite 中引用新 bucket 名称的变量改为池中的 bucket
+            requestedName = parameters['Bucket']
+            for k, v in list(suiteLocals.maps[0].items()):
+                if v == requestedName:
+                    suiteLocals[k] = bucketName
+            parameters['Bucket'] = bucketName
+            return lease.createResponse
+
+        self.increase('misses')
+        try:
+            # noinspection PyProtectedMember
+            response = BaseClient._make_api_call(client, 'CreateBucket', parameters)
+        except ClientError as e:
+            return e.response
+        lease = BucketLease(key, client, response)
+        self.snapshot(lease, parameters['Bucket'])
+        with self.lock:
+            self.leases[parameters['Bucket']] = lease
+        return response
+
+    def snapshot(self, lease, bucketName):
+        try:
+            lease.ownershipControls = lease.client.get_bucket_ownership_controls(Bucket=bucketName)['OwnershipControls']
+        except ClientError:
+            lease.ownershipControls = None
+        try:
+            acl = lease.client.get_bucket_acl(Bucket=bucketName)
+            lease.acl = {'Owner': acl['Owner'], 'Grants': acl['Grants']}
+        except ClientError:
+            lease.acl = None
+        self.serviceModel.increaseExtraCaseApisCount(2)
+
+    def touch(self, operationName, bucketName):
+        if (lease := self.leases.get(bucketName)) is None:
+            return
+        if isTaintOperation(operationName):
+            lease.tainted = True
+        elif operationName == 'PutBucketOwnershipControls' and lease.ownershipControls is None:
+            # 创建时没有读取到 ownership，无法复位
+            lease.tainted = True
+
+    def release(self, bucketName, suiteId):
+        with self.lock:
+            lease = self.leases.get(bucketName)
+            if lease is None:
+                return False
+            idle = self.idle.setdefault(lease.key, [])
+            full = len(idle) >= self.maxIdlePerKey
+        if lease.tainted or full or not self.reset(lease, bucketName):
+            logger.debug("{}->BucketPool: drop {}", suiteId, bucketName)
+            self.drop(bucketName)
+            return True
+        with self.lock:
+            self.idle[lease.key].append(bucketName)
+        return True
+
+    def reset(self, lease, bucketName):
+        client = lease.client
+        caseLocals = {'Client': client, 'Bucket': bucketName}
+        try:
+            response = DropObjects(self.serviceModel, None, caseLocals)
+            if response is None or response['ResponseMetadata']['HTTPStatusCode'] >= 300:
+                return False
+            # ACL 先于 ownership 恢复：BucketOwnerEnforced 不允许写入非默认 ACL；失败时恢复 ownership 后重试
+            aclRestored = self.restoreAcl(lease, bucketName)
+            if lease.ownershipControls is not None:
+                client.put_bucket_ownership_controls(Bucket=bucketName, OwnershipControls=lease.ownershipControls)
+                self.serviceModel.increaseExtraCaseApisCount(1)
+            if not aclRestored and not self.restoreAcl(lease, bucketName):
+                return False
+            self.increase('resets')
+            return True
+        except ClientError as e:
+            logger.debug("BucketPool: reset {} failed: {}", bucketName, e)
+            self.increase('resetFailures')
+            return False
+
+    def restoreAcl(self, lease, bucketName):
+        if lease.acl is None:
+            return True
+        self.serviceModel.increaseExtraCaseApisCount(1)
+        try:
+            lease.client.put_bucket_acl(Bucket=bucketName, AccessControlPolicy=lease.acl)
+            return True
+        except ClientError:
+            return False
+
+    def drop(self, bucketName):
+        with self.lock:
+            lease = self.leases.pop(bucketName, None)
+        if lease is None:
+            return
+        DropBucket(self.serviceModel, None, {'Client': lease.client, 'Bucket': bucketName})
+        self.increase('drops')
+
+    def close(self):
+        with self.lock:
+            bucketNames = [bucketName for idle in self.idle.values() for bucketName in idle]
+            self.idle.clear()
+        with ThreadPoolExecutor(max_workers=self.serviceModel.teardownConcurrency) as bucketPool:
+            list(bucketPool.map(self.drop, bucketNames))
+
+    def mergeStats(self, stats):
+        with self.lock:
+            for name in self.stats:
+                self.stats[name] += stats[name]
+
+    def summary(self):
+        with self.lock:
+            stats = dict(self.stats)
+        leases = stats['hits'] + stats['misses']
+        stats['hitRate'] = stats['hits'] / leases if leases else 0
+        return stats
@@ -0,0 +1,141 @@
+import math
+import threading
+import time
+
+from botocore.exceptions import ConnectionClosedError, ConnectTimeoutError, ReadTimeoutError
+from loguru import logger
+
+# 服务端限流、过载的错误码
+THROTTLING_ERROR_CODES = {'SlowDown', 'Throttling', 'ThrottlingException', 'ThrottledException', 'RequestThrottled',
+                          'RequestLimitExceeded', 'TooManyRequests', 'TooManyRequestsException', 'ServiceUnavailable'}
+THROTTLING_STATUS_CODES = {429, 503}
+THROTTLING_EXCEPTIONS = (ConnectTimeoutError, ReadTimeoutError, ConnectionClosedError)
+
+# 调整窗口（秒）、p99 相对基线的容忍倍数、计算 p99 需要的最少样本数
+ADAPTIVE_WINDOW = 1.0
+LATENCY_TOLERANCE = 2.0
+MIN_WINDOW_SAMPLES = 20
+# 每个窗口的 p99 在基线中的权重
+BASELINE_WEIGHT = 0.1
+
+
+def isThrottled(response=None, error=None):
+    if error is not None:
+        return isinstance(error, THROTTLING_EXCEPTIONS)
+    if not isinstance(response, dict):
+        return False
+    if 'Error' in response and response['Error'].get('Code') in THROTTLING_ERROR_CODES:
+        return True
+    return 'ResponseMetadata' in response and response['ResponseMetadata'].get('HTTPStatusCode') in THROTTLING_STATUS_CODES
+
+
+class AdaptiveLimiter:
+    """
+    AIMD 自适应并发：限制同时执行的 suite 数。开始时每个窗口翻倍（slow start），出现第一次回退后每个窗口加 increase；
+    收到 503/SlowDown 等限流错误、超时，或窗口内 p99 超过基线 latencyTolerance 倍时乘以 decrease，每个窗口最多回退一次
+    """
+
+    def __init__(self, maxLimit, initial=None, minLimit=1, increase=1, decrease=0.5, window=ADAPTIVE_WINDOW, latencyTolerance=LATENCY_TOLERANCE):
+        self.maxLimit = maxLimit
+        self.minLimit = max(1, min(minLimit, maxLimit))
+        self.limit = max(self.minLimit, min(initial or self.minLimit, maxLimit))
+        self.increase = increase
+        self.decrease = decrease
+        self.window = window
+        self.latencyTolerance = latencyTolerance
+        self.condition = threading.Condition()
+        self.inFlight = 0
+        self.slowStart = True
+        self.started = time.perf_counter()
+        self.windowStarted = self.started
+        self.lastDecrease = None
+        self.latencies = []
+        self.windowThrottled = 0
+        self.windowSaturated = False
+        self.baseline = None
+        self.throttled = 0
+        self.increases = 0
+        self.decreases = 0
+        self.history = [(0.0, self.limit, 'initial')]
+
+    def acquire(self):
+        with self.condition:
+            while self.inFlight >= self.limit:
+                self.condition.wait()
+            self.inFlight += 1
+            if self.inFlight >= self.limit:
+                self.windowSaturated = True
+
+    def release(self):
+        with self.condition:
+            self.inFlight -= 1
+            self.condition.notify()
+
+    def observe(self, latency, throttled):
+        with self.condition:
+            now = time.perf_counter()
+            if throttled:
+                self.throttled += 1
+                self.windowThrottled += 1
+                if self.lastDecrease is None or now - self.lastDecrease >= self.window:
+                    self.backOff(now, 'throttled')
+            else:
+                self.latencies.append(latency)
+            if now - self.windowStarted >= self.window:
+                self.adjust(now)
+
+    def adjust(self, now):
+        p99 = None
+        if len(self.latencies) >= MIN_WINDOW_SAMPLES:
+            self.latencies.sort()
+            p99 = self.latencies[math.ceil(len(self.latencies) * 0.99) - 1]
+        if p99 is not None and self.baseline is not None and p99 > self.baseline * self.latencyTolerance:
+            if self.lastDecrease is None or now - self.lastDecrease >= self.window:
+                self.backOff(now, 'latency')
+        elif not self.windowThrottled and self.windowSaturated and self.limit < self.maxLimit:
+            # 只有并发达到上限时才增加，避免 suite 不足时 limit 无意义地增长
+            self.setLimit(now, self.limit * 2 if self.slowStart else self.limit + self.increase, 'increase')
+            self.increases += 1
+        if p99 is not None:
+            # 基线为 p99 的长期滑动平均，延迟随负载缓慢上升时基线随之上升，只有突增才回退
+            self.baseline = p99 if self.baseline is None else self.baseline * (1 - BASELINE_WEIGHT) + p99 * BASELINE_WEIGHT
+        self.latencies = []
+        self.windowThrottled = 0
+        self.windowSaturated = self.inFlight >= self.limit
+        self.windowStarted = now
+
+    def backOff(self, now, reason):
+        self.slowStart = False
+        self.lastDecrease = now
+        self.decreases += 1
+        self.setLimit(now, math.floor(self.limit * self.decrease), reason)
+
+    def setLimit(self, now, limit, reason):
+        limit = max(self.minLimit, min(int(limit), self.maxLimit))
+        if limit == self.limit:
+            return
+        if limit < self.limit:
+            logger.info("AdaptiveConcurrency: limit {} -> {} ({})", self.limit, limit, reason)
+        else:
+            logger.debug("AdaptiveConcurrency: limit {} -> {} ({})", self.limit, limit, reason)
+            self.condition.notify(limit - self.limit)
+        self.limit = limit
+        self.history.append((round(now - self.started, 3), limit, reason))
+
+    def summary(self):
+        with self.condition:
+            seconds = time.perf_counter() - self.started
+            # 按时间加权的平均 limit
+            weighted, points = 0.0, self.history + [(seconds, self.limit, None)]
+            for (at, limit, _), (nextAt, _, _) in zip(points, points[1:]):
+                weighted += limit * (nextAt - at)
+            return {
+                'limit': self.limit,
+                'minLimit': min(limit for _, limit, _ in self.history),
+                'maxLimit': max(limit for _, limit, _ in self.history),
+                'meanLimit': round(weighted / seconds, 1) if seconds else self.limit,
+                'increases': self.increases,
+                'decreases': self.decreases,
+                'throttled': self.throttled,
+                'history': [{'seconds': at, 'limit': limit, 'reason': reason} for at, limit, reason in self.history],
+            }
@@ -10,6 +10,7 @@ CASE_SUITES_ARR = 'suites_arr'
 CASE_SUITES_DICT = 'suites_dict'
 CASE_CLIENT_NAME = 'clientName'
 CASE_RESPONSE = 'response'
+CASE_TIMING = 'timing'
 
 ORDER = '__order__'
 SUITE_STATE_START = 1
@@ -28,11 +29,63 @@ EXCLUDES = 'excludes'
 HIDE = '__hide__'
 HIDE_ENABLED = 'hide_enabled'
 NOT_HIDE = '__not_hide__'
-RESET_HOOKS = 'resetHooks'
 XMIND_SUITES = 'xmind_indices'
 LOAD_XMIND_SUITES = 'load_xmind_suites'
 LOAD_YAML_SUITES = 'load_yaml_suites'
+SUITE_CACHE_DIR = 'suite_cache_dir'
+LOAD_PROCESSES = 'load_processes'
+CONNECTION_POOL = 'connection_pool'
+MAX_POOL_CONNECTIONS = 'max_pool_connections'
+THREAD_LOCAL_CLIENTS = 'thread_local_clients'
+TCP_KEEPALIVE = 'tcp_keepalive'
+TEARDOWN_CONCURRENCY = 'teardown_concurrency'
+BUCKET_POOL = 'bucket_pool'
+ENABLED = 'enabled'
+MAX_IDLE_PER_KEY = 'max_idle_per_key'
+EXECUTION_ENGINE = 'execution_engine'
+EXECUTION_ENGINE_THREAD = 'thread'
+EXECUTION_ENGINE_ASYNC = 'async'
+BENCHMARK = 'benchmark'
+DURATION = 'duration'
+ITERATIONS = 'iterations'
+RATE = 'rate'
+BENCHMARK_ITERATION = '__benchmark_iteration__'
+METRICS = 'metrics'
+LISTEN = 'listen'
+TEXTFILE = 'textfile'
+INTERVAL = 'interval'
+ADAPTIVE_CONCURRENCY = 'adaptive_concurrency'
+INITIAL = 'initial'
+MIN = 'min'
+INCREASE = 'increase'
+DECREASE = 'decrease'
+WINDOW = 'window'
+LATENCY_TOLERANCE = 'latency_tolerance'
+RATE_LIMITS = 'rate_limits'
+GLOBAL = 'global'
+IDENTITIES = 'identities'
+OPERATIONS = 'operations'
+BURST = 'burst'
+RESULTS_STORE = 'results_store'
+RERUN = 'rerun'
+SUITE_KEY = 'suite_key'
+SUITE_FINGERPRINT = 'suite_fingerprint'
+RESULT_SINK = 'result_sink'
+PATH = 'path'
+FSYNC_INTERVAL = 'fsync_interval'
+FSYNC_BATCH = 'fsync_batch'
+DROP_RESPONSES = 'drop_responses'
+RESPONSE_RETENTION = 'response_retention'
+RESPONSE_RETENTION_NONE = 'none'
+RESPONSE_RETENTION_FAILURES = 'failures'
+RESPONSE_RETENTION_SUMMARY = 'summary'
+RESPONSE_RETENTION_FULL = 'full'
 EQUALS_IN_SIZE = '__equals_in_size__'
+# 标记该分支会修改共享状态（如 bucket），tree 模式下该分支下的 suite 逐个从头重放
+ISOLATE = '__isolate__'
+EXECUTION_MODE = 'execution_mode'
+EXECUTION_MODE_FLAT = 'flat'
+EXECUTION_MODE_TREE = 'tree'
 CLEAR_TREE_NODE = 'clear_tree_node'
 
 CLIENT_PROPERTIES = ['service_name', 'region_name', 'api_version', 'use_ssl', 'verify', 'endpoint_url',
@@ -0,0 +1,354 @@
+import collections
+import http.server
+import itertools
+import json
+import os
+import socket
+import threading
+import time
+import types
+import urllib.request
+
+from loguru import logger
+
+from core import const
+from core.models import GLOBAL_VARIABLES, ServiceTestModel, initGlobalVariables, newSuiteLocals, serviceModelOptions
+from core.place_holder import compilePlaceholders
+from core.utils import ToJsonCompatible
+
+# 各 worker 的 bucket 序号区间，避免不同机器生成相同的 bucket 名称
+BUCKET_ORDINAL_RANGE = 10 ** 7
+# worker 超过该时间没有请求 coordinator 时，收回分配给它的 suite；超过该时间没有可用的 worker 时 coordinator 退出
+WORKER_TIMEOUT = 60
+# worker 上报结果（同时作为心跳）的间隔
+REPORT_INTERVAL = 1.0
+
+
+class Coordinator:
+    """
+    分布式执行的 coordinator：加载并过滤 suites，通过 HTTP 把序列化后的 suite 分配给 worker，收集执行结果用于 reportResult 和导出；
+    注册和结果上报的响应中带有当前活跃的 worker 数，worker 据此平分速率限制。
+    worker 空闲时拉取一批 suite，批次大小随剩余数量递减；队列为空后从未完成 suite 最多的 worker 收回一半分配给空闲的 worker，
+    被收回的 suite 通过结果上报的响应通知原 worker 不再执行，重复执行的 suite 以先上报的结果为准
+    """
+
+    def __init__(self, serviceModels, host='0.0.0.0', port=8700, finishTimeout=30):
+        self.serviceModels = serviceModels
+        self.finishTimeout = finishTimeout
+        self.lock = threading.Condition()
+        self.tasks = {}
+        self.pending = collections.deque()
+        self.leases = {}
+        self.revoked = {}
+        self.completed = set()
+        self.workers = {}
+        self.server = http.server.ThreadingHTTPServer((host, port), self.handlerClass())
+        self.server.daemon_threads = True
+
+    @property
+    def address(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def handlerClass(self):
+        coordinator = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                request = json.loads(self.rfile.read(length)) if length else {}
+                handler = {'/register': coordinator.register, '/lease': coordinator.lease,
+                           '/results': coordinator.results, '/finish': coordinator.finish}.get(self.path)
+                if handler is None:
+                    self.send_error(404)
+                    return
+                body = json.dumps(handler(request)).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def load(self):
+        for serviceName, serviceModel in self.serviceModels.items():
+            if serviceModel.executionMode != const.EXECUTION_MODE_FLAT:
+                raise RuntimeError('distributed execution only supports execution_mode flat')
+            if serviceModel.benchmark is not None:
+                raise RuntimeError('distributed execution does not support benchmark')
+            serviceModel.setUp()
+            for suiteModelName, suiteModel in serviceModel.filterSuites().items():
+                for suite in suiteModel:
+                    if suite:
+                        taskId = suite[0][const.SUITE_ID]
+                        self.tasks[taskId] = (serviceName, suite)
+                        self.pending.append(taskId)
+        logger.info("Coordinator: {} suites loaded", len(self.tasks))
+
+    def run(self, timeout=None):
+        self.load()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        logger.info("Coordinator: listening on {}", self.address)
+        deadline = time.time() + timeout if timeout else None
+        idleSince = time.time()
+        try:
+            with self.lock:
+                while len(self.completed) < len(self.tasks):
+                    if deadline and time.time() > deadline:
+                        raise TimeoutError('distributed run timed out', len(self.tasks) - len(self.completed))
+                    self.expireWorkers()
+                    if self.activeWorkers():
+                        idleSince = time.time()
+                    elif time.time() - idleSince > WORKER_TIMEOUT:
+                        raise TimeoutError('no active worker within {}s'.format(WORKER_TIMEOUT), len(self.tasks) - len(self.completed))
+                    self.lock.wait(1)
+                # 等待 worker 上报 teardown、连接等统计数据
+                finishDeadline = time.time() + self.finishTimeout
+                while self.activeWorkers() and time.time() < finishDeadline:
+                    self.expireWorkers()
+                    self.lock.wait(1)
+        finally:
+            self.server.shutdown()
+            self.server.server_close()
+            for serviceModel in self.serviceModels.values():
+                serviceModel.tearDown()
+            for worker in self.workers.values():
+                for serviceName, stats in worker['stats'].items():
+                    self.mergeWorkerStats(self.serviceModels[serviceName], stats)
+
+    def touch(self, workerId):
+        if workerId not in self.workers:
+            self.workers[workerId] = {'index': len(self.workers), 'seen': time.time(), 'finished': False, 'expired': False, 'stats': {}}
+            self.leases[workerId] = {}
+            self.revoked[workerId] = set()
+        worker = self.workers[workerId]
+        worker['seen'] = time.time()
+        worker['expired'] = False
+        return worker
+
+    def expireWorkers(self):
+        now = time.time()
+        for workerId, worker in self.workers.items():
+            if worker['finished'] or worker['expired'] or now - worker['seen'] < WORKER_TIMEOUT:
+                continue
+            worker['expired'] = True
+            if leased := self.leases[workerId]:
+                logger.warning("Coordinator: worker {} timed out, requeue {} suites", workerId, len(leased))
+                self.pending.extendleft(reversed(list(leased)))
+                leased.clear()
+
+    def activeWorkers(self):
+        return sum(1 for worker in self.workers.values() if not worker['finished'] and not worker['expired'])
+
+    def register(self, request):
+        with self.lock:
+            workerIndex = self.touch(request['worker'])['index']
+            return {'workerIndex': workerIndex, 'workers': self.activeWorkers()}
+
+    def lease(self, request):
+        workerId, capacity = request['worker'], max(1, request['capacity'])
+        with self.lock:
+            self.touch(workerId)
+            # 剩余越少批次越小，避免最后几批集中在一个 worker 上
+            batchSize = max(1, min(capacity, len(self.pending) // (2 * max(1, self.activeWorkers()))))
+            taskIds = []
+            while self.pending and len(taskIds) < batchSize:
+                # 超时 worker 的 suite 重新入队后，原 worker 仍可能上报结果
+                if (taskId := self.pending.popleft()) not in self.completed:
+                    taskIds.append(taskId)
+            if not taskIds:
+                taskIds = self.steal(workerId, capacity)
+            for taskId in taskIds:
+                self.leases[workerId][taskId] = None
+            return {
+                'suites': [{'taskId': taskId, 'service': self.tasks[taskId][0], 'suite': ToJsonCompatible(list(map(dict, self.tasks[taskId][1])))}
+                           for taskId in taskIds],
+                'done': len(self.completed) == len(self.tasks),
+            }
+
+    def steal(self, thief, capacity):
+        victims = [(len(leased), workerId) for workerId, leased in self.leases.items() if workerId != thief and len(leased) > 1]
+        if not victims:
+            return []
+        count, victim = max(victims)
+        # 后分配的 suite 最可能还没有开始执行
+        taskIds = list(self.leases[victim])[-min(capacity, count // 2):]
+        for taskId in taskIds:
+            del self.leases[victim][taskId]
+        self.revoked[victim].update(taskIds)
+        logger.debug("Coordinator: {} steals {} suites from {}", thief, len(taskIds), victim)
+        return taskIds
+
+    def results(self, request):
+        workerId = request['worker']
+        with self.lock:
+            self.touch(workerId)
+            for result in request['results']:
+                taskId = result['taskId']
+                for leased in self.leases.values():
+                    leased.pop(taskId, None)
+                if taskId in self.completed or taskId not in self.tasks:
+                    continue
+                self.completed.add(taskId)
+                serviceModel = self.serviceModels[result['service']]
+                if result['status'] == 'pass':
+                    serviceModel.appendResult(serviceModel.suite_pass, result['suite'])
+                else:
+                    serviceModel.appendResult(serviceModel.suite_failed, result['suite'])
+            revoked, self.revoked[workerId] = self.revoked[workerId], set()
+            self.lock.notify_all()
+            return {'revoked': list(revoked), 'done': len(self.completed) == len(self.tasks), 'workers': self.activeWorkers()}
+
+    def finish(self, request):
+        with self.lock:
+            worker = self.touch(request['worker'])
+            worker['finished'] = True
+            worker['stats'] = request['stats']
+            self.lock.notify_all()
+            return {}
+
+    @staticmethod
+    def mergeWorkerStats(serviceModel, stats):
+        serviceModel.mergeShardResult({
+            'suite_pass': [],
+            'suite_failed': [],
+            'suite_skipped': [],
+            'suite_cached': [],
+            'extra_case_api_invoked_count': stats['extra_case_api_invoked_count'],
+            'connectionStats': stats['connectionStats'],
+            'teardownStats': types.SimpleNamespace(**stats['teardownStats']),
+            'bucketPoolStats': stats['bucketPoolStats'],
+            'benchmarkStats': None,
+            'timingStats': types.SimpleNamespace(**stats['timingStats']),
+            'rateLimitStats': stats['rateLimitStats'],
+        })
+
+
+class Worker:
+    """
+    分布式执行的 worker：从 coordinator 拉取 suite，使用 ServiceTestModel.doRun 执行，定期上报结果
+    """
+
+    def __init__(self, config, coordinatorUrl, workerId=None):
+        self.config = config
+        self.coordinatorUrl = coordinatorUrl.rstrip('/')
+        if not self.coordinatorUrl.startswith(('http://', 'https://')):
+            self.coordinatorUrl = f'http://{self.coordinatorUrl}'
+        self.workerId = workerId or f'{socket.gethostname()}-{os.getpid()}'
+        self.serviceModels = {}
+        self.lock = threading.Lock()
+        self.local = collections.deque()
+        self.revoked = set()
+        self.reports = []
+        self.workers = 1
+        self.stopped = threading.Event()
+
+    def post(self, path, payload):
+        request = urllib.request.Request(f'{self.coordinatorUrl}{path}', data=json.dumps(payload).encode('utf-8'),
+                                         headers={'Content-Type': 'application/json'}, method='POST')
+        with urllib.request.urlopen(request, timeout=WORKER_TIMEOUT) as response:
+            return json.loads(response.read())
+
+    def getServiceModel(self, serviceName):
+        if (serviceModel := self.serviceModels.get(serviceName)) is None:
+            serviceModel = ServiceTestModel(serviceName, None, includePatterns=[], excludePatterns=[], xmindSuites=None, **self.options)
+            with self.lock:
+                # 速率限制由各 worker 平分，与多进程执行一致
+                if serviceModel.rateLimiter is not None:
+                    serviceModel.rateLimiter.scale(1 / self.workers)
+                self.serviceModels[serviceName] = serviceModel
+            serviceModel.setUp()
+        return serviceModel
+
+    def run(self):
+        initGlobalVariables(self.config)
+        self.options = serviceModelOptions(self.config)
+        capacity = self.options['concurrency'] * 2
+        response = self.post('/register', {'worker': self.workerId})
+        workerIndex = response['workerIndex']
+        self.scaleRateLimits(response['workers'])
+        GLOBAL_VARIABLES['bucketOrdinal'] = itertools.count(workerIndex * BUCKET_ORDINAL_RANGE + 1)
+        logger.info("Worker {}: connected to {}", self.workerId, self.coordinatorUrl)
+        reporter = threading.Thread(target=self.reportLoop, daemon=True)
+        reporter.start()
+        try:
+            while True:
+                with self.lock:
+                    item = self.local.popleft() if self.local else None
+                if item is None:
+                    response = self.post('/lease', {'worker': self.workerId, 'capacity': capacity})
+                    if response['suites']:
+                        with self.lock:
+                            self.revoked.difference_update(item['taskId'] for item in response['suites'])
+                            self.local.extend(response['suites'])
+                    elif response['done']:
+                        break
+                    else:
+                        time.sleep(0.2)
+                    continue
+                suite = [collections.ChainMap({}, compilePlaceholders(case)) for case in item['suite']]
+                serviceModel = self.getServiceModel(item['service'])
+                serviceModel.dispatchTask(self.runSuite, serviceModel, item['taskId'], item['service'], suite)
+        finally:
+            for serviceModel in self.serviceModels.values():
+                serviceModel.tearDown()
+            self.stopped.set()
+            reporter.join()
+        self.post('/finish', {'worker': self.workerId, 'stats': {serviceName: {
+            'extra_case_api_invoked_count': serviceModel.extra_case_api_invoked_count,
+            'connectionStats': serviceModel.connectionStats,
+            'teardownStats': serviceModel.teardownStats.__getstate__(),
+            'bucketPoolStats': serviceModel.bucketPool.summary() if serviceModel.bucketPool is not None else None,
+            'timingStats': serviceModel.timingStats.__getstate__(),
+            'rateLimitStats': serviceModel.rateLimiter.summary() if serviceModel.rateLimiter is not None else None,
+        } for serviceName, serviceModel in self.serviceModels.items()}})
+        logger.info("Worker {}: finished", self.workerId)
+
+    def runSuite(self, serviceModel, taskId, serviceName, suite):
+        # 已经提交到线程池、但在开始执行前被其它 worker 收回的 suite 不再执行
+        with self.lock:
+            if taskId in self.revoked:
+                self.revoked.discard(taskId)
+                return
+        serviceModel.doRun(taskId, suite, newSuiteLocals())
+        passed = all(case[const.CASE_SUCCESS] if const.CASE_SUCCESS in case else False for case in suite if const.CASE_OPERATION in case)
+        result = {'taskId': taskId, 'service': serviceName, 'status': 'pass' if passed else 'failed', 'suite': ToJsonCompatible(list(map(dict, suite)))}
+        with self.lock:
+            self.reports.append(result)
+
+    def scaleRateLimits(self, workers):
+        workers = max(1, workers)
+        with self.lock:
+            if workers == self.workers:
+                return
+            factor, self.workers = self.workers / workers, workers
+            serviceModels = list(self.serviceModels.values())
+        for serviceModel in serviceModels:
+            if serviceModel.rateLimiter is not None:
+                serviceModel.rateLimiter.scale(factor)
+
+    def reportLoop(self):
+        while True:
+            stopped = self.stopped.wait(REPORT_INTERVAL)
+            with self.lock:
+                reports, self.reports = self.reports, []
+            try:
+                response = self.post('/results', {'worker': self.workerId, 'results': reports})
+            except Exception as e:
+                logger.exception(e)
+                if stopped:
+                    return
+                with self.lock:
+                    self.reports[:0] = reports
+                continue
+            self.scaleRateLimits(response['workers'])
+            if revoked := set(response['revoked']):
+                with self.lock:
+                    self.revoked.update(revoked.difference(item['taskId'] for item in self.local))
+                    self.local = collections.deque(item for item in self.local if item['taskId'] not in revoked)
+            if stopped:
+                return
@@ -1,14 +1,20 @@
+import bisect
+import io
 import itertools
 import json
 import numbers
 import os
+import re
+import sys
 import zipfile
+from xml.sax.saxutils import XMLGenerator
 
 from botocore.model import ServiceModel
 from loguru import logger
 
 from core import const, utils
 from core.models import ServiceTestModel
+from core.result_sink import SUITE_RESULTS, dumpRecord
 
 
 class Exporter:
@@ -28,6 +34,15 @@ class Exporter:
     def doGenerateReport(self, serviceModels: {str, ServiceModel}):
         raise NotImplementedError
 
+    def getTitle(self, case):
+        if const.CASE_TITLE in case:
+            title = case[const.CASE_TITLE]
+        elif const.CASE_OPERATION in case:
+            title = case[const.CASE_OPERATION]
+        else:
+            title = "Unknown"
+        return title
+
 
 def determineFilePath(filePath=None, file='aws_tests', ext="file"):
     if ext is None:
@@ -54,6 +69,54 @@ def determineFilePath(filePath=None, file='aws_tests', ext="file"):
 var_notes = "notes"
 
 
+class CaseNote:
+    """
+    case 的备注内容，编码时才生成：跳过的 case 为完整的 case，其它为 include_fields 中的字段
+    """
+    __slots__ = ('case', 'includeFields', 'skipped')
+
+    def __init__(self, case, includeFields, skipped):
+        self.case = case
+        self.includeFields = includeFields
+        self.skipped = skipped
+
+    def render(self):
+        case = self.case
+        if self.skipped:
+            return utils.ToJsonStr(case)
+        itr = ['### %s ###\n%s' % (str(field).capitalize(), fieldValue if isinstance(fieldValue, (numbers.Number, str)) else utils.ToJsonStr(fieldValue))
+               for field in self.includeFields if field in case and (fieldValue := case[field])]
+        return '\n\n'.join(itr) if itr else None
+
+
+def renderJsonValue(o):
+    if isinstance(o, CaseNote):
+        return o.render()
+    raise TypeError(f'Object of type {o.__class__.__name__} is not JSON serializable')
+
+
+# 包含子 topic 的 dict 逐个字段编码，其它值整体交给 json.dumps（C 实现）
+STREAMED_KEYS = ('rootTopic', 'children', 'attached')
+
+
+def writeJsonStream(value, write):
+    if isinstance(value, list):
+        write('[')
+        for index, item in enumerate(value):
+            if index:
+                write(', ')
+            writeJsonStream(item, write)
+        write(']')
+    elif isinstance(value, dict) and any(key in value for key in STREAMED_KEYS):
+        write('{')
+        for index, (key, item) in enumerate(value.items()):
+            write(f'{", " if index else ""}{json.dumps(key)}: ')
+            writeJsonStream(item, write)
+        write('}')
+    else:
+        write(json.dumps(value, default=renderJsonValue))
+
+
 class XmindExporter(Exporter):
     def __init__(self, config: dict, summary: dict):
         super().__init__("xmind", config, summary)
@@ -66,7 +129,9 @@ class XmindExporter(Exporter):
             raise FileExistsError(f'{self.filePath} already exists')
         zf = zipfile.ZipFile(self.filePath, 'w')
         try:
-            zf.writestr('content.json', json.dumps(content))
+            # 逐个 topic 编码写入 zip，不生成完整的 json 字符串
+            with io.TextIOWrapper(zf.open('content.json', 'w'), encoding='utf-8') as fp:
+                writeJsonStream(content, fp.write)
             zf.writestr('manifest.json', json.dumps({"file-entries": {"content.json": {}, "metadata.json": {}}}))
             zf.writestr('metadata.json',
                         json.dumps({"creator": {"name": "Vana", "version": "12.0.2.202204260739"}}))
@@ -88,264 +153,187 @@ class XmindExporter(Exporter):
             else:
                 self.appendTopics(subTopics, hideEnabled, 'FAILED', serviceModel.suite_failed, "#E32C2D", False)
             self.appendTopicsAggs(subTopics, hideEnabled, 'SKIPPED', serviceModel.suite_skipped, "#D0D0D0", True)
+            if serviceModel.suite_cached:
+                self.appendTopicsAggs(subTopics, hideEnabled, 'CACHED_PASS', serviceModel.suite_cached, "#8BC34A", True)
             content.append(sheet)
         return content
 
     def appendTopicsAggs(self, subTopics, hideEnabled, topicTitle, suites, lineColor, foldBranch=True):
-        caseTree, caseNodes = {}, []
-        var_parent, var_data, var_nodes, var_tree = 'parent', 'data', 'nodes', 'tree'
+        # 相同 (title, clientName, 断言状态码) 的 case 合并为同一个 topic
+        root = TopicTrie()
+        styles = topicStyles(lineColor)
         for suite in suites:
-            mid, midTree, midNodes = None, caseTree, caseNodes
+            node = root
             for case in suite:
-                ignoreCase, caseSkipped, caseFailed = False, True, False
-                if hideEnabled and const.HIDE in case and case[const.HIDE]:
-                    ignoreCase = True
-                if const.CASE_OPERATION not in case:
-                    if ignoreCase:
-                        continue
-                    # style for fork node
-                    style = {
-                        "line-pattern": "solid",
-                        "line-width": "3pt",
-                        "line-color": lineColor,
-                        "fo:color": "#000000FF",
-                        "fo:font-weight": "bold",
-                    }
-                elif const.CASE_SUCCESS not in case:
-                    if ignoreCase:
-                        continue
-                    # style for skipped case
-                    style = {
-                        "line-pattern": "solid",
-                        "line-width": "3pt",
-                        "svg:fill": "#D0D0D0FF",
-                        "line-color": "#D0D0D0FF",
-                        "fo:color": "#000000FF",
-                    }
-                else:
-                    caseSkipped = False
-                    if case[const.CASE_SUCCESS]:
-                        if ignoreCase:
-                            continue
-                        # style for skipped case
-                        style = {
-                            "line-pattern": "solid",
-                            "svg:fill": "#15831CFF",
-                            "line-width": "3pt",
-                            "line-color": lineColor,
-                        }
-                    else:
-                        caseFailed = True
-                        # style for skipped case
-                        style = {
-                            "line-pattern": "solid",
-                            "svg:fill": "#E32C2D",
-                            "line-width": "3pt",
-                            "line-color": lineColor,
-                        }
+                caseSkipped, caseFailed, style = caseStatus(case, styles)
+                # 隐藏的 case 失败时仍然展示
+                if hideEnabled and not caseFailed and const.HIDE in case and case[const.HIDE]:
+                    continue
                 title = self.getTitle(case)
                 clientName = case[const.CASE_CLIENT_NAME] if const.CASE_CLIENT_NAME in case else ''
                 caseResponseCode = caseAssertion[const.CASE_ASSERTION_CODE] if const.CASE_ASSERTION in case and (
                     caseAssertion := case[const.CASE_ASSERTION]) and const.CASE_ASSERTION_CODE in caseAssertion else ''
-                key = f'{title}_{clientName}_{caseResponseCode}'
+                key = (title, clientName, caseResponseCode)
 
                 # find existing tree node
-                if key in midTree:
-                    mid = midTree[key]
-                    midTree, midNodes, midData = mid[var_tree], mid[var_nodes], mid[var_data]
-                    clearNotes = not caseSkipped and not caseFailed
-                    if not self.clearTreeNode:
-                        continue
-                    if clearNotes and var_notes in midData:
-                        del midData[var_notes]
-                    if var_parent in mid:
-                        parentNode = mid[var_parent]
-                        while parentNode:
-                            if clearNotes and var_data in parentNode:
-                                parentNodeData = parentNode[var_data]
-                                if 'note' in parentNodeData:
-                                    del parentNode['note']
-                            parentNode = parentNode[var_parent] if var_parent in parentNode else None
+                if (child := node.children.get(key)) is not None:
+                    node = child
+                    if self.clearTreeNode and not caseSkipped and not caseFailed and var_notes in node.data:
+                        del node.data[var_notes]
                     continue
 
                 # create new tree node
-                newSubNodes, newSubTree = [], {}
-                caseOrder = 0
-                if const.ORDER in case:
-                    caseOrder = case[const.ORDER]
-                    del case[const.ORDER]
-                newCaseData = {
-                    const.ORDER: caseOrder,
-                    "title": title,
-                    "style": {
-                        "properties": style
-                    },
-                    "children": {
-                        "attached": newSubNodes
-                    },
-                    "labels": [
-                        f'{clientName}-{caseResponseCode}' if caseResponseCode else clientName
-                    ] if clientName else None,
-                    "markers": [
-                        {
-                            "markerId": "symbol-exclam"
-                        }
-                    ] if caseFailed else None,
-                    var_notes: {
-                        "plain": {
-                            "content": utils.ToJsonStr(case) if caseSkipped else ('\n\n'.join(itr) if (
-                                itr := ['### %s ###\n%s' % (
-                                    str(field).capitalize(), fieldValue if isinstance(fieldValue, (numbers.Number, str)) else utils.ToJsonStr(fieldValue))
-                                        for field in self.includeFields if field in case and (fieldValue := case[field])]) else None)
-                        }
-                    } if caseSkipped and case or self.includeFields and [field for field in self.includeFields if field in case] else None
-                }
-                newNode = {var_parent: mid, var_data: newCaseData, var_tree: newSubTree, var_nodes: newSubNodes}
-
-                midNodes.append(newCaseData)
-                midTree[key] = newNode
-
-                midNodes, midTree, mid = newSubNodes, newSubTree, newNode
-        if caseNodes:
-            sortNodes(caseNodes)
-            subTopics.append({
-                "title": topicTitle,
-                "branch": "folded" if foldBranch else None,
-                "children": {
-                    "attached": caseNodes,
-                },
-                "style": {
-                    "properties": {
-                        "line-pattern": "solid",
-                        "svg:fill": lineColor,
-                        "line-width": "3pt",
-                        "line-color": lineColor,
-                    }
-                }})
+                # tree 模式下 case 为共享节点，不能删除其中的字段
+                node = node.insert(key, case[const.ORDER] if const.ORDER in case else 0,
+                                   self.caseTopic(case, title, clientName, caseResponseCode, style, caseSkipped, caseFailed))
+        if root.topics:
+            subTopics.append(branchTopic(topicTitle, root.topics, lineColor, foldBranch))
 
-    def getTitle(self, case):
-        if const.CASE_TITLE in case:
-            title = case[const.CASE_TITLE]
-            del case[const.CASE_TITLE]
-        elif const.CASE_OPERATION in case:
-            title = case[const.CASE_OPERATION]
-        else:
-            title = "Unknown"
-        return title
+    def caseTopic(self, case, title, clientName, caseResponseCode, style, caseSkipped, caseFailed):
+        return {
+            "title": title,
+            "style": style,
+            "children": {
+                "attached": []
+            },
+            "labels": [
+                f'{clientName}-{caseResponseCode}' if caseResponseCode else clientName
+            ] if clientName else None,
+            "markers": FAILED_MARKERS if caseFailed else None,
+            var_notes: {
+                "plain": {
+                    # 备注在写入 content.json 时才生成
+                    "content": CaseNote(case, self.includeFields, caseSkipped)
+                }
+            } if caseSkipped and case or self.includeFields and [field for field in self.includeFields if field in case] else None
+        }
 
     def appendTopics(self, subTopics, hideEnabled, topicTitle, suites, lineColor, foldBranch=True):
-        caseNodes = []
+        # 每个 suite 为一条独立的分支，按 __order__ 有序插入
+        root = TopicTrie()
+        styles = topicStyles(lineColor)
         for suite in suites:
-            midNodes = caseNodes
+            suiteTopic, midNodes = None, None
             for case in suite:
-                ignoreCase, caseSkipped, caseFailed = False, True, False
-                if hideEnabled and const.HIDE in case and case[const.HIDE]:
-                    ignoreCase = True
-                if const.CASE_OPERATION not in case:
-                    if ignoreCase:
-                        continue
-                    # style for fork node
-                    style = {
-                        "line-pattern": "solid",
-                        "line-width": "3pt",
-                        "line-color": lineColor,
-                        "fo:color": "#000000FF",
-                        "fo:font-weight": "bold",
-                    }
-                elif const.CASE_SUCCESS not in case:
-                    if ignoreCase:
-                        continue
-                    # style for skipped case
-                    style = {
-                        "line-pattern": "solid",
-                        "line-width": "3pt",
-                        "svg:fill": "#D0D0D0FF",
-                        "line-color": "#D0D0D0FF",
-                        "fo:color": "#000000FF",
-                    }
-                else:
-                    caseSkipped = False
-                    if case[const.CASE_SUCCESS]:
-                        if ignoreCase:
-                            continue
-                        # style for skipped case
-                        style = {
-                            "line-pattern": "solid",
-                            "svg:fill": "#15831CFF",
-                            "line-width": "3pt",
-                            "line-color": lineColor,
-                        }
-                    else:
-                        caseFailed = True
-                        # style for skipped case
-                        style = {
-                            "line-pattern": "solid",
-                            "svg:fill": "#E32C2D",
-                            "line-width": "3pt",
-                            "line-color": lineColor,
-                        }
+                caseSkipped, caseFailed, style = caseStatus(case, styles)
+                # 隐藏的 case 失败时仍然展示
+                if hideEnabled and not caseFailed and const.HIDE in case and case[const.HIDE]:
+                    continue
                 title = self.getTitle(case)
                 clientName = case[const.CASE_CLIENT_NAME] if const.CASE_CLIENT_NAME in case else ''
                 caseResponseCode = caseAssertion[const.CASE_ASSERTION_CODE] if const.CASE_ASSERTION in case and (
                     caseAssertion := case[const.CASE_ASSERTION]) and const.CASE_ASSERTION_CODE in caseAssertion else ''
 
-                newSubNodes = []
-                newCaseData = {
-                    const.ORDER: case[const.ORDER] if const.ORDER in case else 0,
-                    "title": title,
-                    "style": {
-                        "properties": style
-                    },
-                    "children": {
-                        "attached": newSubNodes
-                    },
-                    "labels": [
-                        f'{clientName}-{caseResponseCode}' if caseResponseCode else clientName
-                    ] if clientName else None,
-                    "markers": [
-                        {
-                            "markerId": "symbol-exclam"
-                        }
-                    ] if caseFailed else None,
-                    var_notes: {
-                        "plain": {
-                            "content": utils.ToJsonStr(case) if caseSkipped else ('\n\n'.join(itr) if (
-                                itr := ['### %s ###\n%s' % (
-                                    str(field).capitalize(), fieldValue if isinstance(fieldValue, (numbers.Number, str)) else utils.ToJsonStr(fieldValue))
-                                        for field in self.includeFields if field in case and (fieldValue := case[field])]) else None)
-                        }
-                    } if caseSkipped and case or self.includeFields and [field for field in self.includeFields if field in case] else None
-                }
+                newCaseData = self.caseTopic(case, title, clientName, caseResponseCode, style, caseSkipped, caseFailed)
+                if suiteTopic is None:
+                    suiteTopic = newCaseData
+                    root.insertTopic(case[const.ORDER] if const.ORDER in case else 0, newCaseData)
+                else:
+                    midNodes.append(newCaseData)
+                midNodes = newCaseData["children"]["attached"]
+        if root.topics:
+            subTopics.append(branchTopic(topicTitle, root.topics, lineColor, foldBranch))
+
+
+class TopicTrie:
+    """
+    聚合 topic 的前缀树节点：children 按 (title, clientName, 断言状态码) 索引子节点，
+    topics 为子 topic 列表，按 __order__ 插入（相同时保持插入顺序），生成后不需要再排序
+    """
+    __slots__ = ('children', 'topics', 'orders', 'data')
+
+    def __init__(self, data=None):
+        self.children = {}
+        self.topics = data["children"]["attached"] if data is not None else []
+        self.orders = []
+        self.data = data
+
+    def insertTopic(self, order, data):
+        index = bisect.bisect_right(self.orders, order)
+        self.orders.insert(index, order)
+        self.topics.insert(index, data)
+
+    def insert(self, key, order, data):
+        self.insertTopic(order, data)
+        # 相同标题的 case 很多，键中的字符串驻留后共享
+        key = tuple(sys.intern(item) if type(item) is str else item for item in key)
+        node = self.children[key] = TopicTrie(data)
+        return node
+
+
+FAILED_MARKERS = [
+    {
+        "markerId": "symbol-exclam"
+    }
+]
+
+
+def topicStyles(lineColor):
+    # 同一分支中相同状态的 topic 共用 style 对象
+    return {
+        'fork': {
+            "properties": {
+                "line-pattern": "solid",
+                "line-width": "3pt",
+                "line-color": lineColor,
+                "fo:color": "#000000FF",
+                "fo:font-weight": "bold",
+            }
+        },
+        'skipped': {
+            "properties": {
+                "line-pattern": "solid",
+                "line-width": "3pt",
+                "svg:fill": "#D0D0D0FF",
+                "line-color": "#D0D0D0FF",
+                "fo:color": "#000000FF",
+            }
+        },
+        'pass': {
+            "properties": {
+                "line-pattern": "solid",
+                "svg:fill": "#15831CFF",
+                "line-width": "3pt",
+                "line-color": lineColor,
+            }
+        },
+        'failed': {
+            "properties": {
+                "line-pattern": "solid",
+                "svg:fill": "#E32C2D",
+                "line-width": "3pt",
+                "line-color": lineColor,
+            }
+        },
+    }
+
+
+def caseStatus(case, styles):
+    # 返回 (caseSkipped, caseFailed, style)，没有 operation 的 case 为 fork 节点
+    if const.CASE_OPERATION not in case:
+        return True, False, styles['fork']
+    if const.CASE_SUCCESS not in case:
+        return True, False, styles['skipped']
+    if case[const.CASE_SUCCESS]:
+        return False, False, styles['pass']
+    return False, True, styles['failed']
 
-                midNodes.append(newCaseData)
-                midNodes = newSubNodes
-        if caseNodes:
-            sortNodes(caseNodes)
-            subTopics.append({
-                "title": topicTitle,
-                "branch": "folded" if foldBranch else None,
-                "children": {
-                    "attached": caseNodes,
-                },
-                "style": {
-                    "properties": {
-                        "line-pattern": "solid",
-                        "svg:fill": lineColor,
-                        "line-width": "3pt",
-                        "line-color": lineColor,
-                    }
-                }})
-
-
-def sortNodes(nodes):
-    list.sort(nodes, key=lambda n: n[const.ORDER])
-    for node in nodes:
-        del node[const.ORDER]
-        if 'children' in node:
-            children = node['children']
-            if 'attached' in children:
-                attachedNodes = children['attached']
-                sortNodes(attachedNodes)
+
+def branchTopic(topicTitle, topics, lineColor, foldBranch):
+    return {
+        "title": topicTitle,
+        "branch": "folded" if foldBranch else None,
+        "children": {
+            "attached": topics,
+        },
+        "style": {
+            "properties": {
+                "line-pattern": "solid",
+                "svg:fill": lineColor,
+                "line-width": "3pt",
+                "line-color": lineColor,
+            }
+        }}
 
 
 def createSheet(serviceName, serviceSummary):
@@ -364,11 +352,20 @@ def createSheet(serviceName, serviceSummary):
             "notes": {
                 "plain": {
                     "content": '\n\n'.join([
-                        '### Suite Summary ###\n%s' % '\n'.join(l) if (l := ['%s: %s' % (k, v) for k in ['suiteTotal', 'suitePassCount', 'suiteFailedCount', 'suiteSkippedCount']
+                        '### Suite Summary ###\n%s' % '\n'.join(l) if (l := ['%s: %s' % (k, v) for k in ['suiteTotal', 'suitePassCount', 'suiteFailedCount', 'suiteSkippedCount', 'suiteCachedCount']
                                                                              if k in serviceSummary and (v := serviceSummary[k]) is not None]) else '',
 
                         '### Suite Case Summary ###\n%s' % '\n'.join(l) if (l := ['%s: %s' % (k, v) for k in ['caseTotal', 'casePassCount', 'caseFailedCount', 'caseSkippedCount', 'apiInvokedCount']
                                                                                   if k in serviceSummary and (v := serviceSummary[k]) is not None]) else '',
+
+                        '### Slowest Operations ###\n%s' % '\n'.join(l) if 'timingStats' in serviceSummary and (
+                            l := ['%s: mean %sms, max %sms, count %s' % (o['operation'], o['mean'], o['max'], o['count']) for o in serviceSummary['timingStats']['slowestOperations']]) else '',
+
+                        '### Adaptive Concurrency ###\n%s' % '\n'.join('%s: %s' % (k, v) for k, v in serviceSummary['adaptiveConcurrency'].items() if k != 'history')
+                        if 'adaptiveConcurrency' in serviceSummary else '',
+
+                        '### Slowest Suites ###\n%s' % '\n'.join(l) if 'timingStats' in serviceSummary and (
+                            l := ['%s: %ss' % (o['suiteId'], o['seconds']) for o in serviceSummary['timingStats']['slowestSuites']]) else '',
                     ])
                 }
             } if serviceSummary else None,
@@ -579,6 +576,129 @@ def createSheet(serviceName, serviceSummary):
     return sheet, subTopics
 
 
+# XML 1.0 不允许的控制字符
+INVALID_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+
+
+def iterSuites(serviceModel):
+    # 按状态依次返回 (status, suite)，不复制结果列表
+    for status, attr in SUITE_RESULTS.items():
+        for suite in getattr(serviceModel, attr):
+            if suite:
+                yield status, suite
+
+
+def caseStatusName(case):
+    if const.CASE_SUCCESS not in case:
+        return 'skipped'
+    return 'pass' if case[const.CASE_SUCCESS] else 'failed'
+
+
+def suiteSeconds(suite):
+    return sum(case[const.CASE_TIMING]['total'] for case in suite if const.CASE_TIMING in case and case[const.CASE_TIMING]) / 1000
+
+
+def xmlText(value):
+    return INVALID_XML_CHARS.sub('?', str(value))
+
+
+class JunitExporter(Exporter):
+    """
+    JUnit XML 报告：每个服务一个 testsuite，每个展开后的 suite 一个 testcase（name 为 suite_id），
+    case 的耗时和错误信息写在 system-out / failure 中；逐个 suite 写入文件，不在内存中构建文档
+    """
+
+    def __init__(self, config: dict, summary: dict):
+        super().__init__("xml", config, summary)
+
+    def doGenerateReport(self, serviceModels: {str, ServiceTestModel}):
+        if os.path.exists(self.filePath):
+            raise FileExistsError(f'{self.filePath} already exists')
+        with open(self.filePath, 'w', encoding='utf-8') as fp:
+            xml = XMLGenerator(fp, encoding='utf-8', short_empty_elements=True)
+            xml.startDocument()
+            xml.startElement('testsuites', {'name': 'aws_tests'})
+            for serviceName, serviceModel in serviceModels.items():
+                self.writeTestSuite(xml, serviceName, serviceModel)
+            xml.endElement('testsuites')
+            xml.endDocument()
+        logger.info('junit_reports: %s' % self.filePath)
+
+    def writeTestSuite(self, xml, serviceName, serviceModel):
+        counts = {status: len(getattr(serviceModel, attr)) for status, attr in SUITE_RESULTS.items()}
+        seconds = sum(suiteSeconds(suite) for _, suite in iterSuites(serviceModel))
+        xml.startElement('testsuite', {'name': serviceName, 'tests': str(sum(counts.values())), 'failures': str(counts['failed']), 'errors': '0',
+                                       'skipped': str(counts['skipped'] + counts['cached']), 'time': f'{seconds:.3f}'})
+        for status, suite in iterSuites(serviceModel):
+            xml.startElement('testcase', {'name': suite[0][const.SUITE_ID], 'classname': serviceName, 'time': f'{suiteSeconds(suite):.3f}'})
+            if status == 'failed':
+                errors = [f'{self.getTitle(case)}: {case[const.ERROR_INFO]}' for case in suite if const.ERROR_INFO in case and case[const.ERROR_INFO]]
+                xml.startElement('failure', {'message': xmlText(errors[0] if errors else 'failed')})
+                xml.characters(xmlText('\n'.join(errors)))
+                xml.endElement('failure')
+            elif status == 'skipped':
+                xml.startElement('skipped', {})
+                xml.endElement('skipped')
+            elif status == 'cached':
+                xml.startElement('skipped', {'message': 'cached pass'})
+                xml.endElement('skipped')
+            if status != 'cached':
+                xml.startElement('system-out', {})
+                xml.characters(xmlText('\n'.join(self.caseLine(case) for case in suite if const.CASE_OPERATION in case)))
+                xml.endElement('system-out')
+            xml.endElement('testcase')
+        xml.endElement('testsuite')
+
+    def caseLine(self, case):
+        # 每个 case 一行：标题、操作、状态和耗时（毫秒）
+        line = f'{self.getTitle(case)} [{case[const.CASE_OPERATION]}] {caseStatusName(case).upper()}'
+        if const.CASE_TIMING in case and (timing := case[const.CASE_TIMING]):
+            line += ' ' + ', '.join(f'{phase} {value}ms' for phase, value in timing.items())
+        if const.ERROR_INFO in case and case[const.ERROR_INFO]:
+            line += f' {case[const.ERROR_INFO]}'
+        return line
+
+
+class JsonExporter(Exporter):
+    """
+    紧凑的 JSON 报告：{"summary": {...}, "suites": [...]}，每个展开后的 suite 一条记录（按 suite_id），
+    包含每个 case 的状态、耗时、失败时的 errorInfo 和 include_fields 中的字段；每行一个 suite，逐个写入文件
+    """
+
+    def __init__(self, config: dict, summary: dict):
+        super().__init__("json", config, summary)
+
+    def doGenerateReport(self, serviceModels: {str, ServiceTestModel}):
+        if os.path.exists(self.filePath):
+            raise FileExistsError(f'{self.filePath} already exists')
+        with open(self.filePath, 'w', encoding='utf-8') as fp:
+            fp.write(f'{{"summary":{dumpRecord(self.summary)},"suites":[')
+            first = True
+            for serviceName, serviceModel in serviceModels.items():
+                for status, suite in iterSuites(serviceModel):
+                    fp.write(('\n' if first else ',\n') + dumpRecord(self.suiteRecord(serviceName, status, suite)))
+                    first = False
+            fp.write(']}\n')
+        logger.info('json_reports: %s' % self.filePath)
+
+    def suiteRecord(self, serviceName, status, suite):
+        return {'suiteId': suite[0][const.SUITE_ID], 'service': serviceName, 'status': status, 'seconds': round(suiteSeconds(suite), 3),
+                'cases': [self.caseRecord(case) for case in suite if const.CASE_OPERATION in case]}
+
+    def caseRecord(self, case):
+        record = {'title': self.getTitle(case), 'operation': case[const.CASE_OPERATION], 'status': caseStatusName(case)}
+        if const.CASE_TIMING in case and case[const.CASE_TIMING]:
+            record[const.CASE_TIMING] = case[const.CASE_TIMING]
+        if const.ERROR_INFO in case and case[const.ERROR_INFO]:
+            record[const.ERROR_INFO] = case[const.ERROR_INFO]
+        for field in self.includeFields:
+            if field not in record and field in case and case[field] is not None:
+                record[field] = case[field]
+        return record
+
+
 EXPORTER_DICT = {
-    "xmind": XmindExporter
+    "xmind": XmindExporter,
+    "junit": JunitExporter,
+    "json": JsonExporter,
 }
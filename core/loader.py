@@ -1,14 +1,24 @@
+import hashlib
 import io
+import itertools
 import json
 import os
+import pickle
 import sys
 import zipfile
+from concurrent.futures import ProcessPoolExecutor
 
 import yaml
 from loguru import logger
 
 from core import const
 
+# 解析逻辑（parseTopics/parseTopic）变更时需要递增，使已有的缓存失效
+XMIND_PARSER_VERSION = 1
+
+# 优先使用 libyaml 实现的 CSafeLoader
+YamlSafeLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
 
 def loadFileData(filePath, loader):
     if not os.path.isfile(filePath):
@@ -21,6 +31,29 @@ def loadFileData(filePath, loader):
     return loader(payload)
 
 
+def yamlSafeLoad(payload):
+    return yaml.load(payload, Loader=YamlSafeLoader)
+
+
+def loadYamlData(filePath):
+    return loadFileData(filePath, yamlSafeLoad)
+
+
+# 文件较少时进程池的启动和结果序列化开销大于并行解析的收益
+PARALLEL_LOAD_MIN_FILES = 4
+
+
+# 使用进程池并行加载多个文件，返回结果与 filePaths 顺序一致；processes <= 1 或文件较少时在当前进程加载
+def loadFilesParallel(loadFunc, filePaths, processes=None, *args):
+    if processes is None:
+        processes = os.cpu_count() or 1 if len(filePaths) >= PARALLEL_LOAD_MIN_FILES else 1
+    processes = min(processes, len(filePaths))
+    if processes <= 1:
+        return [loadFunc(filePath, *args) for filePath in filePaths]
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        return list(pool.map(loadFunc, filePaths, *[itertools.repeat(arg, len(filePaths)) for arg in args]))
+
+
 def loadConfig():
     filePath = os.getenv("aws_config", "config/config-seaweedfs.yaml")
     logger.info(f'logger config from {filePath}')
@@ -133,11 +166,75 @@ def parseTopic(path, topic):
     return topicTitle, suiteCase, subTopics
 
 
-def loadXmindData(path):
+# xmind 解析缓存：以 content.json 的 sha256 + 解析器版本为 key，缓存解析后的用例树
+# 同时按文件路径记录 size/mtime 对应的 content hash，文件未变更时无需解压 xmind
+def xmindCachePath(cacheDir, contentHash):
+    return os.path.join(cacheDir, f'{contentHash}.v{XMIND_PARSER_VERSION}.pickle')
+
+
+def xmindStatPath(cacheDir, path):
+    return os.path.join(cacheDir, 'stat-%s.json' % hashlib.sha256(os.path.abspath(path).encode('utf-8')).hexdigest())
+
+
+def readXmindCache(cacheDir, contentHash):
+    cachePath = xmindCachePath(cacheDir, contentHash)
+    if not os.path.isfile(cachePath):
+        return None
+    try:
+        with open(cachePath, 'rb') as fp:
+            return pickle.load(fp)
+    except Exception as e:
+        logger.warning("Ignoring broken xmind cache {}: {}", cachePath, e)
+        return None
+
+
+def readXmindStat(cacheDir, path):
+    statPath = xmindStatPath(cacheDir, path)
+    if not os.path.isfile(statPath):
+        return None
+    try:
+        with open(statPath, 'r') as fp:
+            stat, fileStat = json.load(fp), os.stat(path)
+        if stat['size'] == fileStat.st_size and stat['mtime_ns'] == fileStat.st_mtime_ns:
+            return stat['content_hash']
+    except Exception as e:
+        logger.warning("Ignoring broken xmind stat {}: {}", statPath, e)
+    return None
+
+
+def writeAtomic(filePath, data: bytes):
+    tmpPath = f'{filePath}.{os.getpid()}.tmp'
+    with open(tmpPath, 'wb') as fp:
+        fp.write(data)
+    os.replace(tmpPath, filePath)
+
+
+def writeXmindCache(cacheDir, path, contentHash, result=None):
+    try:
+        os.makedirs(cacheDir, exist_ok=True)
+        if result is not None:
+            writeAtomic(xmindCachePath(cacheDir, contentHash), pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
+        fileStat = os.stat(path)
+        stat = {'size': fileStat.st_size, 'mtime_ns': fileStat.st_mtime_ns, 'content_hash': contentHash}
+        writeAtomic(xmindStatPath(cacheDir, path), json.dumps(stat).encode('utf-8'))
+    except Exception as e:
+        logger.warning("Failed to write xmind cache for {}: {}", path, e)
+
+
+def loadXmindData(path, cacheDir=None):
     zf = None
     try:
+        if cacheDir and (contentHash := readXmindStat(cacheDir, path)) and (result := readXmindCache(cacheDir, contentHash)) is not None:
+            logger.debug("Loading : {} (cached)", path)
+            return result
         zf = zipfile.ZipFile(path)
         content = zf.read('content.json')
+        contentHash = None
+        if cacheDir:
+            contentHash = hashlib.sha256(content).hexdigest()
+            if (result := readXmindCache(cacheDir, contentHash)) is not None:
+                writeXmindCache(cacheDir, path, contentHash)
+                return result
         data = json.load(io.BytesIO(content))
 
         result = {}
@@ -164,6 +261,8 @@ def loadXmindData(path):
                         # 基于 serviceName 分组（s3, es, ..)
                         result[serviceName] = serviceSuites
         # postProcess(result)
+        if cacheDir:
+            writeXmindCache(cacheDir, path, contentHash, result)
         return result
     finally:
         if zf is not None:
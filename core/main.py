@@ -5,9 +5,13 @@ from time import time
 from loguru import logger
 
 from core import const
+from core.distributed import Coordinator, Worker
 from core.exporters import EXPORTER_DICT
 from core.loader import loadConfig
-from core.models import initServicesTestModels, reportResult
+from core.metrics import newMetrics
+from core.models import ServiceTestModel, initServicesTestModels, reportResult, runWorkers, serviceModelOptions
+from core.result_sink import SUITE_RESULTS, iterSuiteRecords, loadResults, newResultSink
+from core.results_store import RERUN_CHANGED, RERUN_FAILED, RERUN_SINCE_LAST, saveResults
 
 
 from typing import List
@@ -34,27 +38,111 @@ def parseFilterPatterns(args: List = None):
 
 from typing import List
 
+# --workers N：按 suite 分片到 N 个进程执行
+# --coordinator HOST:PORT：作为分布式执行的 coordinator，加载 suites 并分配给 worker
+# --worker HOST:PORT：作为分布式执行的 worker，从 coordinator 拉取 suite 执行
+# --from-results PATH：不执行 suites，从流式结果文件重新生成汇总和报告
+RUN_OPTIONS = {'--workers': 1, '--coordinator': None, '--worker': None, '--from-results': None}
+# --rerun-failed：只执行结果存储中上次失败的 suite
+# --since-last：只执行上次失败或没有执行过的 suite
+# --changed：跳过定义（操作、参数、断言、client）没有变化且上次在同一 endpoint 上通过的 suite
+RUN_FLAGS = {'--rerun-failed': RERUN_FAILED, '--since-last': RERUN_SINCE_LAST, '--changed': RERUN_CHANGED}
+
+
+def parseRunOptions(args: List[str]):
+    options, remaining = dict(RUN_OPTIONS), []
+    options[const.RERUN] = None
+    argsIter = iter(args)
+    for arg in argsIter:
+        if arg in RUN_FLAGS:
+            options[const.RERUN] = RUN_FLAGS[arg]
+            continue
+        name, _, value = arg.partition('=')
+        if name not in RUN_OPTIONS:
+            remaining.append(arg)
+            continue
+        if not value and (value := next(argsIter, None)) is None:
+            raise ValueError(f'Invalid Argument, {name} requires a value')
+        options[name] = value
+    options['--workers'] = int(options['--workers'])
+    if options['--workers'] < 1:
+        raise ValueError('Invalid Argument, --workers must be positive', options['--workers'])
+    return options, remaining
+
+
 def main(args: List[str]):
     start = time()
 
     config = loadConfig()
 
+    options, args = parseRunOptions(args)
+    if options['--worker']:
+        Worker(config, options['--worker']).run()
+        return
+
+    if options['--from-results']:
+        sms = loadResultModels(config, options['--from-results'])
+        exportResults(config, reportResult(sms), sms)
+        return
+
+    if options[const.RERUN]:
+        config[const.RERUN] = options[const.RERUN]
     includePatterns, excludePatterns = parseFilterPatterns(args)
-    sms = initServicesTestModels(config, includePatterns, excludePatterns)
+    sms = initServicesTestModels(config, list(includePatterns), list(excludePatterns))
     if len(sms) == 0:
         logger.info("No serviceModels loaded.")
         return
 
-    for serviceName, serviceModel in sms.items():
-        logger.info(f'Run ServiceModel: {serviceName}')
-        serviceModel.setUp()
-        serviceModel.run()
-        serviceModel.tearDown()
+    resultSink = newResultSink(config)
+    if resultSink is not None:
+        resultSink.start(sms)
+    try:
+        if options['--coordinator']:
+            host, _, port = options['--coordinator'].rpartition(':')
+            Coordinator(sms, host or '0.0.0.0', int(port)).run()
+        elif options['--workers'] > 1:
+            runWorkers(config, includePatterns, excludePatterns, options['--workers'], sms)
+        else:
+            metrics = newMetrics(config)
+            if metrics is not None:
+                metrics.start(sms)
+            try:
+                for serviceName, serviceModel in sms.items():
+                    logger.info(f'Run ServiceModel: {serviceName}')
+                    serviceModel.setUp()
+                    serviceModel.run()
+                    serviceModel.tearDown()
+            finally:
+                if metrics is not None:
+                    metrics.stop()
+    finally:
+        if resultSink is not None:
+            resultSink.close()
+    if resultSink is not None and resultSink.dropResponses:
+        # 执行期间 response 已经从内存中删除，报告从结果文件重建
+        loadResults(resultSink.path, sms)
 
     end = time()
     logger.info('Tests Completed. Time Spent: %.2fs' % (end - start))
     summary = reportResult(sms)
+    saveResults(sms)
+    exportResults(config, summary, sms)
+
+
+def loadResultModels(config, path):
+    options = serviceModelOptions(config)
+    sms, serviceRecords = {}, {}
+    for serviceName, status, cases in iterSuiteRecords(path, serviceRecords):
+        if serviceName not in sms:
+            sms[serviceName] = ServiceTestModel(serviceName, None, includePatterns=[], excludePatterns=[], xmindSuites=None, **options)
+        getattr(sms[serviceName], SUITE_RESULTS[status]).append(cases)
+    for serviceName, serviceRecord in serviceRecords.items():
+        if serviceName in sms:
+            sms[serviceName].increaseExtraCaseApisCount(serviceRecord['extraApiCalls'])
+    return sms
+
 
+def exportResults(config, summary, sms):
     if const.EXPORTERS in config and (exporters := config[const.EXPORTERS]):
         for name, conf in exporters.items():
             if name in EXPORTER_DICT:
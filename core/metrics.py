@@ -0,0 +1,184 @@
+import bisect
+import http.server
+import os
+import threading
+
+from loguru import logger
+
+from core import const
+
+# 请求延迟直方图的桶上限（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# textfile 的重写间隔（秒）
+METRICS_INTERVAL = 5
+
+METRIC_PREFIX = 'aws_tests_'
+METRIC_TYPES = {
+    'cases_started_total': ('counter', 'Cases started, by operation'),
+    'cases_passed_total': ('counter', 'Cases passed, by operation'),
+    'cases_failed_total': ('counter', 'Cases failed, by operation'),
+    'api_calls_total': ('counter', 'API calls sent by cases'),
+    'extra_api_calls_total': ('counter', 'API calls sent by predefined functions, bucket pool and auto clean'),
+    'requests_in_flight': ('gauge', 'API requests currently in flight'),
+    'threadpool_queue_depth': ('gauge', 'Tasks waiting in the suite thread pool queue'),
+    'suites_passed': ('gauge', 'Suites passed so far'),
+    'suites_failed': ('gauge', 'Suites failed so far'),
+    'concurrency_limit': ('gauge', 'Current adaptive concurrency limit'),
+    'rate_limit_wait_seconds_total': ('counter', 'Time requests waited on rate limiters'),
+    'request_duration_seconds': ('histogram', 'API request latency (build, network and parse)'),
+}
+
+
+def formatLabels(labels, extra=None):
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    return '{%s}' % ','.join('%s="%s"' % (k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')) for k, v in pairs)
+
+
+def formatValue(value):
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Metrics:
+    """
+    运行期间的指标，输出为 Prometheus 文本格式：可以通过 HTTP 端点拉取，或定期重写到 textfile（node_exporter textfile collector）
+    """
+
+    def __init__(self, listen=None, textfile=None, interval=METRICS_INTERVAL):
+        self.listen = listen
+        self.textfile = textfile
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.values = {}
+        self.histograms = {}
+        self.serviceModels = {}
+        self.server = None
+        self.writer = None
+        self.stopped = threading.Event()
+
+    def inc(self, name, labels, value=1):
+        with self.lock:
+            self.values[(name, labels)] = self.values.get((name, labels), 0) + value
+
+    def dec(self, name, labels, value=1):
+        self.inc(name, labels, -value)
+
+    def observe(self, name, labels, seconds):
+        with self.lock:
+            if (histogram := self.histograms.get((name, labels))) is None:
+                histogram = self.histograms[(name, labels)] = [[0] * len(LATENCY_BUCKETS), 0.0, 0]
+            index = bisect.bisect_left(LATENCY_BUCKETS, seconds)
+            if index < len(LATENCY_BUCKETS):
+                histogram[0][index] += 1
+            histogram[1] += seconds
+            histogram[2] += 1
+
+    def collect(self):
+        # 线程池队列深度、额外 API 调用数和 suite 结果在导出时读取
+        for serviceName, serviceModel in self.serviceModels.items():
+            labels = (('service', serviceName),)
+            # noinspection PyProtectedMember
+            yield 'threadpool_queue_depth', labels, serviceModel.threadPool._work_queue.qsize()
+            yield 'extra_api_calls_total', labels, serviceModel.extra_case_api_invoked_count
+            yield 'suites_passed', labels, len(serviceModel.suite_pass)
+            yield 'suites_failed', labels, len(serviceModel.suite_failed)
+            if serviceModel.adaptiveLimiter is not None:
+                yield 'concurrency_limit', labels, serviceModel.adaptiveLimiter.limit
+            if serviceModel.rateLimiter is not None:
+                yield 'rate_limit_wait_seconds_total', labels, serviceModel.rateLimiter.waitSeconds
+
+    def render(self):
+        samples = {}
+        with self.lock:
+            for (name, labels), value in self.values.items():
+                samples.setdefault(name, []).append(f'{METRIC_PREFIX}{name}{formatLabels(labels)} {formatValue(value)}')
+            for (name, labels), (buckets, total, count) in self.histograms.items():
+                lines = samples.setdefault(name, [])
+                cumulative = 0
+                for bound, bucketCount in zip(LATENCY_BUCKETS, buckets):
+                    cumulative += bucketCount
+                    lines.append(f'{METRIC_PREFIX}{name}_bucket{formatLabels(labels, ("le", bound))} {cumulative}')
+                lines.append(f'{METRIC_PREFIX}{name}_bucket{formatLabels(labels, ("le", "+Inf"))} {count}')
+                lines.append(f'{METRIC_PREFIX}{name}_sum{formatLabels(labels)} {formatValue(total)}')
+                lines.append(f'{METRIC_PREFIX}{name}_count{formatLabels(labels)} {count}')
+        for name, labels, value in self.collect():
+            samples.setdefault(name, []).append(f'{METRIC_PREFIX}{name}{formatLabels(labels)} {formatValue(value)}')
+        output = []
+        for name, (metricType, description) in METRIC_TYPES.items():
+            if name not in samples:
+                continue
+            output.append(f'# HELP {METRIC_PREFIX}{name} {description}')
+            output.append(f'# TYPE {METRIC_PREFIX}{name} {metricType}')
+            output.extend(samples[name])
+        return '\n'.join(output) + '\n'
+
+    def start(self, serviceModels):
+        self.serviceModels = serviceModels
+        for serviceModel in serviceModels.values():
+            serviceModel.metrics = self
+        if self.listen:
+            host, _, port = str(self.listen).rpartition(':')
+            self.server = http.server.ThreadingHTTPServer((host or '0.0.0.0', int(port)), self.handlerClass())
+            self.server.daemon_threads = True
+            threading.Thread(target=self.server.serve_forever, daemon=True).start()
+            logger.info("Metrics: listening on http://{}:{}/metrics", *self.server.server_address[:2])
+        if self.textfile:
+            self.writer = threading.Thread(target=self.writeLoop, daemon=True)
+            self.writer.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.writer is not None:
+            self.writer.join()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+
+    def handlerClass(self):
+        metrics = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def writeLoop(self):
+        while True:
+            stopped = self.stopped.wait(self.interval)
+            self.writeTextfile()
+            if stopped:
+                return
+
+    def writeTextfile(self):
+        # 先写临时文件再替换，采集方不会读到写了一半的文件
+        tmpFile = f'{self.textfile}.{os.getpid()}.tmp'
+        try:
+            if directory := os.path.dirname(self.textfile):
+                os.makedirs(directory, exist_ok=True)
+            with open(tmpFile, 'w') as f:
+                f.write(self.render())
+            os.replace(tmpFile, self.textfile)
+        except OSError as e:
+            logger.warning("Metrics: failed to write {}: {}", self.textfile, e)
+
+
+def newMetrics(config):
+    if const.METRICS not in config or not (metricsConfig := config[const.METRICS]):
+        return None
+    if const.ENABLED not in metricsConfig or not metricsConfig[const.ENABLED]:
+        return None
+    return Metrics(listen=metricsConfig.get(const.LISTEN), textfile=metricsConfig.get(const.TEXTFILE),
+                   interval=metricsConfig.get(const.INTERVAL) or METRICS_INTERVAL)
@@ -1,12 +1,15 @@
+import collections
 import copy
+import functools
 import itertools
 import json
 import os
 import re
 import threading
+import time
 import urllib.parse
 import uuid
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 import yaml
 from botocore.client import (
@@ -17,10 +20,18 @@ from loguru import logger
 
 from core import const
 from core.assertion import validateAssertions
-from core.loader import loadFileData, loadXmindData
-from core.place_holder import resolvePlaceholderDict, resolvePlaceHolder
-from core.predefind import predefinedFuncDict, newAnonymousClient, newAwsClient
-from core.utils import IgnoreNotSerializable
+from core.benchmark import Benchmark, BENCHMARK_DURATION
+from core.bucket_pool import BucketPool, MAX_IDLE_PER_KEY
+from core.concurrency import ADAPTIVE_WINDOW, LATENCY_TOLERANCE, AdaptiveLimiter, isThrottled
+from core.loader import loadFilesParallel, loadXmindData, loadYamlData
+from core.rate_limit import RateLimiter
+from core.result_sink import SUITE_RESULTS
+from core.retention import RESPONSE_RETENTIONS, releaseStreams, retainResponse
+from core.results_store import RERUN_CHANGED, ResultsStore, SuiteKeys
+from core.place_holder import compilePlaceholders, resolvePlaceholderDict, resolvePlaceHolder
+from core.timing import CURRENT_TIMING, PHASES, CaseTiming, TimingStats, registerTimingHandlers
+from core.predefind import predefinedFuncDict, newAnonymousClient, newAwsClient, collectConnectionStats, countDiscardedConnections, mergeConnectionStats, TeardownStats, TEARDOWN_CONCURRENCY
+from core.utils import IgnoreNotSerializable, ToJsonCompatible
 
 GLOBAL_VARIABLES = {
     'urlEncode': urllib.parse.quote,
@@ -30,9 +41,15 @@ GLOBAL_VARIABLES = {
 
 _ = urllib.parse
 
+# asyncio 引擎中预置函数（DropBucket 等）仍使用同步 client，放到有界线程池中执行
+ASYNC_BLOCKING_WORKERS = 64
+
 
 class ServiceTestModel:
-    def __init__(self, serviceName, suiteFiles, identities, clientConfig, includePatterns, excludePatterns, hideEnabled, xmindSuites, concurrency=5, customHeaders=None, autoClean=False):
+    def __init__(self, serviceName, suiteFiles, identities, clientConfig, includePatterns, excludePatterns, hideEnabled, xmindSuites, concurrency=5, customHeaders=None, autoClean=False, executionMode=const.EXECUTION_MODE_FLAT,
+                 loadProcesses=None, connectionPool=None, teardownConcurrency=TEARDOWN_CONCURRENCY,
+                 bucketPool=None, executionEngine=const.EXECUTION_ENGINE_THREAD, benchmark=None, adaptiveConcurrency=None,
+                 rateLimits=None, resultsStore=None, rerun=None, responseRetention=const.RESPONSE_RETENTION_FULL):
         self.serviceName = serviceName
         self.suiteFiles = suiteFiles
         self.identities = identities
@@ -50,11 +67,86 @@ class ServiceTestModel:
         self.suite_pass = []
         self.suite_failed = []
         self.suite_skipped = []
+        # 增量执行时跳过的 suite（定义没有变化且上次通过）
+        self.suite_cached = []
         self.extra_case_api_invoked_count = 0
         self.extra_case_api_invoked_count_lock = threading.Lock()
-        self.threadPool = ThreadPoolExecutor(max_workers=concurrency)
+        self.concurrency = concurrency
+        self.executionEngine = executionEngine
+        if executionEngine == const.EXECUTION_ENGINE_ASYNC:
+            # asyncio 引擎中线程池只执行预置函数等阻塞调用
+            self.threadPool = ThreadPoolExecutor(max_workers=min(concurrency, ASYNC_BLOCKING_WORKERS))
+        else:
+            self.threadPool = ThreadPoolExecutor(max_workers=concurrency)
+        # suite 惰性展开后按需提交，限制排队中的 suite 数量
+        self.dispatchLimit = concurrency * 2
+        self.dispatchSemaphore = threading.BoundedSemaphore(self.dispatchLimit)
         self.customHeaders = customHeaders
         self.autoClean = autoClean
+        self.executionMode = executionMode
+        self.loadProcesses = loadProcesses
+        self.suiteTreeLeaves = {}
+        self.suiteTreeLock = threading.Lock()
+        # 多进程执行时当前进程负责的分片 (workerIndex, workers)
+        self.shard = None
+
+        # 连接池：默认按 concurrency 设置每个 client 的连接数，避免线程间争用连接导致频繁建连/丢弃
+        connectionPool = connectionPool or {}
+        self.maxPoolConnections = connectionPool.get(const.MAX_POOL_CONNECTIONS) or concurrency
+        self.threadLocalClients = bool(connectionPool.get(const.THREAD_LOCAL_CLIENTS))
+        self.tcpKeepalive = connectionPool.get(const.TCP_KEEPALIVE)
+        self.identityClientConfigs = {}
+        self.threadLocal = threading.local()
+        self.clients = []
+        self.clientsLock = threading.Lock()
+        self.connectionStats = None
+
+        # DropBucket/DropAllBuckets 使用的有界线程池，与执行 suite 的线程池分开，避免互相等待
+        self.teardownConcurrency = teardownConcurrency
+        self.teardownPool = None
+        self.teardownPoolLock = threading.Lock()
+        self.teardownStats = TeardownStats()
+        # 分阶段耗时统计，按操作和 identity 汇总
+        self.timingStats = TimingStats()
+        # 自适应并发（可选）：同时执行的 suite 数在 [min, concurrency] 之间按延迟和限流错误调整
+        self.adaptiveLimiter = None
+        if adaptiveConcurrency and const.ENABLED in adaptiveConcurrency and adaptiveConcurrency[const.ENABLED]:
+            self.adaptiveLimiter = AdaptiveLimiter(concurrency, initial=adaptiveConcurrency.get(const.INITIAL), minLimit=adaptiveConcurrency.get(const.MIN) or 1,
+                                                   increase=adaptiveConcurrency.get(const.INCREASE) or 1, decrease=adaptiveConcurrency.get(const.DECREASE) or 0.5,
+                                                   window=adaptiveConcurrency.get(const.WINDOW) or ADAPTIVE_WINDOW,
+                                                   latencyTolerance=adaptiveConcurrency.get(const.LATENCY_TOLERANCE) or LATENCY_TOLERANCE)
+        # 请求速率限制（可选）：全局、按 identity、按操作的令牌桶，在发送请求前等待
+        self.rateLimiter = RateLimiter(rateLimits) if rateLimits else None
+        # case 中保留的 response：none、failures（只保留失败的）、summary（截断的摘要）、full
+        self.responseRetention = responseRetention
+        # 执行结果存储（可选）：记录每个 suite 的结果，rerun 时只执行上次失败（或未执行）的 suite
+        self.resultsStore = resultsStore
+        self.rerun = rerun
+        # 运行期间的指标（可选），由 main 启动 Metrics 时设置
+        self.metrics = None
+        # 流式结果文件（可选），由 main 启动 ResultSink 时设置
+        self.resultSink = None
+
+        # bucket 池（可选）：CreateBucket 复用已复位的 bucket，suite 结束时放回池中
+        self.bucketPool = None
+        if bucketPool and const.ENABLED in bucketPool and bucketPool[const.ENABLED]:
+            self.bucketPool = BucketPool(self, bucketPool.get(const.MAX_IDLE_PER_KEY) or MAX_IDLE_PER_KEY)
+
+        # 压测模式（可选）：重复执行 suites，统计每个操作的延迟分布
+        self.benchmark = None
+        if benchmark and const.ENABLED in benchmark and benchmark[const.ENABLED]:
+            self.benchmark = Benchmark(duration=benchmark.get(const.DURATION, BENCHMARK_DURATION) or 0,
+                                       iterations=benchmark.get(const.ITERATIONS) or 0, rate=benchmark.get(const.RATE) or 0)
+
+    def getTeardownPool(self):
+        if self.teardownPool is None:
+            with self.teardownPoolLock:
+                if self.teardownPool is None:
+                    self.teardownPool = ThreadPoolExecutor(max_workers=self.teardownConcurrency, thread_name_prefix='teardown')
+        return self.teardownPool
+
+    def endpoint(self):
+        return self.clientConfig.get('endpoint_url') if self.clientConfig else None
 
     def increaseExtraCaseApisCount(self, increment):
         with self.extra_case_api_invoked_count_lock:
@@ -62,13 +154,12 @@ class ServiceTestModel:
 
     def setUp(self):
         if self.xmindSuites is not None:
-            self.suiteModels[const.XMIND_SUITES] = parseSuite([[]], self.xmindSuites)
+            self.suiteModels[const.XMIND_SUITES] = self.parseSuites(self.xmindSuites)
         if self.suiteFiles is not None:
-            for suiteFile in self.suiteFiles:
-                suiteData = loadFileData(suiteFile, yaml.safe_load)
+            for suiteFile, suiteData in zip(self.suiteFiles, loadFilesParallel(loadYamlData, self.suiteFiles, self.loadProcesses)):
                 # don't present filename in result tree
                 # self.suiteModels[suiteFile] = parseSuite([[{const.CASE_NAME:suiteFile}]], suiteData)
-                self.suiteModels[suiteFile] = parseSuite([[]], suiteData)
+                self.suiteModels[suiteFile] = self.parseSuites(suiteData)
         self.clientDict = {}
         for identityName, identityConfig in self.identities.items():
             for prop in identityConfig:
@@ -78,31 +169,83 @@ class ServiceTestModel:
                 for prop in const.CLIENT_PROPERTIES:
                     if prop in identityConfig:
                         clientConfig[prop] = identityConfig[prop]
-                if identityName == const.ANONYMOUS:
-                    serviceClient = newAnonymousClient(self.serviceName, clientConfig)
-                else:
-                    serviceClient = newAwsClient(self.serviceName, clientConfig)
-                serviceClient.supportOperations = serviceClient.meta.service_model.operation_names
-
                 identityConfig['identity_name'] = identityName
                 identityConfig.update(clientConfig)
-                serviceClient.identityConfig = identityConfig
-                if self.customHeaders is not None:
-                    def addHeaders(request, **kwargs):
-                        for k, v in self.customHeaders.items():
-                            request.headers[k] = v
-
-                    serviceClient.meta.events.register('request-created.s3.*', addHeaders)
-                self.clientDict[identityName] = serviceClient
+                self.identityClientConfigs[identityName] = clientConfig
+                self.clientDict[identityName] = self.newServiceClient(identityName)
             except Exception as e:
                 logger.error(f"Failed to create client for {identityName}", e)
                 raise e
 
+    def newServiceClient(self, identityName):
+        clientConfig = self.identityClientConfigs[identityName]
+        if self.threadLocalClients:
+            # 每个线程独占 client，同一时刻只有一个请求在使用连接
+            configOptions = {'max_pool_connections': 2}
+        else:
+            configOptions = {'max_pool_connections': self.maxPoolConnections}
+        if self.tcpKeepalive is not None:
+            configOptions['tcp_keepalive'] = self.tcpKeepalive
+        if identityName == const.ANONYMOUS:
+            serviceClient = newAnonymousClient(self.serviceName, clientConfig, configOptions)
+        else:
+            serviceClient = newAwsClient(self.serviceName, clientConfig, configOptions)
+        serviceClient.supportOperations = serviceClient.meta.service_model.operation_names
+        serviceClient.identityConfig = self.identities[identityName]
+        # case 作用域中的 identity 层，每个 case 共享
+        serviceClient.identityScope = {'Client': serviceClient, **serviceClient.identityConfig}
+        registerTimingHandlers(serviceClient)
+        countDiscardedConnections(serviceClient)
+        if self.rateLimiter is not None:
+            self.rateLimiter.registerHandler(serviceClient)
+        if self.customHeaders is not None:
+            def addHeaders(request, **kwargs):
+                for k, v in self.customHeaders.items():
+                    request.headers[k] = v
+
+            serviceClient.meta.events.register('request-created.s3.*', addHeaders)
+        with self.clientsLock:
+            self.clients.append(serviceClient)
+        return serviceClient
+
+    def getClient(self, clientName):
+        if not self.threadLocalClients:
+            return self.clientDict[clientName]
+        if (threadClients := getattr(self.threadLocal, 'clients', None)) is None:
+            threadClients = self.threadLocal.clients = {}
+        if (serviceClient := threadClients.get(clientName)) is None:
+            serviceClient = threadClients[clientName] = self.newServiceClient(clientName)
+        return serviceClient
+
+    def parseSuites(self, suiteData):
+        compiledSuites = compileSuites(suiteData)
+        if self.executionMode != const.EXECUTION_MODE_TREE:
+            return SuiteModel(compiledSuites)
+        # tree 模式：suite 中的 case 为共享树节点之上的 overlay，suite_id 等 suite 级别的数据写在 overlay 中
+        suites = []
+        for leaf in parseSuiteTree(compiledSuites):
+            if leaf.isolated():
+                # 逐 suite 重放的分支不读取共享节点的执行结果
+                suite = [collections.ChainMap({}, *node.case.maps[1:]) for node in leaf.path()]
+            else:
+                suite = [node.case.new_child() for node in leaf.path()]
+                if suite:
+                    leaf.suites.append(suite)
+                    self.suiteTreeLeaves[id(suite)] = leaf
+            suites.append(suite)
+        return suites
+
     def tearDown(self):
+        self.waitDispatched()
         for hook in self.hooks:
             hook()
-        for k, v in self.clientDict.items():
-            logger.debug(f"Closing client: {k}")
+        if self.bucketPool is not None:
+            self.bucketPool.close()
+        if self.teardownPool is not None:
+            self.teardownPool.shutdown()
+        self.connectionStats = collectConnectionStats(self.clients)
+        for v in self.clients:
+            logger.debug(f"Closing client: {v.identityConfig['identity_name']}")
             try:
                 v.close()
             except:
@@ -112,53 +255,225 @@ class ServiceTestModel:
         future = self.threadPool.submit(target, *args)
         self.hooks.append(future.result)
 
+    def dispatchTask(self, target, *args):
+        self.dispatchSemaphore.acquire()
+        if self.adaptiveLimiter is not None:
+            self.adaptiveLimiter.acquire()
+        try:
+            future = self.threadPool.submit(target, *args)
+        except Exception:
+            self.releaseDispatched()
+            raise
+        future.add_done_callback(lambda f: self.releaseDispatched())
+
+    def releaseDispatched(self):
+        if self.adaptiveLimiter is not None:
+            self.adaptiveLimiter.release()
+        self.dispatchSemaphore.release()
+
+    def waitDispatched(self):
+        for _ in range(self.dispatchLimit):
+            self.dispatchSemaphore.acquire()
+        for _ in range(self.dispatchLimit):
+            self.dispatchSemaphore.release()
+
     def run(self):
+        if self.benchmark is not None:
+            self.runBenchmark()
+            return
+        if self.executionEngine == const.EXECUTION_ENGINE_ASYNC:
+            # aiohttp 为可选依赖，只在使用 asyncio 引擎时导入
+            from core.async_engine import AsyncEngine
+            try:
+                AsyncEngine(self).run(self.filterSuites())
+            except Exception as e:
+                logger.exception(e)
+            return
         try:
-            filteredSuites = self.filterSuites()
+            for suiteFile, suiteModel in self.filterSuites().items():
+                if self.executionMode == const.EXECUTION_MODE_TREE:
+                    self.runSuiteTree(suiteModel)
+                    continue
+                for suite in suiteModel:
+                    if suite:
+                        suiteId = suite[0][const.SUITE_ID]
+                        self.dispatchTask(self.doRun, f'{suiteId}', suite, newSuiteLocals())
         except Exception as e:
             logger.exception(e)
-            return
-        for suiteFile, suiteModel in filteredSuites.items():
-            for suite in suiteModel:
-                if suite:
-                    suiteId = suite[0][const.SUITE_ID]
-                    self.submitTask(self.doRun, f'{suiteId}', suite, GLOBAL_VARIABLES.copy())
+
+    def runBenchmark(self):
+        suites = self.benchmark.iterSuites(self.filterSuites(), self.expandSuites)
+        try:
+            if self.executionEngine == const.EXECUTION_ENGINE_ASYNC:
+                from core.async_engine import AsyncEngine
+                AsyncEngine(self).run({const.BENCHMARK: suites})
+            else:
+                for suite in suites:
+                    self.dispatchTask(self.doRun, f'{suite[0][const.SUITE_ID]}', suite, newSuiteLocals())
+                self.waitDispatched()
+        except Exception as e:
+            logger.exception(e)
+        finally:
+            self.benchmark.finish()
+
+    def runSuiteTree(self, suites):
+        root = None
+        for suite in suites:
+            if not suite:
+                continue
+            suiteId = suite[0][const.SUITE_ID]
+            if (leaf := self.suiteTreeLeaves.get(id(suite))) is None:
+                # 标记为 __isolate__ 的分支会修改共享状态，按 suite 从头重放
+                self.submitTask(self.doRun, f'{suiteId}', suite, newSuiteLocals())
+                continue
+            node = leaf
+            while node is not None:
+                node.pending += 1
+                if node.suiteId is None:
+                    node.suiteId = suiteId
+                root, node = node, node.parent
+        if root is not None:
+            self.submitTask(self.doRunTreeNode, root, newSuiteLocals(), '')
+
+    def doRunTreeNode(self, node, suiteLocals, suiteExecPath):
+        try:
+            while True:
+                if node.case is not None:
+                    bucket = suiteLocals.get('Bucket')
+                    suiteExecPath, terminate = self.runCase(node.case, suiteExecPath, suiteLocals, None, node.suiteId)
+                    if self.resultSink is not None:
+                        # 共享节点的 case 记录先于引用它的 suite 记录写出
+                        self.resultSink.writeTreeCase(self.serviceName, node.suiteId, node.case)
+                    if terminate:
+                        self.completeTreeNode(node, failed=True)
+                        return
+                    if (self.autoClean or self.bucketPool is not None) and suiteLocals.get('Bucket') != bucket:
+                        node.cleanLocals = suiteLocals.copy()
+                if node.suites:
+                    for suite in node.suites:
+                        self.appendResult(self.suite_pass, suite)
+                    self.completeTreeNode(node, len(node.suites))
+                children = [child for child in node.children if child.pending]
+                if not children:
+                    return
+                # 共享前缀执行完毕，suiteLocals 复制给各个分支
+                for child in children[1:]:
+                    self.submitTask(self.doRunTreeNode, child, suiteLocals.copy(), suiteExecPath)
+                node = children[0]
+        except Exception as e:
+            logger.exception(e)
+            self.completeTreeNode(node, failed=True)
+
+    def completeTreeNode(self, node, count=0, failed=False):
+        cleanLocalsList = []
+        with self.suiteTreeLock:
+            if failed:
+                failedSuites, stack = [], [node]
+                while stack:
+                    n = stack.pop()
+                    failedSuites.extend(n.suites)
+                    stack.extend(child for child in n.children if child.pending)
+                for suite in failedSuites:
+                    self.appendResult(self.suite_failed, suite)
+                count = node.pending
+            while node is not None:
+                node.pending -= count
+                if node.pending == 0 and node.cleanLocals is not None:
+                    cleanLocalsList.append((node.suiteId, node.cleanLocals))
+                    node.cleanLocals = None
+                node = node.parent
+        for suiteId, cleanLocals in cleanLocalsList:
+            self.runAutoClean(cleanLocals, suiteId)
 
     def filterSuites(self):
-        filteredSuites = self.suiteModels
-        if self.suiteIncludePatterns or self.suiteExcludePatterns:
-            filteredSuites = {}
-            for suiteModelName, suiteModel in self.suiteModels.items():
-                filteredSuites[suiteModelName] = []
-                suiteModelCounter = itertools.count(1)
-                for suite in suiteModel:
-                    # 1、生成 suiteId，格式为 __服务名__@suiteModelName@__序号__
-                    suiteId = '__%s__@%s@__%d__' % (self.serviceName, suiteModelName, next(suiteModelCounter))
-                    if suite:
-                        suite[0][const.SUITE_ID] = suiteId
-                    pathList = getSuitePath(suite)
-                    # 2、将 suiteID 添加到 pathList 中，这样后续可以直接复制 suiteID 进行过滤
-                    pathList.append(suiteId)
-                    includePatternMatch = True
-                    if self.suiteIncludePatterns:
-                        includePatternMatch = False
-                        for suitePath in list(pathList):
-                            for includePattern in self.suiteIncludePatterns:
-                                if not includePatternMatch and includePattern.match(suitePath):
-                                    includePatternMatch = True
-                                    break
-                    excludePatternMatch = False
-                    if self.suiteExcludePatterns:
-                        for suitePath in list(pathList):
-                            for excludePattern in self.suiteExcludePatterns:
-                                if not excludePatternMatch and excludePattern.match(suitePath):
-                                    excludePatternMatch = True
-                                    break
-                    if includePatternMatch and not excludePatternMatch:
-                        filteredSuites[suiteModelName].append(suite)
-                    else:
-                        self.suite_skipped.append(suite)
-        return filteredSuites
+        return {suiteModelName: self.filterSuiteModel(suiteModelName, suiteModel) for suiteModelName, suiteModel in self.suiteModels.items()}
+
+    def suiteIdOf(self, suiteModelName, suiteOrdinal):
+        return '__%s__@%s@__%d__' % (self.serviceName, suiteModelName, suiteOrdinal)
+
+    def expandSuites(self):
+        # 不经过过滤，按与 filterSuiteModel 相同的序号重新展开全部 suite，返回 (suiteId, suite)
+        for suiteModelName, suiteModel in self.suiteModels.items():
+            for suiteOrdinal, suite in enumerate(suiteModel, 1):
+                yield self.suiteIdOf(suiteModelName, suiteOrdinal), suite
+
+    def filterSuiteModel(self, suiteModelName, suiteModel):
+        suiteModelCounter = itertools.count(1)
+        suiteKeys = SuiteKeys() if self.resultsStore is not None else None
+        for suite in suiteModel:
+            # 1、生成 suiteId，格式为 __服务名__@suiteModelName@__序号__
+            suiteOrdinal = next(suiteModelCounter)
+            # 稳定标识在分片之前按顺序生成，各进程中同一 suite 的标识一致；失败时 case 标题会被修改，需要在执行前生成
+            selected = True
+            if suiteKeys is not None and suite:
+                suiteKey, fingerprint = suiteKeys.next(suiteModelName, getSuitePath(suite)[0]), suiteKeys.fingerprint(suite)
+                suite[0][const.SUITE_KEY], suite[0][const.SUITE_FINGERPRINT] = suiteKey, fingerprint
+                if self.rerun is not None:
+                    selected = self.resultsStore.selected(self.serviceName, suiteKey, self.rerun, fingerprint, self.endpoint())
+            if self.shard is not None and suiteOrdinal % self.shard[1] != self.shard[0]:
+                continue
+            suiteId = self.suiteIdOf(suiteModelName, suiteOrdinal)
+            if suite:
+                suite[0][const.SUITE_ID] = suiteId
+            if self.suiteIncludePatterns or self.suiteExcludePatterns:
+                pathList = getSuitePath(suite)
+                # 2、将 suiteID 添加到 pathList 中，这样后续可以直接复制 suiteID 进行过滤
+                pathList.append(suiteId)
+                includePatternMatch = True
+                if self.suiteIncludePatterns:
+                    includePatternMatch = False
+                    for suitePath in list(pathList):
+                        for includePattern in self.suiteIncludePatterns:
+                            if not includePatternMatch and includePattern.match(suitePath):
+                                includePatternMatch = True
+                                break
+                excludePatternMatch = False
+                if self.suiteExcludePatterns:
+                    for suitePath in list(pathList):
+                        for excludePattern in self.suiteExcludePatterns:
+                            if not excludePatternMatch and excludePattern.match(suitePath):
+                                excludePatternMatch = True
+                                break
+                if not includePatternMatch or excludePatternMatch:
+                    self.appendResult(self.suite_skipped, suite)
+                    continue
+            if not selected:
+                # 3、增量执行时定义没有变化且上次通过的 suite 不执行，记为 cached-pass
+                if self.rerun == RERUN_CHANGED:
+                    self.appendResult(self.suite_cached, suite)
+                continue
+            yield suite
+
+    def shardResult(self):
+        # case 中的 response 等可能包含不能跨进程传递的对象，转换为与导出结果一致的 json 数据
+        return {
+            'suite_pass': [ToJsonCompatible(list(map(dict, suite))) for suite in self.suite_pass],
+            'suite_failed': [ToJsonCompatible(list(map(dict, suite))) for suite in self.suite_failed],
+            'suite_skipped': [ToJsonCompatible(list(map(dict, suite))) for suite in self.suite_skipped],
+            'suite_cached': [ToJsonCompatible(list(map(dict, suite))) for suite in self.suite_cached],
+            'extra_case_api_invoked_count': self.extra_case_api_invoked_count,
+            'connectionStats': self.connectionStats,
+            'teardownStats': self.teardownStats,
+            'bucketPoolStats': self.bucketPool.summary() if self.bucketPool is not None else None,
+            'benchmarkStats': self.benchmark.stats if self.benchmark is not None else None,
+            'timingStats': self.timingStats,
+            'rateLimitStats': self.rateLimiter.summary() if self.rateLimiter is not None else None,
+        }
+
+    def mergeShardResult(self, result):
+        for attr in SUITE_RESULTS.values():
+            for suite in result[attr]:
+                self.appendResult(getattr(self, attr), suite)
+        self.increaseExtraCaseApisCount(result['extra_case_api_invoked_count'])
+        self.connectionStats = mergeConnectionStats(self.connectionStats, result['connectionStats'])
+        self.teardownStats.merge(result['teardownStats'])
+        self.timingStats.merge(result['timingStats'])
+        if self.rateLimiter is not None and result['rateLimitStats'] is not None:
+            self.rateLimiter.merge(result['rateLimitStats'])
+        if self.bucketPool is not None and result['bucketPoolStats'] is not None:
+            self.bucketPool.mergeStats(result['bucketPoolStats'])
+        if self.benchmark is not None and result['benchmarkStats'] is not None:
+            self.benchmark.stats.merge(result['benchmarkStats'])
 
     def getTitle(self, case):
         if const.CASE_TITLE in case:
@@ -169,38 +484,90 @@ class ServiceTestModel:
         return title
 
     def doRun(self, suiteId, suite, suiteLocals):
-        autoClean = self.autoClean
+        autoClean = self.autoClean or self.bucketPool is not None
         suiteExecPath = ''
+        start = time.perf_counter()
         try:
             for case in suite:
                 suiteExecPath, terminate = self.runCase(case, suiteExecPath, suiteLocals, suite, suiteId)
                 if terminate:
                     return
-            self.suite_pass.append(suite)
+            self.appendResult(self.suite_pass, suite)
         except Exception as e:
             logger.exception(e)
             # autoClean = False
         finally:
+            self.timingStats.recordSuite(suiteId, time.perf_counter() - start)
             if autoClean:
-                self.runCase({
-                    "operation": "DropBucket",
-                    "clientName": "admin",
-                    "parameters": {
-                        "Bucket": "${Bucket}"
-                    },
-                    const.HIDE: False
-                }, "AutoClean", suiteLocals, None, suiteId)
+                self.runAutoClean(suiteLocals, suiteId)
+            if self.benchmark is not None:
+                self.benchmark.recordSuite(suite)
+
+    def appendResult(self, results, suite):
+        # 压测重复执行的 suite 只统计，不保留执行结果
+        if self.benchmark is None or self.benchmark.retains(suite):
+            results.append(suite)
+            if self.resultSink is not None:
+                self.resultSink.writeSuite(self.serviceName, suite, next(status for status, attr in SUITE_RESULTS.items() if getattr(self, attr) is results))
+
+    def runAutoClean(self, suiteLocals, suiteId):
+        if self.bucketPool is not None and self.bucketPool.release(suiteLocals.get('Bucket'), suiteId):
+            return
+        if not self.autoClean:
+            return
+        self.runCase({
+            "operation": "DropBucket",
+            "clientName": "admin",
+            "parameters": {
+                "Bucket": "${Bucket}"
+            },
+            const.HIDE: False
+        }, "AutoClean", suiteLocals, None, suiteId)
 
     def runCase(self, case, suiteExecPath, suiteLocals, suite, suiteId):
+        steps = self.runCaseSteps(case, suiteExecPath, suiteLocals, suite, suiteId)
+        try:
+            call = next(steps)
+            while True:
+                try:
+                    if isinstance(call, ApiCall):
+                        response = self.sendApiCall(call) if self.benchmark is None else self.benchmark.call(self.sendApiCall, call)
+                    else:
+                        response = call()
+                except Exception as e:
+                    call = steps.throw(e)
+                    continue
+                call = steps.send(response)
+        except StopIteration as e:
+            return e.value
+
+    def sendApiCall(self, call):
+        # 请求构建、网络和解析阶段由 botocore 事件划分
+        token = CURRENT_TIMING.set(call.timing)
+        call.timing.enter('build')
+        try:
+            # noinspection PyProtectedMember
+            return BaseClient._make_api_call(call.client, call.operationName, call.parameters)
+        except ClientError as e:
+            return e.response
+        finally:
+            call.timing.stop()
+            CURRENT_TIMING.reset(token)
+
+    def runCaseSteps(self, case, suiteExecPath, suiteLocals, suite, suiteId):
+        """
+        case 的执行步骤：请求通过 yield 交给执行引擎发送（ApiCall 为 API 请求，其它为阻塞调用），
+        线程引擎（runCase）和 asyncio 引擎共用解析参数、断言和结果记录的逻辑
+        """
         terminate = False
         caseName = case[const.CASE_TITLE] if const.CASE_TITLE in case else case[const.CASE_OPERATION]
         currentSuiteExecPath = f'{suiteExecPath}::{caseName}' if suiteExecPath else caseName
         ignore = self.hideEnabled and const.HIDE in case and case[const.HIDE]
         parameters = {}
 
-        caseLocals = suiteLocals.copy()
-        caseLocals[const.RESET_HOOKS] = []
+        caseLocals = newCaseLocals(suiteLocals)
         clientName, caseResponse = None, None
+        timing = CaseTiming()
         try:
             if const.CASE_OPERATION not in case:
                 if not ignore:
@@ -208,45 +575,56 @@ class ServiceTestModel:
                 return suiteExecPath
             # client
             operationName = case[const.CASE_OPERATION]
+            if self.metrics is not None:
+                metricLabels = (('service', self.serviceName), ('operation', operationName))
+                self.metrics.inc('cases_started_total', metricLabels)
             if const.CASE_CLIENT_NAME in case:
                 clientName = case[const.CASE_CLIENT_NAME]
                 if clientName in self.clientDict:
-                    serviceClient = self.clientDict[clientName]
-                    caseLocals['Client'] = serviceClient
-                    caseLocals.update(serviceClient.identityConfig)
+                    serviceClient = self.getClient(clientName)
+                    caseLocals.maps.insert(1, serviceClient.identityScope)
 
             # parameters
             if const.CASE_PARAMETERS in case:
-                parameters = case[const.CASE_PARAMETERS]
-                resolvePlaceholderDict(parameters, caseLocals)
-                caseLocals.update(parameters)
+                # case 模板在 suite 之间共享，解析结果为新的 dict，写入当前 suite 的 overlay
+                timing.enter('resolve')
+                parameters = resolvePlaceholderDict(case[const.CASE_PARAMETERS], caseLocals)
+                timing.stop()
+                case[const.CASE_PARAMETERS] = parameters
+                caseLocals.maps.insert(1, parameters)
 
             # execute
-            if operationName in predefinedFuncDict.keys():
-                caseResponse = predefinedFuncDict[operationName](serviceModel=self, suiteLocals=suiteLocals, caseLocals=caseLocals, parameters=parameters)
+            if self.bucketPool is not None and isinstance(bucketName := parameters.get('Bucket'), str):
+                self.bucketPool.touch(operationName, bucketName)
+            if self.bucketPool is not None and operationName == 'CreateBucket':
+                timing.enter('predefined')
+                caseResponse = yield functools.partial(self.bucketPool.createBucket, serviceClient, suiteLocals, parameters)
+                timing.stop()
+            elif operationName in predefinedFuncDict.keys():
+                timing.enter('predefined')
+                caseResponse = yield functools.partial(predefinedFuncDict[operationName], serviceModel=self, suiteLocals=suiteLocals, caseLocals=caseLocals, parameters=parameters)
+                timing.stop()
             elif operationName in serviceClient.supportOperations:
-                try:
-                    # noinspection PyProtectedMember
-                    caseResponse = BaseClient._make_api_call(serviceClient, operationName, parameters)
-                except ClientError as e:
-                    caseResponse = e.response
+                # ClientError 由执行引擎转换为 response
+                caseResponse = yield from self.apiCallSteps(ApiCall(serviceClient, operationName, parameters, timing))
             else:
                 raise RuntimeError(f'operation[{operationName}] undefined')
 
             # update title
-            case[const.CASE_RESPONSE] = caseResponse
             # if const.CASE_TITLE not in case and const.CASE_ASSERTION in case and 'ResponseMetadata' in caseResponse and 'HTTPStatusCode' in (responseMetadata := caseResponse['ResponseMetadata']):
             #     case[const.CASE_TITLE] = '%s-%s' % (operationName, responseMetadata['HTTPStatusCode'])
 
             # assertion
             if const.CASE_ASSERTION in case:
-                assertion = case[const.CASE_ASSERTION]
-                resolvePlaceholderDict(assertion, caseLocals)
+                timing.enter('assertion')
+                assertion = resolvePlaceholderDict(case[const.CASE_ASSERTION], caseLocals)
+                case[const.CASE_ASSERTION] = assertion
                 validateAssertions('caseResponse', assertion, caseResponse)
+                timing.stop()
 
             # suite locals (resolve properties and put it into suiteLocals)
             if const.SUITE_LOCALS in case and (caseSuiteLocals := case[const.SUITE_LOCALS]) and isinstance(caseSuiteLocals, dict):
-                caseLocals.update(caseResponse)
+                caseLocals.maps.insert(1, caseResponse)
                 for key, value in caseSuiteLocals.items():
                     suiteLocals[key] = resolvePlaceHolder(value, caseLocals)
 
@@ -258,15 +636,15 @@ class ServiceTestModel:
                 logger.debug(f"{currentSuiteExecPath} ==> req[{operationName}]:{json.dumps(parameters, default=IgnoreNotSerializable)}, resp: {caseResponse}")
 
             case[const.CASE_SUCCESS] = True
+            if (retained := retainResponse(self.responseRetention, caseResponse, True)) is not None:
+                case[const.CASE_RESPONSE] = retained
         except Exception as e:
             terminate = True
-            if suite is not None:
-                self.suite_failed.append(suite)
-
             case[const.CASE_SUCCESS] = False
             case[const.ERROR_INFO] = f'{e.__class__.__name__}({json.dumps(e.args, default=IgnoreNotSerializable)})'
             if caseResponse:
-                case[const.CASE_RESPONSE] = caseResponse
+                if (retained := retainResponse(self.responseRetention, caseResponse, False)) is not None:
+                    case[const.CASE_RESPONSE] = retained
                 if const.CASE_ASSERTION in case and 'ResponseMetadata' in caseResponse and 'HTTPStatusCode' in (responseMetadata := caseResponse['ResponseMetadata']):
                     case[const.CASE_TITLE] = '%s-%s' % (caseName, responseMetadata['HTTPStatusCode'])
             logger.error(f"{suiteId}->{currentSuiteExecPath}\n"
@@ -278,16 +656,65 @@ class ServiceTestModel:
             else:
                 logger.exception('{}->{}', suiteId, e)
         finally:
-            resetHooks = caseLocals[const.RESET_HOOKS]
-            for hook in resetHooks:
-                try:
-                    hook()
-                except Exception as e:
-                    logger.exception("Exception while resetting hooks: {}", e)
+            releaseStreams(caseResponse)
+            if const.CASE_OPERATION in case:
+                timing.stop()
+                case[const.CASE_TIMING] = timing.summary()
+                self.timingStats.record(operationName, clientName, timing)
+                if self.metrics is not None:
+                    self.metrics.inc('cases_failed_total' if terminate else 'cases_passed_total', metricLabels)
+            if suite is not None:
+                # case 记录先于 suite 记录写出，suite 记录中只包含没有执行的 case
+                if self.resultSink is not None and (self.benchmark is None or self.benchmark.retains(suite)):
+                    self.resultSink.writeCase(self.serviceName, suiteId, case)
+                if terminate:
+                    self.appendResult(self.suite_failed, suite)
             return suiteExecPath, terminate
 
+    def apiCallSteps(self, call):
+        # 请求的指标和自适应并发反馈
+        if self.metrics is not None:
+            labels = (('service', self.serviceName), ('operation', call.operationName))
+            self.metrics.inc('requests_in_flight', labels[:1])
+        try:
+            response = yield call
+        except Exception as e:
+            if self.adaptiveLimiter is not None:
+                self.adaptiveLimiter.observe(call.timing.requestTotal, isThrottled(error=e))
+            raise
+        finally:
+            if self.metrics is not None:
+                self.metrics.dec('requests_in_flight', labels[:1])
+        if self.metrics is not None:
+            self.metrics.inc('api_calls_total', labels)
+            self.metrics.observe('request_duration_seconds', labels, call.timing.requestTotal)
+        if self.adaptiveLimiter is not None:
+            self.adaptiveLimiter.observe(call.timing.requestTotal, isThrottled(response))
+        return response
+
 
-def initServicesTestModels(config, includePatterns, excludePatterns):
+ApiCall = collections.namedtuple('ApiCall', ['client', 'operationName', 'parameters', 'timing'])
+
+
+# 变量作用域按层查找：case(写入) > response > parameters > identity > suite > global
+# suite 层只保存 suite 内设置的变量，global 层在所有 suite 之间共享，不再为每个 suite/case 复制
+def newSuiteLocals():
+    return collections.ChainMap({}, GLOBAL_VARIABLES)
+
+
+def newCaseLocals(suiteLocals):
+    parents = suiteLocals.maps if isinstance(suiteLocals, collections.ChainMap) else [suiteLocals]
+    return collections.ChainMap({}, *parents)
+
+
+def initGlobalVariables(config):
+    if 'global_variables' in config:
+        global GLOBAL_VARIABLES
+        GLOBAL_VARIABLES.update(config['global_variables'])
+
+
+# ServiceTestModel 除 suites 和过滤条件以外的参数
+def serviceModelOptions(config):
     identities = config['identities']
     clientConfig = config['client_config']
     concurrency = 5
@@ -299,18 +726,87 @@ def initServicesTestModels(config, includePatterns, excludePatterns):
     if 'custom_headers' in config:
         customHeaders = config['custom_headers']
 
-    suitesDir = "suites"
-    if 'tests_dir' in config:
-        suitesDir = config['tests_dir']
-
-    if 'global_variables' in config:
-        global GLOBAL_VARIABLES
-        GLOBAL_VARIABLES.update(config['global_variables'])
-
     autoClean = False
     if 'auto_clean' in config and config['auto_clean']:
         autoClean = True
 
+    executionMode = const.EXECUTION_MODE_FLAT
+    if const.EXECUTION_MODE in config and config[const.EXECUTION_MODE]:
+        executionMode = config[const.EXECUTION_MODE]
+        if executionMode not in (const.EXECUTION_MODE_FLAT, const.EXECUTION_MODE_TREE):
+            raise RuntimeError('execution_mode must be flat or tree', executionMode)
+
+    hideEnabled = True
+    if const.HIDE_ENABLED in config:
+        hideEnabled = config[const.HIDE_ENABLED]
+
+    loadProcesses = None
+    if const.LOAD_PROCESSES in config and config[const.LOAD_PROCESSES] is not None:
+        loadProcesses = config[const.LOAD_PROCESSES]
+
+    connectionPool = None
+    if const.CONNECTION_POOL in config and config[const.CONNECTION_POOL]:
+        connectionPool = config[const.CONNECTION_POOL]
+
+    teardownConcurrency = TEARDOWN_CONCURRENCY
+    if const.TEARDOWN_CONCURRENCY in config and config[const.TEARDOWN_CONCURRENCY]:
+        teardownConcurrency = config[const.TEARDOWN_CONCURRENCY]
+
+    bucketPool = None
+    if const.BUCKET_POOL in config and config[const.BUCKET_POOL]:
+        bucketPool = config[const.BUCKET_POOL]
+
+    executionEngine = const.EXECUTION_ENGINE_THREAD
+    if const.EXECUTION_ENGINE in config and config[const.EXECUTION_ENGINE]:
+        executionEngine = config[const.EXECUTION_ENGINE]
+        if executionEngine not in (const.EXECUTION_ENGINE_THREAD, const.EXECUTION_ENGINE_ASYNC):
+            raise RuntimeError('execution_engine must be thread or async', executionEngine)
+        if executionEngine == const.EXECUTION_ENGINE_ASYNC and executionMode == const.EXECUTION_MODE_TREE:
+            raise RuntimeError('execution_engine async only supports execution_mode flat')
+
+    benchmark = None
+    if const.BENCHMARK in config and config[const.BENCHMARK]:
+        benchmark = config[const.BENCHMARK]
+        if const.ENABLED in benchmark and benchmark[const.ENABLED] and executionMode == const.EXECUTION_MODE_TREE:
+            raise RuntimeError('benchmark only supports execution_mode flat')
+
+    adaptiveConcurrency = None
+    if const.ADAPTIVE_CONCURRENCY in config and config[const.ADAPTIVE_CONCURRENCY]:
+        adaptiveConcurrency = config[const.ADAPTIVE_CONCURRENCY]
+
+    rateLimits = None
+    if const.RATE_LIMITS in config and config[const.RATE_LIMITS]:
+        rateLimits = config[const.RATE_LIMITS]
+
+    responseRetention = const.RESPONSE_RETENTION_FULL
+    if const.RESPONSE_RETENTION in config and config[const.RESPONSE_RETENTION]:
+        responseRetention = config[const.RESPONSE_RETENTION]
+        if responseRetention not in RESPONSE_RETENTIONS:
+            raise RuntimeError('response_retention must be one of none, failures, summary, full', responseRetention)
+
+    resultsStore, rerun = None, None
+    if const.RESULTS_STORE in config and config[const.RESULTS_STORE]:
+        resultsStore = ResultsStore(config[const.RESULTS_STORE])
+    if const.RERUN in config and config[const.RERUN]:
+        if resultsStore is None:
+            raise RuntimeError('rerun requires results_store')
+        rerun = config[const.RERUN]
+
+    return dict(identities=identities, clientConfig=clientConfig, hideEnabled=hideEnabled, concurrency=concurrency, customHeaders=customHeaders,
+                autoClean=autoClean, executionMode=executionMode, loadProcesses=loadProcesses, connectionPool=connectionPool,
+                teardownConcurrency=teardownConcurrency, bucketPool=bucketPool, executionEngine=executionEngine, benchmark=benchmark,
+                adaptiveConcurrency=adaptiveConcurrency, rateLimits=rateLimits, resultsStore=resultsStore, rerun=rerun,
+                responseRetention=responseRetention)
+
+
+def initServicesTestModels(config, includePatterns, excludePatterns):
+    initGlobalVariables(config)
+    options = serviceModelOptions(config)
+
+    suitesDir = "suites"
+    if 'tests_dir' in config:
+        suitesDir = config['tests_dir']
+
     if not os.path.exists(suitesDir) or not os.path.isdir(suitesDir):
         raise RuntimeError('tests dir must be a directory', suitesDir)
 
@@ -320,9 +816,9 @@ def initServicesTestModels(config, includePatterns, excludePatterns):
         if const.EXCLUDES in suiteFilters and (excludes := suiteFilters[const.EXCLUDES]):
             excludePatterns.extend([re.compile(excludeStr) for s in excludes if (excludeStr := s.strip())])
 
-    hideEnabled = True
-    if const.HIDE_ENABLED in config:
-        hideEnabled = config[const.HIDE_ENABLED]
+    suiteCacheDir = None
+    if const.SUITE_CACHE_DIR in config and config[const.SUITE_CACHE_DIR]:
+        suiteCacheDir = config[const.SUITE_CACHE_DIR]
 
     serviceModels = {}
     # load xmind cases
@@ -330,8 +826,7 @@ def initServicesTestModels(config, includePatterns, excludePatterns):
     xmindSuites = {}
     if const.LOAD_XMIND_SUITES in config and config[const.LOAD_XMIND_SUITES] and \
             (xmindFiles := [xmindFile for file in os.listdir(suitesDir) if (xmindFile := os.path.join(suitesDir, file)) and os.path.isfile(xmindFile) and file.endswith('.xmind')]) and xmindFiles:
-        for xmindFile in xmindFiles:
-            servicesSuites = loadXmindData(xmindFile)
+        for servicesSuites in loadFilesParallel(loadXmindData, xmindFiles, options['loadProcesses'], suiteCacheDir):
             for serviceName, serviceSuite in servicesSuites.items():
                 if serviceName not in xmindSuites:
                     xmindSuites[serviceName] = []
@@ -363,11 +858,42 @@ def initServicesTestModels(config, includePatterns, excludePatterns):
     for serviceName in itertools.chain(xmindSuites.keys(), serviceYamlFiles.keys()):
         serviceModels[serviceName] = ServiceTestModel(serviceName,
                                                       serviceYamlFiles[serviceName] if serviceName in serviceYamlFiles else None,
-                                                      identities, clientConfig, includePatterns, excludePatterns, hideEnabled,
-                                                      xmindSuites[serviceName] if serviceName in xmindSuites else None, concurrency, customHeaders, autoClean)
+                                                      includePatterns=includePatterns, excludePatterns=excludePatterns,
+                                                      xmindSuites=xmindSuites[serviceName] if serviceName in xmindSuites else None, **options)
     return serviceModels
 
 
+# 多进程执行：suite 按序号分片到各个进程，每个进程独立加载 suites、创建 client 和线程池，执行结果合并到当前进程的 serviceModels
+def runWorkers(config, includePatterns, excludePatterns, workers, serviceModels):
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(runShard, config, includePatterns, excludePatterns, workerIndex, workers) for workerIndex in range(workers)]
+        for future in futures:
+            for serviceName, result in future.result().items():
+                serviceModels[serviceName].mergeShardResult(result)
+
+
+def runShard(config, includePatterns, excludePatterns, workerIndex, workers):
+    config = dict(config)
+    config[const.LOAD_PROCESSES] = 1
+    # 各进程生成的 bucket 序号交错，避免 bucket 名称冲突
+    GLOBAL_VARIABLES['bucketOrdinal'] = itertools.count(workerIndex + 1, workers)
+    serviceModels = initServicesTestModels(config, includePatterns, excludePatterns)
+    results = {}
+    for serviceName, serviceModel in serviceModels.items():
+        logger.info(f'Run ServiceModel: {serviceName} [worker {workerIndex + 1}/{workers}]')
+        serviceModel.shard = (workerIndex, workers)
+        if serviceModel.benchmark is not None:
+            # 目标速率由各进程平分
+            serviceModel.benchmark.rate /= workers
+        if serviceModel.rateLimiter is not None:
+            serviceModel.rateLimiter.scale(1 / workers)
+        serviceModel.setUp()
+        serviceModel.run()
+        serviceModel.tearDown()
+        results[serviceName] = serviceModel.shardResult()
+    return results
+
+
 def exportYaml(suitesDir, result):
     for serviceName, data in result.items():
         exportYamlPath = f'{suitesDir}/exports/{serviceName}'
@@ -378,17 +904,11 @@ def exportYaml(suitesDir, result):
             yaml.dump(data, fp)
 
 
-def parseSuite(parentSuites: [], suites: (dict, list) = None, hideSub=False):
-    if suites is None:
-        return parentSuites
+def normalizeSuites(suites: (dict, list), hideSub=False):
     if not isinstance(suites, (list, dict)):
         raise TypeError('suites: (dict, list)')
-
-    # init
     if hideSub is None:
         hideSub = False
-    if parentSuites is None:
-        parentSuites = []
     suiteList = []
     if isinstance(suites, dict):
         for suiteWrapperName, suiteWrapper in suites.items():
@@ -418,28 +938,136 @@ def parseSuite(parentSuites: [], suites: (dict, list) = None, hideSub=False):
                 for suiteCase in suiteCases:
                     if const.HIDE not in suiteCase:
                         suiteCase[const.HIDE] = hideSub
+    return suiteList
+
 
-    # fork
-    resultSuites = []
-    caseOrdinal = itertools.count(0)
-    for suite in suiteList:
-        suiteOrdinal = next(caseOrdinal)
-        midSuites = copy.deepcopy(parentSuites) if parentSuites else [[]]
+# 预处理用例树：设置 __order__ / __hide__，预编译参数中的占位符，并把 suites 字段从 case 中拆出来，
+# 返回 [[(case, subSuites), ...], ...]，case 作为共享的只读模板，展开时不再复制
+def compileSuites(suites: (dict, list), hideSub=False):
+    compiledSuites = []
+    for suiteOrdinal, suite in enumerate(normalizeSuites(suites, hideSub)):
+        steps = []
         for suiteCase in suite:
             suiteCase[const.ORDER] = suiteOrdinal
-            subSuites = None
-            if const.CASE_SUITES in suiteCase:
-                subSuites = suiteCase[const.CASE_SUITES]
-                del suiteCase[const.CASE_SUITES]
-            if const.CASE_TITLE in suiteCase or const.CASE_OPERATION in suiteCase:
-                for midSuite in midSuites:
-                    suiteCaseCopy = copy.deepcopy(suiteCase)
-                    midSuite.append(suiteCaseCopy)
+            subSuites = suiteCase.pop(const.CASE_SUITES, None)
+            for field in (const.CASE_PARAMETERS, const.CASE_ASSERTION, const.SUITE_LOCALS):
+                if field in suiteCase:
+                    suiteCase[field] = compilePlaceholders(suiteCase[field])
             if subSuites is not None:
                 caseHideSub = const.HIDE in suiteCase and suiteCase[const.HIDE]
-                midSuites = parseSuite(midSuites, subSuites, caseHideSub)
-        resultSuites.extend(midSuites)
-    return resultSuites
+                subSuites = compileSuites(subSuites, caseHideSub)
+            case = suiteCase if const.CASE_TITLE in suiteCase or const.CASE_OPERATION in suiteCase else None
+            if case is not None or subSuites is not None:
+                steps.append((case, subSuites))
+        compiledSuites.append(steps)
+    return compiledSuites
+
+
+def _parentPathsOrEmpty(parentPaths):
+    empty = True
+    for path in parentPaths():
+        empty = False
+        yield path
+    if empty:
+        yield ()
+
+
+def _appendCase(parentPaths, case):
+    for path in parentPaths():
+        yield path + (case,)
+
+
+# 惰性展开：按需生成每个 suite 的 case 模板元组，顺序与原先一次性展开（fork 时复制父路径）的结果一致
+def iterSuitePaths(compiledSuites, parentPaths=None):
+    if parentPaths is None:
+        parentPaths = functools.partial(iter, [()])
+    for steps in compiledSuites:
+        midPaths = functools.partial(_parentPathsOrEmpty, parentPaths)
+        for case, subSuites in steps:
+            if case is not None:
+                midPaths = functools.partial(_appendCase, midPaths, case)
+            if subSuites is not None:
+                midPaths = functools.partial(iterSuitePaths, subSuites, midPaths)
+        yield from midPaths()
+
+
+def iterSuites(compiledSuites):
+    # 执行结果写在每个 suite 自己的 overlay 中，case 模板在所有 suite 之间共享
+    for path in iterSuitePaths(compiledSuites):
+        yield [collections.ChainMap({}, case) for case in path]
+
+
+class SuiteModel:
+    """
+    suite 集合，每次迭代时惰性展开，不在内存中保留全部 suite
+    """
+
+    def __init__(self, compiledSuites):
+        self.compiledSuites = compiledSuites
+
+    def __iter__(self):
+        return iterSuites(self.compiledSuites)
+
+
+def parseSuite(suites: (dict, list) = None, hideSub=False):
+    if suites is None:
+        return []
+    return list(iterSuites(compileSuites(suites, hideSub)))
+
+
+class SuiteTreeNode:
+    """
+    用例树节点：展开后共享同一前缀的 suite 在树中共享同一节点，tree 模式下每个节点只执行一次
+    """
+    __slots__ = ('case', 'parent', 'children', 'childIndex', 'suites', 'suiteId', 'pending', 'cleanLocals')
+
+    def __init__(self, case=None, parent=None):
+        self.case = case
+        self.parent = parent
+        self.children = []
+        self.childIndex = {}
+        # 以该节点结尾的 suite（空分支会使同一节点对应多个 suite）
+        self.suites = []
+        self.suiteId = None
+        self.pending = 0
+        self.cleanLocals = None
+
+    def getChild(self, template):
+        if (child := self.childIndex.get(id(template))) is None:
+            child = SuiteTreeNode(collections.ChainMap({}, template), self)
+            self.children.append(child)
+            self.childIndex[id(template)] = child
+        return child
+
+    def path(self):
+        nodes, node = [], self
+        while node is not None and node.case is not None:
+            nodes.append(node)
+            node = node.parent
+        nodes.reverse()
+        return nodes
+
+    def isolated(self):
+        node = self
+        while node is not None and node.case is not None:
+            if const.ISOLATE in node.case and node.case[const.ISOLATE]:
+                return True
+            node = node.parent
+        return False
+
+
+# 按 case 模板构建前缀树，返回叶子节点列表，叶子顺序与 iterSuitePaths 一致
+def parseSuiteTree(compiledSuites, root=None):
+    if root is None:
+        root = SuiteTreeNode()
+    leaves = []
+    for path in iterSuitePaths(compiledSuites):
+        node = root
+        for template in path:
+            node = node.getChild(template)
+        leaves.append(node)
+    return leaves
+
 
 # 生成测试用例的路径，可以用来标识该用例
 # suite 表示一个完整的 case 集合，每个 case 是一个api调用
@@ -461,13 +1089,14 @@ def reportResult(serviceModels):
     for serviceName, serviceModel in serviceModels.items():
         # suiteFileTotal = len(serviceModel.suiteModels)
 
-        suiteTotal = sum([len(l) for l in serviceModel.suiteModels.values()])
         suitePassCount = len(serviceModel.suite_pass)
         suiteFailedCount = len(serviceModel.suite_failed)
         suiteSkippedCount = len(serviceModel.suite_skipped)
+        suiteCachedCount = len(serviceModel.suite_cached)
+        suiteTotal = suitePassCount + suiteFailedCount + suiteSkippedCount + suiteCachedCount
 
         caseTotal, casePassCount, caseFailedCount, caseSkippedCount, apiInvokedCount = 0, 0, 0, 0, 0
-        for suites in serviceModel.suiteModels.values():
+        for suites in (serviceModel.suite_pass, serviceModel.suite_failed, serviceModel.suite_skipped):
             for suite in suites:
                 for case in suite:
                     if const.CASE_SUCCESS in case:
@@ -488,6 +1117,7 @@ def reportResult(serviceModels):
             'suitePassCount': suitePassCount,
             'suiteFailedCount': suiteFailedCount,
             'suiteSkippedCount': suiteSkippedCount,
+            'suiteCachedCount': suiteCachedCount,
             'caseTotal': caseTotal,
             'casePassCount': casePassCount,
             'caseFailedCount': caseFailedCount,
@@ -499,13 +1129,97 @@ def reportResult(serviceModels):
                   f"Suite [TOTAL: {suiteTotal}, " \
                   f"PASS: {suitePassCount}, " \
                   f"FAILED: {suiteFailedCount}, " \
-                  f"SKIPPED: {suiteSkippedCount}], " \
+                  f"SKIPPED: {suiteSkippedCount}, " \
+                  f"CACHED_PASS: {suiteCachedCount}], " \
                   f"SuiteCase [TOTAL: {caseTotal}, " \
                   f"PASS: {casePassCount}, " \
                   f"FAILED: {caseFailedCount}, " \
                   f"SKIPPED: {caseSkippedCount} " \
                   f"API_INVOKED: {apiInvokedCount}]"
 
+        if connectionStats := serviceModel.connectionStats:
+            summary[serviceName]['connectionStats'] = connectionStats
+            logger.info(f"{str(serviceName).upper()}: "
+                        f"Connections [REQUESTS: {connectionStats['requests']}, "
+                        f"CREATED: {connectionStats['connectionsCreated']}, "
+                        f"REUSE_RATE: {connectionStats['reuseRate']:.2%}, "
+                        f"DISCARDED: {connectionStats['connectionsDiscarded']}, "
+                        f"POOL_SIZE: {connectionStats['poolSize']}, "
+                        f"CLIENTS: {connectionStats['clients']}]")
+
+        if (teardownStats := serviceModel.teardownStats.summary()) and teardownStats['requests']:
+            summary[serviceName]['teardownStats'] = teardownStats
+            logger.info(f"{str(serviceName).upper()}: "
+                        f"Teardown [BUCKETS: {teardownStats['buckets']}, "
+                        f"OBJECTS: {teardownStats['objects']}, "
+                        f"UPLOADS: {teardownStats['uploads']}, "
+                        f"REQUESTS: {teardownStats['requests']}, "
+                        f"ERRORS: {teardownStats['errors']}, "
+                        f"OBJECTS_PER_SECOND: {teardownStats['objectsPerSecond']}]")
+
+        if serviceModel.bucketPool is not None:
+            summary[serviceName]['bucketPoolStats'] = bucketPoolStats = serviceModel.bucketPool.summary()
+            logger.info(f"{str(serviceName).upper()}: "
+                        f"BucketPool [HITS: {bucketPoolStats['hits']}, "
+                        f"MISSES: {bucketPoolStats['misses']}, "
+                        f"HIT_RATE: {bucketPoolStats['hitRate']:.2%}, "
+                        f"RESETS: {bucketPoolStats['resets']}, "
+                        f"RESET_FAILURES: {bucketPoolStats['resetFailures']}, "
+                        f"DROPS: {bucketPoolStats['drops']}]")
+
+        if serviceModel.benchmark is not None:
+            summary[serviceName]['benchmarkStats'] = benchmarkStats = serviceModel.benchmark.stats.summary()
+            for name, stats in itertools.chain([('ALL', benchmarkStats)], benchmarkStats['operations'].items()):
+                latency = stats['latency']
+                logger.info(f"{str(serviceName).upper()}: "
+                            f"Benchmark {name} [REQUESTS: {stats['requests']}, "
+                            f"THROUGHPUT: {stats['throughput']}/s, "
+                            f"P50: {latency['p50']}ms, "
+                            f"P90: {latency['p90']}ms, "
+                            f"P99: {latency['p99']}ms, "
+                            f"P99.9: {latency['p99.9']}ms, "
+                            f"MAX: {latency['max']}ms, "
+                            f"ERRORS: {stats['errors']}, "
+                            f"ERROR_RATE: {stats['errorRate']:.2%}, "
+                            f"4XX: {stats['clientErrors']}]")
+            logger.info(f"{str(serviceName).upper()}: "
+                        f"Benchmark [SECONDS: {benchmarkStats['seconds']}, "
+                        f"ITERATIONS: {benchmarkStats['iterations']}, "
+                        f"SUITES: {benchmarkStats['suites']}, "
+                        f"SUITES_FAILED: {benchmarkStats['suitesFailed']}]")
+
+        if serviceModel.adaptiveLimiter is not None:
+            summary[serviceName]['adaptiveConcurrency'] = adaptiveStats = serviceModel.adaptiveLimiter.summary()
+            logger.info(f"{str(serviceName).upper()}: "
+                        f"AdaptiveConcurrency [LIMIT: {adaptiveStats['limit']}, "
+                        f"MIN: {adaptiveStats['minLimit']}, "
+                        f"MAX: {adaptiveStats['maxLimit']}, "
+                        f"MEAN: {adaptiveStats['meanLimit']}, "
+                        f"INCREASES: {adaptiveStats['increases']}, "
+                        f"DECREASES: {adaptiveStats['decreases']}, "
+                        f"THROTTLED: {adaptiveStats['throttled']}]")
+
+        if serviceModel.rateLimiter is not None:
+            summary[serviceName]['rateLimitStats'] = rateLimitStats = serviceModel.rateLimiter.summary()
+            logger.info(f"{str(serviceName).upper()}: "
+                        f"RateLimit [WAITS: {rateLimitStats['waits']}, "
+                        f"WAIT_SECONDS: {rateLimitStats['waitSeconds']}, "
+                        f"MAX_WAIT: {rateLimitStats['maxWait']}s, "
+                        + ', '.join(f"{name.upper()}: {limiterStats['waitSeconds']}s/{limiterStats['waits']}" for name, limiterStats in rateLimitStats['limiters'].items()) + ']')
+
+        summary[serviceName]['timingStats'] = timingStats = serviceModel.timingStats.summary()
+        for operationStats in timingStats['slowestOperations']:
+            logger.info(f"{str(serviceName).upper()}: "
+                        f"Slowest Operation {operationStats['operation']} [COUNT: {operationStats['count']}, "
+                        f"MEAN: {operationStats['mean']}ms, "
+                        f"MAX: {operationStats['max']}ms, "
+                        + ', '.join(f"{phase.upper()}: {operationStats[phase]}ms" for phase in PHASES if phase in operationStats) + ']')
+        if timingStats['slowestSuites']:
+            slowestSuites = ', '.join('%s: %ss' % (suiteStats['suiteId'], suiteStats['seconds']) for suiteStats in timingStats['slowestSuites'])
+            logger.info(f"{str(serviceName).upper()}: Slowest Suites [{slowestSuites}]")
+
+        if suiteCachedCount:
+            logger.info("{}: cached-pass suites: {}", str(serviceName).upper(), [suite[0][const.SUITE_ID] for suite in serviceModel.suite_cached if suite])
         if suiteFailedCount:
             logger.debug("failed suites ids: {}", [suite[0][const.SUITE_ID] for suite in serviceModel.suite_failed if suite])
             logger.error(message)
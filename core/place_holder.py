@@ -1,72 +1,210 @@
+import builtins
+import functools
 import numbers
 import re
+import types
 from typing import Any
 
-from core import const
+
+VAR_PATTERN = re.compile('(\$\{(.*?)})')
+EXPR_PATTERN = re.compile('(@\{(.*?)})')
+
+# context 可以是分层的 ChainMap（eval 的 globals 必须是 dict），作为 locals 传入，变量按层查找
+EVAL_GLOBALS = {'__builtins__': builtins}
 
 PLACE_HOLDER_HANDLERS: [re.Pattern, lambda arg, context: Any] = {
-    re.compile('(\$\{(.*?)})'): lambda arg, context: context[arg] if arg in context else None,
-    re.compile('(@\{(.*?)})'): lambda arg, context: eval(arg, context)}
+    VAR_PATTERN: lambda arg, context: context[arg] if arg in context else None,
+    EXPR_PATTERN: lambda arg, context: evalExpression(compileExpression(arg), context)}
+
+# segment 类型：字面量、${var}、@{expr}
+SEGMENT_LITERAL, SEGMENT_VAR, SEGMENT_EXPR = 0, 1, 2
+
+
+@functools.lru_cache(maxsize=4096)
+def compileExpression(expression):
+    return compile(expression, f'@{{{expression}}}', 'eval')
+
+
+@functools.lru_cache(maxsize=4096)
+def hasNestedScope(code):
+    return any(isinstance(const, types.CodeType) for const in code.co_consts)
+
+
+def evalExpression(code, context):
+    # 推导式、生成器表达式和 lambda 中的变量从 globals 查找，这类表达式把 context 合并到新的 dict 中作为 globals
+    if isinstance(code, types.CodeType) and hasNestedScope(code):
+        scope = dict(context)
+        scope['__builtins__'] = builtins
+        return eval(code, scope)
+    return eval(code, EVAL_GLOBALS, context)
+
+
+class PlaceHolderTemplate(str):
+    """
+    预编译的占位符模板：加载 suite 时把参数字符串拆分为字面量、${var} 和已 compile 的 @{expr}，
+    执行时不再做正则匹配和表达式源码解析；不含占位符的字符串标记为 static，直接返回原值。
+    解析结果与 resolvePlaceHolder 逐次匹配替换的结果一致（先替换 ${}，再对替换结果计算 @{}）。
+    """
+
+    def __new__(cls, source):
+        template = super().__new__(cls, source)
+        template.literal = str(source)
+        template.static = True
+        # 只有一个占位符且占满整个字符串时，直接返回占位符的值（可以是非字符串类型）
+        template.single = None
+        template.segments = None
+        # 同一个表达式出现多次时只计算一次，与 replace 的行为一致
+        template.uniqueExprs = True
+        # 包含 ${} 时，@{} 的源码可能依赖 ${} 的替换结果，只能在替换后再匹配
+        template.hasVars = False
+        if VAR_PATTERN.search(source):
+            template.static = False
+            template.hasVars = True
+            template.segments = cls.split(source, VAR_PATTERN, SEGMENT_VAR)
+        elif EXPR_PATTERN.search(source):
+            template.static = False
+            template.segments = cls.split(source, EXPR_PATTERN, SEGMENT_EXPR)
+            exprs = [value for kind, value in template.segments if kind == SEGMENT_EXPR]
+            template.uniqueExprs = len(set(exprs)) == len(exprs)
+        if template.segments is not None and len(template.segments) == 1 and template.segments[0][0] != SEGMENT_LITERAL:
+            template.single = template.segments[0]
+        return template
+
+    @staticmethod
+    def split(source, pattern, kind):
+        segments, start = [], 0
+        for match in pattern.finditer(source):
+            if match.start() > start:
+                segments.append((SEGMENT_LITERAL, source[start:match.start()]))
+            value = match.group(2)
+            if kind == SEGMENT_EXPR:
+                try:
+                    value = (value, compileExpression(value))
+                except SyntaxError:
+                    # 与 eval 一致，在执行时抛出异常
+                    value = (value, value)
+            segments.append((kind, value))
+            start = match.end()
+        if start < len(source):
+            segments.append((SEGMENT_LITERAL, source[start:]))
+        return segments
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return self.__class__, (self.literal,)
+
+    def resolve(self, context):
+        if self.static:
+            return self.literal
+        if self.single is not None:
+            kind, value = self.single
+            if kind == SEGMENT_VAR:
+                paramValue = context[value] if value in context else None
+            else:
+                paramValue = evalExpression(value[1], context)
+            return self.literal if paramValue is None else paramValue
+
+        pieces, exprValues = [], None if self.uniqueExprs else {}
+        for kind, value in self.segments:
+            if kind == SEGMENT_LITERAL:
+                pieces.append(value)
+                continue
+            if kind == SEGMENT_VAR:
+                paramValue = context[value] if value in context else None
+            elif exprValues is None:
+                paramValue = evalExpression(value[1], context)
+            elif value[0] in exprValues:
+                paramValue = exprValues[value[0]]
+            else:
+                paramValue = exprValues[value[0]] = evalExpression(value[1], context)
+            pieces.append('' if paramValue is None else str(paramValue))
+        arg = ''.join(pieces)
+        if self.hasVars and '@{' in arg:
+            # ${} 替换后的结果中包含 @{} 时按原有规则计算表达式
+            return resolveExpressions(arg, context)
+        return arg
+
+
+def compilePlaceHolder(arg):
+    if isinstance(arg, PlaceHolderTemplate):
+        return arg
+    return _compilePlaceHolder(arg)
+
+
+@functools.lru_cache(maxsize=4096)
+def _compilePlaceHolder(arg):
+    return PlaceHolderTemplate(arg)
 
 
+def compilePlaceholders(value):
+    """
+    加载 suite 时预编译 parameters/assertion 等结构中的字符串，返回替换后的结构（dict/list 就地替换）
+    """
+    if isinstance(value, dict):
+        for k, v in value.items():
+            value[k] = compilePlaceholders(v)
+    elif isinstance(value, list):
+        for index, v in enumerate(value):
+            value[index] = compilePlaceholders(v)
+    elif isinstance(value, str):
+        return compilePlaceHolder(value)
+    return value
+
+
+# 解析结果写入新的 dict/list，不修改 parameters 本身，case 模板可以被多个线程同时执行
 def resolvePlaceholderDict(parameters, context):
-    if parameters is None or len(parameters) == 0:
-        return
+    if parameters is None:
+        return None
+    resolved = {}
     for k, v in parameters.items():
         if isinstance(v, dict):
-            resolvePlaceholderDict(v, context)
+            resolved[k] = resolvePlaceholderDict(v, context)
         elif isinstance(v, list):
-            resolvePlaceHolderArr(v, context)
+            resolved[k] = resolvePlaceHolderArr(v, context)
         elif isinstance(v, str):
-            originalValue = v
-            try:
-                v = resolvePlaceHolder(v, context)
-                parameters[k] = v
-            finally:
-                if not isinstance(v, (numbers.Number, str)):
-                    def resetValue():
-                        parameters[k] = originalValue
-
-                    context[const.RESET_HOOKS].append(resetValue)
+            resolved[k] = resolvePlaceHolder(v, context)
         elif isinstance(v, numbers.Number):
-            continue
+            resolved[k] = v
         else:
             raise ValueError(f'Unsupported parameter: {v}')
+    return resolved
 
 
 def resolvePlaceHolderArr(valueArray, context):
-    if valueArray is None or len(valueArray) == 0:
-        return
-    for index, value in enumerate(valueArray):
-        if isinstance(value, list) and len(value):
-            resolvePlaceHolderArr(value, context)
-        if isinstance(value, dict) and len(value):
-            resolvePlaceholderDict(value, context)
+    if valueArray is None:
+        return None
+    resolved = []
+    for value in valueArray:
+        if isinstance(value, list):
+            resolved.append(resolvePlaceHolderArr(value, context))
+        elif isinstance(value, dict):
+            resolved.append(resolvePlaceholderDict(value, context))
         elif isinstance(value, str):
-            originalValue = value
-            try:
-                value = resolvePlaceHolder(value, context)
-                valueArray[index] = value
-            finally:
-                if not isinstance(value, (numbers.Number, str)):
-                    def resetValue():
-                        valueArray[index] = originalValue
-
-                    context[const.RESET_HOOKS].append(resetValue())
+            resolved.append(resolvePlaceHolder(value, context))
         elif isinstance(value, numbers.Number):
-            continue
+            resolved.append(value)
         else:
             raise RuntimeError('Unsupported parameter', value)
+    return resolved
 
 
-def resolvePlaceHolder(arg, context):
-    for pattern, handler in PLACE_HOLDER_HANDLERS.items():
-        for placeHolder, paramName in set(pattern.findall(arg)):
-            paramValue = handler(paramName, context)
-            if placeHolder == arg:
-                return arg if paramValue is None else paramValue
-            else:
-                if paramValue is None:
-                    paramValue = ''
-                arg = arg.replace(placeHolder, str(paramValue))
+def resolveExpressions(arg, context):
+    handler = PLACE_HOLDER_HANDLERS[EXPR_PATTERN]
+    for placeHolder, expression in set(EXPR_PATTERN.findall(arg)):
+        paramValue = handler(expression, context)
+        if placeHolder == arg:
+            return arg if paramValue is None else paramValue
+        else:
+            if paramValue is None:
+                paramValue = ''
+            arg = arg.replace(placeHolder, str(paramValue))
     return arg
+
+
+def resolvePlaceHolder(arg, context):
+    return compilePlaceHolder(arg).resolve(context)
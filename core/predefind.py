@@ -1,4 +1,7 @@
+import logging
 import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from copy import deepcopy
 
 import boto3
@@ -7,6 +10,7 @@ from botocore.client import (
     Config as S3Config
 )
 from botocore.exceptions import ClientError
+from loguru import logger
 
 BUCKET_PREFIX = '1-aws-s3-tests-bucket'
 
@@ -22,24 +26,102 @@ def setVars(serviceModel=None, suiteLocals=None, caseLocals=None, parameters=Non
     return parameters
 
 
+# teardown：bucket 级别和删除请求级别都使用有界线程池，列举下一页的同时并行删除已列举的对象
+TEARDOWN_CONCURRENCY = 16
+DELETE_BATCH_SIZE = 1000
+
+
+# 清理时间段超过该数量时合并重叠的时间段
+TEARDOWN_SPANS_COMPACT = 1024
+
+
+def mergeSpans(spans):
+    merged = []
+    for started, finished in sorted(spans):
+        if merged and started <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], finished))
+        else:
+            merged.append((started, finished))
+    return merged
+
+
+class TeardownStats:
+    """
+    teardown 吞吐统计
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buckets = 0
+        self.objects = 0
+        self.uploads = 0
+        self.requests = 0
+        self.errors = 0
+        # 每次清理的 (开始, 结束) 时间段；suite 的 auto clean 分散在整个执行过程中，
+        # 按时间段的并集计算清理耗时，并行的清理只计算一次，不包含 suite 执行的时间
+        self.spans = []
+
+    def record(self, buckets=0, objects=0, uploads=0, requests=0, errors=0, started=None, finished=None, spans=()):
+        with self.lock:
+            self.buckets += buckets
+            self.objects += objects
+            self.uploads += uploads
+            self.requests += requests
+            self.errors += errors
+            if started is not None and finished is not None:
+                self.spans.append((started, finished))
+            self.spans.extend(tuple(span) for span in spans)
+            if len(self.spans) > TEARDOWN_SPANS_COMPACT:
+                self.spans = mergeSpans(self.spans)
+
+    def seconds(self):
+        return sum(finished - started for started, finished in mergeSpans(self.spans))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def merge(self, other):
+        self.record(other.buckets, other.objects, other.uploads, other.requests, other.errors, spans=other.spans)
+
+    def summary(self):
+        with self.lock:
+            seconds = self.seconds()
+            return {
+                'buckets': self.buckets,
+                'objects': self.objects,
+                'uploads': self.uploads,
+                'requests': self.requests,
+                'errors': self.errors,
+                'seconds': round(seconds, 3),
+                'objectsPerSecond': round(self.objects / seconds, 1) if seconds else 0,
+            }
+
+
 def DropAllBuckets(serviceModel=None, suiteLocals=None, caseLocals=None, parameters=None):
     client = caseLocals['Client']
     apiInvokedCount = 0
+    start = time.time()
     try:
         listBucketsResp = client.list_buckets()
         if 'Buckets' in listBucketsResp and (Buckets := listBucketsResp['Buckets']):
-            hooks = []
             Buckets = [Bucket['Name'] for Bucket in Buckets]
             listBucketsResp['Buckets'] = Buckets
-            for Bucket in Buckets:
-                apiInvokedCount += 1
+
+            def dropBucket(Bucket):
                 caseLocalsCopy = caseLocals.copy()
                 caseLocalsCopy['Bucket'] = Bucket
-                t = threading.Thread(target=DropBucket, args=(serviceModel, suiteLocals, caseLocalsCopy, parameters))
-                hooks.append(t.join)
-                t.start()
-            for hook in hooks:
-                hook()
+                return DropBucket(serviceModel, suiteLocals, caseLocalsCopy, parameters)
+
+            apiInvokedCount += len(Buckets)
+            with ThreadPoolExecutor(max_workers=serviceModel.teardownConcurrency) as bucketPool:
+                list(bucketPool.map(dropBucket, Buckets))
+            logger.info("DropAllBuckets: dropped {} buckets in {:.2f}s, teardown stats: {}", len(Buckets), time.time() - start, serviceModel.teardownStats.summary())
         return listBucketsResp
     except ClientError as e:
         return e.response
@@ -57,6 +139,7 @@ def DropBucket(serviceModel=None, suiteLocals=None, caseLocals=None, parameters=
             if 400 <= responseMetadata['HTTPStatusCode'] < 500:
                 return response
         response = client.delete_bucket(Bucket=Bucket)
+        serviceModel.teardownStats.record(buckets=1)
         return response
     except ClientError as e:
         return e.response
@@ -65,34 +148,95 @@ def DropBucket(serviceModel=None, suiteLocals=None, caseLocals=None, parameters=
         pass
 
 
+def deleteObjectBatch(client, Bucket, objectIdentifierList):
+    response = client.delete_objects(Bucket=Bucket, Delete={
+        'Objects': objectIdentifierList,
+        'Quiet': True
+    })
+    return response, len(response['Errors']) if 'Errors' in response and response['Errors'] else 0
+
+
+def abortMultipartUpload(client, Bucket, upload):
+    try:
+        return client.abort_multipart_upload(Bucket=Bucket, Key=upload['Key'], UploadId=upload['UploadId']), 0
+    except ClientError as e:
+        return e.response, 1
+
+
+def submitDeleteBatches(serviceModel, client, Bucket, objectIdentifierList, futures):
+    for i in range(0, len(objectIdentifierList), DELETE_BATCH_SIZE):
+        batch = objectIdentifierList[i:i + DELETE_BATCH_SIZE]
+        futures.append((len(batch), serviceModel.getTeardownPool().submit(deleteObjectBatch, client, Bucket, batch)))
+
+
 def DropObjects(serviceModel=None, suiteLocals=None, caseLocals=None, parameters=None):
     client = caseLocals['Client']
     Bucket = caseLocals['Bucket']
 
-    apiInvokedCount = 0
+    start = time.time()
+    apiInvokedCount, objectCount, uploadCount, errorCount = 0, 0, 0, 0
+    objectFutures, uploadFutures = [], []
+
+    def waitObjectFutures():
+        nonlocal apiInvokedCount, objectCount, errorCount
+        response = None
+        for batchSize, future in objectFutures:
+            apiInvokedCount += 1
+            response, batchErrors = future.result()
+            objectCount += batchSize - batchErrors
+            errorCount += batchErrors
+        objectFutures.clear()
+        return response
+
     try:
-        response = client.list_objects(Bucket=Bucket)
-        if 'ResponseMetadata' in response and (responseMetadata := response['ResponseMetadata']):
-            if responseMetadata['HTTPStatusCode'] == 404:
-                return response
-        while True:
-            finalResponse = response
-            if 'Contents' in response and (objects := response['Contents']):
+        # 1、当前版本的对象：第一页返回 404 时直接返回
+        pages = client.get_paginator('list_objects_v2').paginate(Bucket=Bucket)
+        finalResponse = None
+        for page in pages:
+            if finalResponse is None:
+                finalResponse = page
+            else:
                 apiInvokedCount += 1
-                objectIdentifierList = [{'Key': obj['Key'] for obj in objects}]
-                finalResponse = client.delete_objects(Bucket=Bucket, Delete={
-                    'Objects': objectIdentifierList
-                })
-            if 'IsTruncated' in response and response['IsTruncated'] and 'NextMarker' in response and (
-                    NextMarker := response['NextMarker']):
+            if 'Contents' in page and (objects := page['Contents']):
+                submitDeleteBatches(serviceModel, client, Bucket, [{'Key': obj['Key']} for obj in objects], objectFutures)
+        # 开启多版本的桶上删除当前版本会产生删除标记，需要等删除完成后再列举版本，否则新产生的删除标记会残留
+        finalResponse = waitObjectFutures() or finalResponse
+
+        # 2、历史版本和删除标记（服务端可能不支持，忽略错误）；未开启多版本时写入的对象 VersionId 为 'null'，同样需要删除
+        try:
+            for page in client.get_paginator('list_object_versions').paginate(Bucket=Bucket):
                 apiInvokedCount += 1
-                response = client.list_objects(Bucket=Bucket, Marker=NextMarker)
-            else:
-                return finalResponse
+                versions = [{'Key': v['Key'], 'VersionId': v['VersionId']}
+                            for field in ('Versions', 'DeleteMarkers') if field in page and page[field]
+                            for v in page[field] if 'VersionId' in v and v['VersionId']]
+                if versions:
+                    submitDeleteBatches(serviceModel, client, Bucket, versions, objectFutures)
+        except ClientError as e:
+            logger.debug("DropObjects: skip ListObjectVersions for {}: {}", Bucket, e)
+
+        # 3、未完成的分段上传
+        try:
+            for page in client.get_paginator('list_multipart_uploads').paginate(Bucket=Bucket):
+                apiInvokedCount += 1
+                if 'Uploads' in page and (uploads := page['Uploads']):
+                    for upload in uploads:
+                        uploadFutures.append(serviceModel.getTeardownPool().submit(abortMultipartUpload, client, Bucket, upload))
+        except ClientError as e:
+            logger.debug("DropObjects: skip ListMultipartUploads for {}: {}", Bucket, e)
+
+        finalResponse = waitObjectFutures() or finalResponse
+        for future in uploadFutures:
+            apiInvokedCount += 1
+            response, abortErrors = future.result()
+            uploadCount += 1 - abortErrors
+            errorCount += abortErrors
+        return finalResponse
     except ClientError as e:
         return e.response
     finally:
         serviceModel.increaseExtraCaseApisCount(apiInvokedCount)
+        serviceModel.teardownStats.record(objects=objectCount, uploads=uploadCount, requests=apiInvokedCount + 1,
+                                          errors=errorCount, started=start, finished=time.time())
 
 
 # def AddHeaders(serviceModel=None, suiteLocals=None, caseLocals=None, parameters=None):
@@ -128,12 +272,89 @@ defaultClientConfig = {
 }
 
 
-def newAnonymousClient(serviceName, clientConfig):
+def newAnonymousClient(serviceName, clientConfig, extraConfigOptions=None):
     configOptions = deepcopy(defaultClientConfig)
     configOptions['signature_version'] = UNSIGNED
+    if extraConfigOptions:
+        configOptions.update(extraConfigOptions)
     return boto3.client(serviceName, **clientConfig, config=S3Config(**configOptions))
 
 
-def newAwsClient(serviceName, clientConfig):
+def newAwsClient(serviceName, clientConfig, extraConfigOptions=None):
     configOptions = deepcopy(defaultClientConfig)
-    return boto3.client(serviceName, **clientConfig, config=S3Config(configOptions))
+    if extraConfigOptions:
+        configOptions.update(extraConfigOptions)
+    return boto3.client(serviceName, **clientConfig, config=S3Config(**configOptions))
+
+
+class PoolFullCounter(logging.Filter):
+    """
+    统计 urllib3 连接池已满时丢弃的连接数（botocore 的连接池不阻塞等待，连接不足时直接新建，归还时池满则丢弃）；
+    日志中没有连接池所属的 client，由 client 的连接池在归还连接时设置当前线程对应的 client，按 client 计数
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def filter(self, record):
+        if str(record.msg).startswith('Connection pool is full') and (client := getattr(self.local, 'client', None)) is not None:
+            with self.lock:
+                client.connectionsDiscarded += 1
+        return True
+
+
+poolFullCounter = PoolFullCounter()
+logging.getLogger('urllib3.connectionpool').addFilter(poolFullCounter)
+
+
+def countDiscardedConnections(client):
+    client.connectionsDiscarded = 0
+    # 连接池类型由 client 的 http session 独占，代理的连接池同样使用
+    # noinspection PyProtectedMember
+    poolClasses = client._endpoint.http_session._pool_classes_by_scheme
+    for scheme, poolClass in list(poolClasses.items()):
+        class CountingPool(poolClass):
+            def _put_conn(self, conn):
+                poolFullCounter.local.client = client
+                try:
+                    super()._put_conn(conn)
+                finally:
+                    poolFullCounter.local.client = None
+
+        poolClasses[scheme] = CountingPool
+
+
+def collectConnectionStats(clients):
+    requests, connectionsCreated, poolSize = 0, 0, 0
+    for client in clients:
+        # noinspection PyProtectedMember
+        httpSession = client._endpoint.http_session
+        managers = [httpSession._manager, *httpSession._proxy_managers.values()]
+        for manager in managers:
+            for key in manager.pools.keys():
+                if (pool := manager.pools.get(key)) is None:
+                    continue
+                requests += pool.num_requests
+                connectionsCreated += pool.num_connections
+                poolSize = max(poolSize, pool.pool.maxsize if pool.pool is not None else 0)
+    return {
+        'clients': len(clients),
+        'poolSize': poolSize,
+        'requests': requests,
+        'connectionsCreated': connectionsCreated,
+        'connectionsDiscarded': sum(getattr(client, 'connectionsDiscarded', 0) for client in clients),
+        'reuseRate': 1 - connectionsCreated / requests if requests else 0,
+    }
+
+
+def mergeConnectionStats(stats, other):
+    if stats is None:
+        return other
+    if other is None:
+        return stats
+    merged = {k: stats[k] + other[k] for k in ('clients', 'requests', 'connectionsCreated', 'connectionsDiscarded')}
+    merged['poolSize'] = max(stats['poolSize'], other['poolSize'])
+    merged['reuseRate'] = 1 - merged['connectionsCreated'] / merged['requests'] if merged['requests'] else 0
+    return merged
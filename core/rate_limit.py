@@ -0,0 +1,138 @@
+import contextvars
+import threading
+import time
+
+from core import const
+from core.timing import enterPhase
+
+GLOBAL_LIMITER = 'global'
+# asyncio 引擎中不能在事件循环里等待：发送请求前设置为 0，before-call 中只预占令牌并写入需要等待的时间，由发送请求的协程等待
+DEFERRED_WAIT = contextvars.ContextVar('deferredWait', default=None)
+
+
+class TokenBucket:
+    """
+    令牌桶：reserve 立即预占令牌（允许为负）并返回需要等待的时间，调用方在锁外等待，持锁时间与线程数无关
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.waits = 0
+        self.waitSeconds = 0.0
+
+    def reserve(self, now):
+        with self.lock:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            self.requests += 1
+            if self.tokens >= 0:
+                return 0.0
+            delay = -self.tokens / self.rate
+            self.waits += 1
+            self.waitSeconds += delay
+            return delay
+
+    def scale(self, factor):
+        with self.lock:
+            self.rate *= factor
+            self.burst = max(1.0, self.burst * factor)
+            self.tokens = min(self.tokens, self.burst)
+
+    def summary(self):
+        with self.lock:
+            return {'rate': self.rate, 'burst': self.burst, 'requests': self.requests, 'waits': self.waits, 'waitSeconds': round(self.waitSeconds, 3)}
+
+
+def newTokenBucket(limit):
+    # 限制可以是速率（次/秒），或 {rate, burst}
+    if isinstance(limit, dict):
+        return TokenBucket(limit[const.RATE], limit.get(const.BURST))
+    return TokenBucket(limit)
+
+
+class RateLimiter:
+    """
+    请求速率限制：全局、按 identity、按操作的令牌桶，请求需要同时满足所有匹配的限制，等待时间取其中最长的
+    """
+
+    def __init__(self, rateLimits):
+        self.buckets = {}
+        if const.GLOBAL in rateLimits and rateLimits[const.GLOBAL]:
+            self.buckets[GLOBAL_LIMITER] = newTokenBucket(rateLimits[const.GLOBAL])
+        for identityName, limit in (rateLimits.get(const.IDENTITIES) or {}).items():
+            self.buckets[f'identity:{identityName}'] = newTokenBucket(limit)
+        for operationName, limit in (rateLimits.get(const.OPERATIONS) or {}).items():
+            self.buckets[f'operation:{operationName}'] = newTokenBucket(limit)
+        self.globalBucket = self.buckets.get(GLOBAL_LIMITER)
+        self.lock = threading.Lock()
+        self.waits = 0
+        self.waitSeconds = 0.0
+        self.maxWait = 0.0
+
+    def reserve(self, identityName, operationName):
+        now = time.monotonic()
+        delay = 0.0
+        if self.globalBucket is not None:
+            delay = self.globalBucket.reserve(now)
+        if (bucket := self.buckets.get(f'identity:{identityName}')) is not None:
+            delay = max(delay, bucket.reserve(now))
+        if (bucket := self.buckets.get(f'operation:{operationName}')) is not None:
+            delay = max(delay, bucket.reserve(now))
+        if delay > 0:
+            with self.lock:
+                self.waits += 1
+                self.waitSeconds += delay
+                self.maxWait = max(self.maxWait, delay)
+        return delay
+
+    def wait(self, identityName, operationName):
+        if (delay := self.reserve(identityName, operationName)) > 0:
+            time.sleep(delay)
+
+    def scale(self, factor):
+        for bucket in self.buckets.values():
+            bucket.scale(factor)
+
+    def registerHandler(self, client):
+        # 所有经过 client 的请求（suite、预置函数、auto clean、bucket 池）都在 botocore 的 before-call 事件中限流
+        serviceId = client.meta.service_model.service_id.hyphenize()
+        identityName = client.identityConfig['identity_name']
+
+        def beforeCall(model, **kwargs):
+            delay = self.reserve(identityName, model.name)
+            if DEFERRED_WAIT.get() is not None:
+                DEFERRED_WAIT.set(delay)
+            elif delay > 0:
+                # 等待时间不计入请求构建阶段
+                enterPhase(None)
+                time.sleep(delay)
+                enterPhase('build')
+
+        client.meta.events.register(f'before-call.{serviceId}.*', beforeCall)
+
+    def summary(self):
+        with self.lock:
+            return {
+                'waits': self.waits,
+                'waitSeconds': round(self.waitSeconds, 3),
+                'maxWait': round(self.maxWait, 3),
+                'limiters': {name: bucket.summary() for name, bucket in self.buckets.items()},
+            }
+
+    def merge(self, summary):
+        with self.lock:
+            self.waits += summary['waits']
+            self.waitSeconds += summary['waitSeconds']
+            self.maxWait = max(self.maxWait, summary['maxWait'])
+        for name, bucketSummary in summary['limiters'].items():
+            if (bucket := self.buckets.get(name)) is not None:
+                with bucket.lock:
+                    bucket.requests += bucketSummary['requests']
+                    bucket.waits += bucketSummary['waits']
+                    bucket.waitSeconds += bucketSummary['waitSeconds']
@@ -0,0 +1,191 @@
+import collections
+import json
+import os
+import queue
+import threading
+import time
+
+from loguru import logger
+
+from core import const
+from core.utils import IgnoreNotSerializable
+
+# 攒够 fsync_batch 条记录或距离上次 fsync 超过 fsync_interval 秒时 fsync
+FSYNC_INTERVAL = 1.0
+FSYNC_BATCH = 1000
+
+# 记录中的 suite 状态与 ServiceTestModel 中结果列表的对应关系
+SUITE_RESULTS = {'pass': 'suite_pass', 'failed': 'suite_failed', 'skipped': 'suite_skipped', 'cached': 'suite_cached'}
+
+# tree 模式下 suite 记录中引用共享节点 case 记录的字段，其余字段为 suite 自己的 overlay
+TREE_REF = '$ref'
+
+_CLOSED = object()
+
+
+def dumpRecord(record):
+    return json.dumps(record, default=IgnoreNotSerializable, separators=(',', ':'), ensure_ascii=False)
+
+
+class ResultSink:
+    """
+    流式结果文件（JSON Lines）：每个 case 执行完写一条 case 记录，suite 结束时写一条 suite 记录，
+    suite 记录中已经写过的 case 为 null，只包含没有执行的 case。记录在调用线程中序列化，由独立的写线程追加到文件并批量 fsync，
+    进程异常退出时已完成的结果不会丢失；dropResponses 为 true 时 case 记录写出后从内存中删除 response，报告从文件重建。
+    tree 模式下共享节点的 case 只执行一次，按所属路径的 suiteId 写一条带编号的 case 记录，suite 记录通过编号引用
+    """
+
+    def __init__(self, path, fsyncInterval=FSYNC_INTERVAL, fsyncBatch=FSYNC_BATCH, dropResponses=False):
+        self.path = path
+        self.fsyncInterval = fsyncInterval
+        self.fsyncBatch = fsyncBatch
+        self.dropResponses = dropResponses
+        self.queue = queue.SimpleQueue()
+        self.lock = threading.Lock()
+        self.caseCounts = {}
+        self.records = 0
+        # tree 模式：共享节点执行结果层的 id -> case 记录编号
+        self.treeRefs = {}
+        self.writer = None
+        self.serviceModels = {}
+
+    def start(self, serviceModels):
+        if directory := os.path.dirname(self.path):
+            os.makedirs(directory, exist_ok=True)
+        self.fp = open(self.path, 'w', encoding='utf-8')
+        self.writer = threading.Thread(target=self.writeLoop, name='result-sink', daemon=True)
+        self.writer.start()
+        self.serviceModels = serviceModels
+        for serviceModel in serviceModels.values():
+            serviceModel.resultSink = self
+
+    def writeCase(self, serviceName, suiteId, case):
+        line = dumpRecord({'type': 'case', 'service': serviceName, 'suiteId': suiteId, 'case': dict(case)})
+        with self.lock:
+            self.caseCounts[(serviceName, suiteId)] = self.caseCounts.get((serviceName, suiteId), 0) + 1
+        self.queue.put(line)
+        if self.dropResponses and const.CASE_RESPONSE in case:
+            del case[const.CASE_RESPONSE]
+
+    def writeTreeCase(self, serviceName, suiteId, case):
+        with self.lock:
+            # suite 中的 case 为 node.case.new_child()，maps[1] 即节点的执行结果层
+            ref = self.treeRefs[id(case.maps[0])] = len(self.treeRefs)
+        self.queue.put(dumpRecord({'type': 'case', 'service': serviceName, 'suiteId': suiteId, 'ref': ref, 'case': dict(case)}))
+        if self.dropResponses and const.CASE_RESPONSE in case:
+            del case[const.CASE_RESPONSE]
+
+    def suiteCase(self, case):
+        # tree 模式的 case 为共享节点之上的 overlay，已经写出的共享节点只引用编号
+        if isinstance(case, collections.ChainMap) and len(case.maps) > 1 and (ref := self.treeRefs.get(id(case.maps[1]))) is not None:
+            return {TREE_REF: ref, **case.maps[0]}
+        return dict(case)
+
+    def writeSuite(self, serviceName, suite, status):
+        suiteId = suite[0][const.SUITE_ID] if suite else None
+        with self.lock:
+            written = self.caseCounts.pop((serviceName, suiteId), 0)
+        cases = [None] * written + [self.suiteCase(case) for case in suite[written:]]
+        self.queue.put(dumpRecord({'type': 'suite', 'service': serviceName, 'suiteId': suiteId, 'status': status, 'cases': cases}))
+
+    def writeLoop(self):
+        unsynced, lastSync = 0, time.monotonic()
+        closed = False
+        while not closed:
+            try:
+                line = self.queue.get(timeout=self.fsyncInterval)
+            except queue.Empty:
+                line = None
+            lines = []
+            # 一次取出队列中已有的记录，合并写入
+            while line is not None:
+                if line is _CLOSED:
+                    closed = True
+                    break
+                lines.append(line)
+                try:
+                    line = self.queue.get_nowait()
+                except queue.Empty:
+                    line = None
+            try:
+                if lines:
+                    self.fp.write('\n'.join(lines) + '\n')
+                    unsynced += len(lines)
+                    self.records += len(lines)
+                if unsynced and (closed or unsynced >= self.fsyncBatch or time.monotonic() - lastSync >= self.fsyncInterval):
+                    self.fp.flush()
+                    os.fsync(self.fp.fileno())
+                    unsynced, lastSync = 0, time.monotonic()
+            except OSError as e:
+                logger.warning("ResultSink: failed to write {}: {}", self.path, e)
+
+    def close(self):
+        if self.writer is None:
+            return
+        # 不在 suite 中的统计（预置函数等额外的 API 调用数），重建汇总时使用
+        for serviceName, serviceModel in self.serviceModels.items():
+            self.queue.put(dumpRecord({'type': 'service', 'service': serviceName, 'extraApiCalls': serviceModel.extra_case_api_invoked_count}))
+        self.queue.put(_CLOSED)
+        self.writer.join()
+        self.fp.close()
+        self.writer = None
+        logger.info("ResultSink: {} records written to {}", self.records, self.path)
+
+
+def newResultSink(config):
+    if const.RESULT_SINK not in config or not (sinkConfig := config[const.RESULT_SINK]):
+        return None
+    if const.ENABLED not in sinkConfig or not sinkConfig[const.ENABLED]:
+        return None
+    return ResultSink(sinkConfig[const.PATH], fsyncInterval=sinkConfig.get(const.FSYNC_INTERVAL) or FSYNC_INTERVAL,
+                      fsyncBatch=sinkConfig.get(const.FSYNC_BATCH) or FSYNC_BATCH, dropResponses=bool(sinkConfig.get(const.DROP_RESPONSES)))
+
+
+def sharedCase(shared, serviceName, case):
+    if TREE_REF not in case:
+        return case
+    overlay = dict(case)
+    return collections.ChainMap(overlay, shared[(serviceName, overlay.pop(TREE_REF))])
+
+
+def iterSuiteRecords(path, serviceRecords=None):
+    """
+    从结果文件按完成顺序还原 suite：(serviceName, status, cases)，没有 suite 记录（进程中断时未完成）的 suite 被忽略；
+    服务级别的记录写入 serviceRecords
+    """
+    pending, shared = {}, {}
+    with open(path, 'r', encoding='utf-8') as fp:
+        for line in fp:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # 进程中断时最后一行可能不完整
+                logger.warning("ResultSink: ignoring broken record in {}", path)
+                continue
+            if record['type'] == 'service':
+                if serviceRecords is not None:
+                    serviceRecords[record['service']] = record
+                continue
+            key = (record['service'], record['suiteId'])
+            if record['type'] == 'case':
+                if 'ref' in record:
+                    shared[(record['service'], record['ref'])] = record['case']
+                else:
+                    pending.setdefault(key, []).append(record['case'])
+                continue
+            written = iter(pending.pop(key, ()))
+            yield record['service'], record['status'], [next(written) if case is None else sharedCase(shared, record['service'], case) for case in record['cases']]
+    if pending:
+        logger.warning("ResultSink: {} unfinished suites in {}", len(pending), path)
+
+
+def loadResults(path, serviceModels):
+    # 用结果文件中的 suite 替换 serviceModels 中的结果列表
+    for serviceModel in serviceModels.values():
+        for attr in SUITE_RESULTS.values():
+            setattr(serviceModel, attr, [])
+    for serviceName, status, cases in iterSuiteRecords(path):
+        if serviceName in serviceModels:
+            getattr(serviceModels[serviceName], SUITE_RESULTS[status]).append(cases)
@@ -0,0 +1,137 @@
+import collections
+import hashlib
+import json
+import os
+import time
+
+from loguru import logger
+
+from core import const
+from core.loader import writeAtomic
+
+RESULTS_STORE_VERSION = 1
+# 错误信息只保留前若干个字符，保持结果文件紧凑
+ERROR_MAX_LENGTH = 1000
+
+SUITE_STATUS_PASS = 'pass'
+SUITE_STATUS_FAILED = 'failed'
+
+# --rerun-failed：只执行上次失败的 suite；--since-last：执行上次失败或没有执行过的 suite；
+# --changed：跳过定义没有变化、并且上次在同一 endpoint 上通过的 suite（记为 cached-pass）
+RERUN_FAILED = 'failed'
+RERUN_SINCE_LAST = 'since_last'
+RERUN_CHANGED = 'changed'
+
+# 参与 suite 指纹计算的 case 字段（标题、隐藏等只影响展示的字段不计入）
+FINGERPRINT_FIELDS = (const.CASE_OPERATION, const.CASE_PARAMETERS, const.CASE_ASSERTION, const.CASE_CLIENT_NAME, const.SUITE_LOCALS)
+
+
+def suitePathHash(suiteModelName, suitePath):
+    return hashlib.sha256(f'{suiteModelName}\n{suitePath}'.encode('utf-8')).hexdigest()[:16]
+
+
+class SuiteKeys:
+    """
+    suite 的稳定标识和指纹。稳定标识：suiteModel 名称与 getSuitePath 完整路径的 hash，与 suite 的位置序号无关，
+    思维导图中增删其他分支不会改变已有 suite 的标识；路径相同的 suite 按出现顺序加后缀区分；
+    指纹：suite 定义的 hash，参数、断言等变化时指纹随之变化
+    """
+
+    def __init__(self):
+        self.occurrences = {}
+        # 展开后的 suite 共享 case 模板，每个模板只计算一次
+        self.caseDigests = {}
+
+    def next(self, suiteModelName, suitePath):
+        pathHash = suitePathHash(suiteModelName, suitePath)
+        occurrence = self.occurrences.get(pathHash, 0)
+        self.occurrences[pathHash] = occurrence + 1
+        return pathHash if not occurrence else f'{pathHash}#{occurrence}'
+
+    def caseDigest(self, case):
+        template = case.maps[-1] if isinstance(case, collections.ChainMap) else case
+        if (digest := self.caseDigests.get(id(template))) is None:
+            fields = {field: template[field] for field in FINGERPRINT_FIELDS if field in template}
+            digest = self.caseDigests[id(template)] = hashlib.sha256(json.dumps(fields, sort_keys=True, default=str).encode('utf-8')).digest()
+        return digest
+
+    def fingerprint(self, suite):
+        # suite 指纹：按顺序对每个 case 的操作、参数、断言、client 和 suiteLocals 计算 hash
+        digest = hashlib.sha256()
+        for case in suite:
+            digest.update(self.caseDigest(case))
+        return digest.hexdigest()[:16]
+
+
+def suiteRecord(suite, status, endpoint):
+    error, seconds = None, 0.0
+    for case in suite:
+        if const.CASE_TIMING in case and case[const.CASE_TIMING]:
+            seconds += case[const.CASE_TIMING]['total'] / 1000
+        if error is None and const.CASE_SUCCESS in case and not case[const.CASE_SUCCESS]:
+            error = str(case.get(const.ERROR_INFO) or '')[:ERROR_MAX_LENGTH]
+    record = {'suiteId': suite[0][const.SUITE_ID], 'status': status, 'seconds': round(seconds, 3), 'updated': int(time.time()),
+              'fingerprint': suite[0].get(const.SUITE_FINGERPRINT), 'endpoint': endpoint}
+    if error is not None:
+        record['error'] = error
+    return record
+
+
+class ResultsStore:
+    """
+    执行结果存储：按服务记录每个 suite 最近一次的状态、错误和耗时，键为 SuiteKeys 生成的稳定标识。
+    每次执行后合并写入（没有执行的 suite 保留上次的结果），用于只重新执行失败或未执行的 suite
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.services = {}
+        if os.path.isfile(path):
+            try:
+                with open(path, 'r') as fp:
+                    data = json.load(fp)
+                if data.get('version') == RESULTS_STORE_VERSION:
+                    self.services = data['services']
+            except Exception as e:
+                logger.warning("Ignoring broken results store {}: {}", path, e)
+
+    def get(self, serviceName, suiteKey):
+        return self.services.get(serviceName, {}).get(suiteKey)
+
+    def selected(self, serviceName, suiteKey, rerun, fingerprint=None, endpoint=None):
+        record = self.get(serviceName, suiteKey)
+        if rerun == RERUN_FAILED:
+            return record is not None and record['status'] == SUITE_STATUS_FAILED
+        if rerun == RERUN_CHANGED:
+            return record is None or record['status'] != SUITE_STATUS_PASS or record.get('fingerprint') != fingerprint or record.get('endpoint') != endpoint
+        return record is None or record['status'] != SUITE_STATUS_PASS
+
+    def update(self, serviceName, serviceModel):
+        records = self.services.setdefault(serviceName, {})
+        endpoint = serviceModel.endpoint()
+        for suites, status in ((serviceModel.suite_pass, SUITE_STATUS_PASS), (serviceModel.suite_failed, SUITE_STATUS_FAILED)):
+            for suite in suites:
+                if suite and const.SUITE_KEY in suite[0]:
+                    records[suite[0][const.SUITE_KEY]] = suiteRecord(suite, status, endpoint)
+
+    def save(self):
+        try:
+            if directory := os.path.dirname(self.path):
+                os.makedirs(directory, exist_ok=True)
+            data = {'version': RESULTS_STORE_VERSION, 'updated': int(time.time()), 'services': self.services}
+            writeAtomic(self.path, json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8'))
+        except OSError as e:
+            logger.warning("Failed to write results store {}: {}", self.path, e)
+
+
+def saveResults(serviceModels):
+    stores = {}
+    for serviceName, serviceModel in serviceModels.items():
+        if serviceModel.resultsStore is None:
+            continue
+        # 所有服务共用同一个结果文件
+        store = stores.setdefault(serviceModel.resultsStore.path, serviceModel.resultsStore)
+        store.update(serviceName, serviceModel)
+    for store in stores.values():
+        store.save()
+        logger.info("ResultsStore: saved to {}", store.path)
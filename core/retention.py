@@ -0,0 +1,72 @@
+from core import const
+
+# summary 模式下保留的字符串长度、列表元素个数和嵌套层数
+SUMMARY_MAX_STRING = 256
+SUMMARY_MAX_ITEMS = 10
+SUMMARY_MAX_DEPTH = 4
+# summary 模式下 ResponseMetadata 只保留的字段
+SUMMARY_METADATA_FIELDS = ('HTTPStatusCode', 'RequestId')
+
+RESPONSE_RETENTIONS = (const.RESPONSE_RETENTION_NONE, const.RESPONSE_RETENTION_FAILURES, const.RESPONSE_RETENTION_SUMMARY, const.RESPONSE_RETENTION_FULL)
+
+
+def isStream(value):
+    return hasattr(value, 'read') and hasattr(value, 'close') and not isinstance(value, (str, bytes, bytearray, dict, list))
+
+
+def releaseStreams(response):
+    # 断言和 suiteLocals 解析之后关闭响应体等流式字段（同时归还连接），替换为与报告中一致的占位字符串
+    if not isinstance(response, dict):
+        return
+    for key, value in list(response.items()):
+        if isStream(value):
+            try:
+                value.close()
+            except Exception:
+                pass
+            response[key] = f'skipped@{value.__class__.__name__}'
+
+
+def summarizeValue(value, depth=0):
+    if isinstance(value, dict):
+        if depth >= SUMMARY_MAX_DEPTH:
+            return f'...({len(value)} keys)'
+        return {k: summarizeValue(v, depth + 1) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        if depth >= SUMMARY_MAX_DEPTH:
+            return f'...({len(value)} items)'
+        items = [summarizeValue(v, depth + 1) for v in value[:SUMMARY_MAX_ITEMS]]
+        if len(value) > SUMMARY_MAX_ITEMS:
+            items.append(f'...({len(value) - SUMMARY_MAX_ITEMS} more items)')
+        return items
+    if isinstance(value, (bytes, bytearray)):
+        return f'...({len(value)} bytes)'
+    if isinstance(value, str):
+        return value if len(value) <= SUMMARY_MAX_STRING else f'{value[:SUMMARY_MAX_STRING]}...({len(value)} chars)'
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    return f'skipped@{value.__class__.__name__}'
+
+
+def summarizeResponse(response):
+    summary = {}
+    for key, value in response.items():
+        if key == 'ResponseMetadata' and isinstance(value, dict):
+            summary[key] = {field: value[field] for field in SUMMARY_METADATA_FIELDS if field in value}
+        else:
+            summary[key] = summarizeValue(value)
+    return summary
+
+
+def retainResponse(retention, response, success):
+    """
+    按保留策略返回记录到 case 中的 response，None 表示不保留：
+    none 不保留；failures 只保留失败 case 的完整 response；summary 保留截断后的摘要；full 保留完整 response
+    """
+    if not response or retention == const.RESPONSE_RETENTION_NONE:
+        return None
+    if retention == const.RESPONSE_RETENTION_FAILURES:
+        return None if success else response
+    if retention == const.RESPONSE_RETENTION_SUMMARY:
+        return summarizeResponse(response) if isinstance(response, dict) else summarizeValue(response)
+    return response
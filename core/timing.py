@@ -0,0 +1,143 @@
+import contextvars
+import heapq
+import threading
+import time
+
+# case 执行阶段：参数占位符解析、请求构建与签名、网络往返（含读取响应体）、响应解析、预置函数、断言
+PHASES = ('resolve', 'build', 'network', 'parse', 'predefined', 'assertion')
+# summary 和控制台输出的最慢操作/suite 数量
+SLOWEST_COUNT = 10
+
+# 当前正在发送的请求的计时，线程引擎中每个线程独立，asyncio 引擎中每个 task 独立
+CURRENT_TIMING = contextvars.ContextVar('currentTiming', default=None)
+
+
+class CaseTiming:
+    """
+    单个 case 的分阶段耗时（秒）：enter 结束当前阶段并开始下一阶段
+    """
+
+    def __init__(self):
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.phase = None
+        self.mark = None
+
+    def enter(self, phase):
+        now = time.perf_counter()
+        if self.phase is not None:
+            self.phases[self.phase] += now - self.mark
+        self.phase, self.mark = phase, now
+
+    def stop(self):
+        self.enter(None)
+
+    @property
+    def total(self):
+        return sum(self.phases.values())
+
+    @property
+    def requestTotal(self):
+        return self.phases['build'] + self.phases['network'] + self.phases['parse']
+
+    def summary(self):
+        # 输出单位为毫秒，省略没有耗时的阶段
+        return {'total': round(self.total * 1000, 3), **{phase: round(seconds * 1000, 3) for phase, seconds in self.phases.items() if seconds}}
+
+
+def enterPhase(phase):
+    if (timing := CURRENT_TIMING.get()) is not None:
+        timing.enter(phase)
+
+
+def registerTimingHandlers(client):
+    serviceId = client.meta.service_model.service_id.hyphenize()
+    # noinspection PyProtectedMember
+    endpoint = client._endpoint
+
+    def onBeforeSend(request, **kwargs):
+        # botocore 在读取完响应体、解析之前没有对应的事件：计时中的请求在这里发送并读取响应体，其它请求由 botocore 发送
+        if (timing := CURRENT_TIMING.get()) is None:
+            return None
+        timing.enter('network')
+        # noinspection PyProtectedMember
+        response = endpoint._send(request)
+        if not request.stream_output:
+            _ = response.content
+        timing.enter('parse')
+        return response
+
+    client.meta.events.register(f'before-send.{serviceId}.*', onBeforeSend)
+
+
+class TimingStats:
+    """
+    分阶段耗时统计：按操作和 identity 汇总，并保留最慢的 suite
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.operations = {}
+        self.identities = {}
+        self.suites = []
+
+    @staticmethod
+    def accumulate(aggregates, key, phases, total, count=1, maxSeconds=None):
+        if (aggregate := aggregates.get(key)) is None:
+            aggregate = aggregates[key] = {'count': 0, 'total': 0.0, 'max': 0.0, **dict.fromkeys(PHASES, 0.0)}
+        aggregate['count'] += count
+        aggregate['total'] += total
+        aggregate['max'] = max(aggregate['max'], total if maxSeconds is None else maxSeconds)
+        for phase in PHASES:
+            aggregate[phase] += phases.get(phase, 0.0)
+
+    def record(self, operationName, identityName, timing):
+        total = timing.total
+        with self.lock:
+            self.accumulate(self.operations, operationName, timing.phases, total)
+            self.accumulate(self.identities, identityName or '', timing.phases, total)
+
+    def recordSuite(self, suiteId, seconds):
+        with self.lock:
+            if len(self.suites) < SLOWEST_COUNT:
+                heapq.heappush(self.suites, (seconds, suiteId))
+            elif seconds > self.suites[0][0]:
+                heapq.heapreplace(self.suites, (seconds, suiteId))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def merge(self, other):
+        for aggregates, otherAggregates in ((self.operations, other.operations), (self.identities, other.identities)):
+            for key, aggregate in otherAggregates.items():
+                with self.lock:
+                    self.accumulate(aggregates, key, aggregate, aggregate['total'], aggregate['count'], aggregate['max'])
+        for seconds, suiteId in other.suites:
+            self.recordSuite(suiteId, seconds)
+
+    @staticmethod
+    def aggregateSummary(aggregate):
+        count = aggregate['count']
+        return {
+            'count': count,
+            'mean': round(aggregate['total'] / count * 1000, 3) if count else 0,
+            'max': round(aggregate['max'] * 1000, 3),
+            **{phase: round(aggregate[phase] / count * 1000, 3) for phase in PHASES if count and aggregate[phase]},
+        }
+
+    def summary(self):
+        with self.lock:
+            operations = {key: self.aggregateSummary(aggregate) for key, aggregate in sorted(self.operations.items())}
+            identities = {key: self.aggregateSummary(aggregate) for key, aggregate in sorted(self.identities.items())}
+            suites = sorted(self.suites, reverse=True)
+        return {
+            'operations': operations,
+            'identities': identities,
+            'slowestOperations': [{'operation': key, **value} for key, value in sorted(operations.items(), key=lambda item: -item[1]['mean'])[:SLOWEST_COUNT]],
+            'slowestSuites': [{'suiteId': suiteId, 'seconds': round(seconds, 3)} for seconds, suiteId in suites],
+        }
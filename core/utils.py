@@ -1,9 +1,17 @@
 import json
+from collections.abc import Mapping
 
 
 def IgnoreNotSerializable(o):
+    if isinstance(o, Mapping):
+        return dict(o)
     return f'skipped@{o.__class__.__name__}'
 
 
+# 转换为 json 兼容的数据（与 ToJsonStr 的输出一致），用于在进程间传递 case 的执行结果
+def ToJsonCompatible(o):
+    return json.loads(json.dumps(o, default=IgnoreNotSerializable))
+
+
 def ToJsonStr(o):
     return json.dumps(o, default=IgnoreNotSerializable, indent=2)
@@ -1,17 +1,25 @@
+import copy
 import itertools
 import json
 import os
 import re
+import tempfile
 import threading
 import time
 import unittest
 import uuid
+import zipfile
 from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
 
 from loguru import logger
 
+from core import const
+from core import loader
 from core.exporters import determineFilePath
-from core.place_holder import resolvePlaceHolder
+from core.models import GLOBAL_VARIABLES, ServiceTestModel, SuiteModel, compileSuites, getSuitePath, parseSuite, parseSuiteTree
+from core.place_holder import PlaceHolderTemplate, compilePlaceholders, resolvePlaceHolder, resolvePlaceholderDict
+from core.predefind import predefinedFuncDict
 
 _: uuid.UUID
 
@@ -102,4 +110,845 @@ class Tests(unittest.TestCase):
             f = pool.submit(lambda x,y: time.sleep(3), 1,2)
             print("wait three seconds")
             print(f.result())
-            pool.shutdown()
\ No newline at end of file
+            pool.shutdown()
+
+    def testParseSuite(self):
+        suites = [[{'operation': 'SetVars', 'title': 'root'},
+                   {'suites': {'__hide__': {'a': [{'operation': 'SetVars'}], 'b': []}}},
+                   {'operation': 'SetVars', 'title': 'tail', 'suites': [[{'title': 'c'}], [], [{'title': 'd'}]]}]]
+        flatSuites = parseSuite(suites)
+        self.assertEqual([getSuitePath(s)[0] for s in flatSuites], [
+            'root::a::SetVars::tail::c', 'root::b::tail::c', 'root::a::SetVars::tail',
+            'root::b::tail', 'root::a::SetVars::tail::d', 'root::b::tail::d'])
+        # 展开的 suite 共享 case 模板，执行结果写在各自的 overlay 中
+        flatSuites[0][0][const.CASE_SUCCESS] = True
+        self.assertNotIn(const.CASE_SUCCESS, flatSuites[1][0])
+        self.assertIs(flatSuites[0][0].maps[1], flatSuites[1][0].maps[1])
+
+    def testParseSuiteTree(self):
+        suites = [[{'operation': 'SetVars', 'title': 'root'},
+                   {'suites': [[{'title': 'a'}], [], [{'title': 'b'}]]},
+                   {'operation': 'SetVars', 'title': 'tail'}]]
+        compiledSuites = compileSuites(suites)
+        leaves = parseSuiteTree(compiledSuites)
+        self.assertEqual([[dict(node.case) for node in leaf.path()] for leaf in leaves],
+                         [[dict(case) for case in suite] for suite in SuiteModel(compiledSuites)])
+        root = leaves[0].path()[0]
+        self.assertIs(leaves[1].path()[0], root)
+        self.assertEqual(len(root.children), 3)
+
+    def testRunSuiteTree(self):
+        calls = []
+
+        def record(serviceModel=None, suiteLocals=None, caseLocals=None, parameters=None):
+            calls.append(parameters['name'])
+            return parameters
+
+        predefinedFuncDict['Record'] = record
+        try:
+            suites = [[{'operation': 'Record', 'parameters': {'name': 'prefix'}},
+                       {'suites': [[{'operation': 'Record', 'parameters': {'name': 'a'}}],
+                                   [{'operation': 'Record', 'parameters': {'name': 'b'}}],
+                                   [{'operation': 'Record', 'parameters': {'name': 'c'}, const.ISOLATE: True}]]}]]
+            serviceModel = ServiceTestModel('s3', None, {}, {}, [re.compile('.*')], [], True, suites,
+                                            executionMode=const.EXECUTION_MODE_TREE)
+            serviceModel.setUp()
+            serviceModel.run()
+            serviceModel.tearDown()
+        finally:
+            del predefinedFuncDict['Record']
+        self.assertEqual(sorted(calls), ['a', 'b', 'c', 'prefix', 'prefix'])
+        self.assertEqual(len(serviceModel.suite_pass), 3)
+        self.assertEqual(len(serviceModel.suite_failed), 0)
+
+    def testXmindCache(self):
+        content = [{'title': 's3', 'rootTopic': {'title': 'S3-Tests', 'children': {'attached': [
+            {'title': 'SetVars', 'notes': {'plain': {'content': '{"operation": "SetVars", "parameters": {"a": 1}}'}}}]}}}]
+        with tempfile.TemporaryDirectory() as tmpDir:
+            xmindFile, cacheDir = os.path.join(tmpDir, 'a.xmind'), os.path.join(tmpDir, 'cache')
+            with zipfile.ZipFile(xmindFile, 'w') as zf:
+                zf.writestr('content.json', json.dumps(content))
+            expect = loader.loadXmindData(xmindFile)
+            self.assertEqual(loader.loadXmindData(xmindFile, cacheDir), expect)
+            # 文件未变更时不再解压 xmind
+            with mock.patch.object(loader.zipfile, 'ZipFile', side_effect=AssertionError('zip opened')):
+                self.assertEqual(loader.loadXmindData(xmindFile, cacheDir), expect)
+            # 文件被 touch 但内容未变更时命中 content hash，跳过 json 解析
+            os.utime(xmindFile, ns=(0, 0))
+            with mock.patch.object(loader, 'parseTopics', side_effect=AssertionError('parsed')):
+                self.assertEqual(loader.loadXmindData(xmindFile, cacheDir), expect)
+
+    def testLoadFilesParallel(self):
+        with tempfile.TemporaryDirectory() as tmpDir:
+            filePaths = []
+            for i in range(3):
+                filePaths.append(filePath := os.path.join(tmpDir, f'{i}.yaml'))
+                with open(filePath, 'w') as fp:
+                    fp.write(f'- - operation: SetVars\n    parameters:\n      i: {i}\n')
+            expect = [[[{'operation': 'SetVars', 'parameters': {'i': i}}]] for i in range(3)]
+            self.assertEqual(loader.loadFilesParallel(loader.loadYamlData, filePaths, 1), expect)
+            self.assertEqual(loader.loadFilesParallel(loader.loadYamlData, filePaths, 2), expect)
+
+    def testPlaceHolderTemplate(self):
+        counter = itertools.count(1)
+        context = {'a': 100, 't': '@{1 + 2}', 'n': lambda: next(counter)}
+        parameters = compilePlaceholders({'k': ['static', '${a}', 'p${t}', 'x_@{n()}_@{n()}']})
+        static, var, nested, expr = parameters['k']
+        self.assertIsInstance(static, PlaceHolderTemplate)
+        self.assertTrue(static.static)
+        self.assertEqual(static.resolve(context), 'static')
+        self.assertEqual(var.resolve(context), 100)
+        self.assertEqual(nested.resolve(context), 'p3')
+        # 同一个表达式只计算一次
+        self.assertEqual(expr.resolve(context), 'x_1_1')
+        self.assertEqual(json.dumps(parameters), '{"k": ["static", "${a}", "p${t}", "x_@{n()}_@{n()}"]}')
+
+        # 推导式和 lambda 中同样可以使用分层 context 中的变量
+        import collections
+        scope = collections.ChainMap({'size': 3}, {'base': 10})
+        self.assertEqual(compilePlaceholders('@{[base + x for x in range(size)]}').resolve(scope), [10, 11, 12])
+        self.assertEqual(compilePlaceholders('@{(lambda y: y * base)(size)}').resolve(scope), 30)
+        self.assertEqual(resolvePlaceHolder('v@{sum(x for x in range(size))}', scope), 'v3')
+        self.assertNotIn('__builtins__', scope)
+
+    def testSuiteLocalsLayers(self):
+        calls = []
+
+        def record(serviceModel=None, suiteLocals=None, caseLocals=None, parameters=None):
+            calls.append((parameters['name'], caseLocals['bucketSuffix']))
+            return {'Echo': parameters['name']}
+
+        predefinedFuncDict['Record'] = record
+        try:
+            suites = [[{'operation': 'SetVars', 'parameters': {'bucketSuffix': 'b-@{next(bucketOrdinal)}'}},
+                       {'operation': 'Record', 'parameters': {'name': 'n-${bucketSuffix}'}, 'suiteLocals': {'echo': '${Echo}'}},
+                       {'operation': 'Record', 'parameters': {'name': '${echo}'}}]]
+            serviceModel = ServiceTestModel('s3', None, {}, {}, [], [], True, suites)
+            serviceModel.setUp()
+            serviceModel.run()
+            serviceModel.tearDown()
+        finally:
+            del predefinedFuncDict['Record']
+        bucketSuffix = calls[0][1]
+        self.assertEqual(calls, [(f'n-{bucketSuffix}', bucketSuffix), (f'n-{bucketSuffix}', bucketSuffix)])
+        # suite 内设置的变量只写入 suite 层
+        self.assertNotIn('bucketSuffix', GLOBAL_VARIABLES)
+        self.assertNotIn('echo', GLOBAL_VARIABLES)
+
+    def testResolvePlaceholderDictKeepsTemplate(self):
+        template = compilePlaceholders({'Bucket': '${Bucket}', 'Body': '@{bytearray(${size})}', 'Tags': [{'Key': 'k-${i}'}], 'n': 1})
+        expect = copy.deepcopy(template)
+
+        def resolve(i):
+            return resolvePlaceholderDict(template, {'Bucket': f'b{i}', 'size': i, 'i': i})
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(resolve, range(64)))
+        for i, resolved in enumerate(results):
+            self.assertEqual(resolved, {'Bucket': f'b{i}', 'Body': bytearray(i), 'Tags': [{'Key': f'k-{i}'}], 'n': 1})
+        self.assertEqual(template, expect)
+        self.assertIsInstance(template['Body'], PlaceHolderTemplate)
+
+    def testConnectionPoolFollowsConcurrency(self):
+        identities = {'admin': {'aws_access_key_id': 'ak', 'aws_secret_access_key': 'sk'}, 'anonymous': {}}
+        clientConfig = {'region_name': 'us-east-1', 'endpoint_url': 'http://127.0.0.1:1'}
+        serviceModel = ServiceTestModel('s3', None, identities, clientConfig, [], [], True, None, concurrency=64,
+                                        connectionPool={'tcp_keepalive': True})
+        serviceModel.setUp()
+        try:
+            for serviceClient in serviceModel.clientDict.values():
+                self.assertEqual(serviceClient.meta.config.max_pool_connections, 64)
+                self.assertTrue(serviceClient.meta.config.tcp_keepalive)
+            # 连接池已满时丢弃的连接按 client 计数，不会计入其它 client 和 service
+            # noinspection PyProtectedMember
+            pool = serviceModel.clientDict['admin']._endpoint.http_session._manager.connection_from_url(clientConfig['endpoint_url'])
+            pool._put_conn(pool._new_conn())
+            self.assertEqual(serviceModel.clientDict['anonymous'].connectionsDiscarded, 0)
+        finally:
+            serviceModel.tearDown()
+        self.assertEqual(serviceModel.connectionStats['requests'], 0)
+        self.assertEqual(serviceModel.connectionStats['connectionsDiscarded'], 1)
+
+    def testDropObjectsBatches(self):
+        from botocore.exceptions import ClientError
+        from core.predefind import DropObjects
+        keys = [f'k{i}' for i in range(2500)]
+        pages = {
+            'list_objects_v2': [{'Contents': [{'Key': k} for k in keys[i:i + 1000]]} for i in range(0, len(keys), 1000)],
+            'list_multipart_uploads': [{'Uploads': [{'Key': 'mpu', 'UploadId': 'u1'}]}],
+        }
+
+        def paginate(name):
+            def pages_(**kwargs):
+                if name == 'list_object_versions':
+                    # 当前版本全部删除后才列举版本，删除产生的删除标记和 'null' 版本都需要删除
+                    self.assertEqual(len(deleted), len(keys))
+                    yield {'Versions': [{'Key': 'k0', 'VersionId': 'null'}, {'Key': 'k1', 'VersionId': 'v1'}],
+                           'DeleteMarkers': [{'Key': 'k2', 'VersionId': 'm1'}]}
+                    return
+                if name not in pages:
+                    raise ClientError({'Error': {'Code': 'NotImplemented'}}, name)
+                yield from pages[name]
+            return mock.Mock(paginate=pages_)
+
+        deleted, versions, lock = [], [], threading.Lock()
+
+        def deleteObjects(Bucket, Delete):
+            with lock:
+                deleted.extend(obj['Key'] for obj in Delete['Objects'] if 'VersionId' not in obj)
+                versions.extend((obj['Key'], obj['VersionId']) for obj in Delete['Objects'] if 'VersionId' in obj)
+            self.assertLessEqual(len(Delete['Objects']), 1000)
+            return {'ResponseMetadata': {'HTTPStatusCode': 200}}
+
+        client = mock.Mock(get_paginator=paginate, delete_objects=deleteObjects)
+        client.abort_multipart_upload.return_value = {'ResponseMetadata': {'HTTPStatusCode': 204}}
+        serviceModel = ServiceTestModel('s3', None, {}, {}, [], [], True, None, teardownConcurrency=4)
+        try:
+            DropObjects(serviceModel, None, {'Client': client, 'Bucket': 'b'})
+        finally:
+            serviceModel.teardownPool.shutdown()
+        self.assertEqual(sorted(deleted), sorted(keys))
+        self.assertEqual(sorted(versions), [('k0', 'null'), ('k1', 'v1'), ('k2', 'm1')])
+        client.abort_multipart_upload.assert_called_once_with(Bucket='b', Key='mpu', UploadId='u1')
+        stats = serviceModel.teardownStats.summary()
+        self.assertEqual((stats['objects'], stats['uploads'], stats['errors']), (2503, 1, 0))
+
+    def testTeardownSpans(self):
+        from core.predefind import DropObjects, TeardownStats
+        client = mock.Mock()
+        client.get_paginator.return_value.paginate.return_value = [{}]
+        serviceModel = ServiceTestModel('s3', None, {}, {}, [], [], True, None, teardownConcurrency=2)
+        # 两次 auto clean 之间的 suite 执行时间不计入清理耗时
+        DropObjects(serviceModel, None, {'Client': client, 'Bucket': 'a'})
+        time.sleep(0.5)
+        DropObjects(serviceModel, None, {'Client': client, 'Bucket': 'b'})
+        self.assertLess(serviceModel.teardownStats.summary()['seconds'], 0.25)
+
+        # 并行的清理只计算一次，合并其它进程的统计时同样按并集计算
+        stats, other = TeardownStats(), TeardownStats()
+        stats.record(objects=10, started=0.0, finished=2.0)
+        stats.record(objects=10, started=1.0, finished=3.0)
+        other.record(objects=20, started=10.0, finished=11.0)
+        stats.merge(other)
+        self.assertEqual(stats.summary()['seconds'], 4.0)
+        self.assertEqual(stats.summary()['objectsPerSecond'], 10.0)
+
+    def testBucketPoolReuse(self):
+        from botocore.client import BaseClient
+        from core.models import newSuiteLocals
+        client = mock.Mock(identityConfig={'identity_name': 'admin'})
+        client.get_paginator.return_value.paginate.return_value = [{'ResponseMetadata': {'HTTPStatusCode': 200}}]
+        client.get_bucket_ownership_controls.return_value = {'OwnershipControls': {'Rules': [{'ObjectOwnership': 'ObjectWriter'}]}}
+        client.get_bucket_acl.return_value = {'Owner': {'ID': 'admin'}, 'Grants': []}
+        client.delete_bucket.return_value = {'ResponseMetadata': {'HTTPStatusCode': 204}}
+        serviceModel = ServiceTestModel('s3', None, {}, {}, [], [], True, None, bucketPool={'enabled': True})
+        bucketPool = serviceModel.bucketPool
+        with mock.patch.object(BaseClient, '_make_api_call', return_value={'Location': '/b1'}) as createBucket:
+            suiteLocals = newSuiteLocals()
+            suiteLocals['Bucket'] = 'b1'
+            bucketPool.createBucket(client, suiteLocals, {'Bucket': 'b1', 'ObjectOwnership': 'ObjectWriter'})
+            self.assertTrue(bucketPool.release('b1', 'suite-1'))
+            client.put_bucket_ownership_controls.assert_called_once()
+
+            # 相同配置的 suite 复用 b1，不再调用 CreateBucket
+            suiteLocals = newSuiteLocals()
+            suiteLocals['Bucket'] = 'b2'
+            parameters = {'Bucket': 'b2', 'ObjectOwnership': 'ObjectWriter'}
+            self.assertEqual(bucketPool.createBucket(client, suiteLocals, parameters), {'Location': '/b1'})
+            self.assertEqual((suiteLocals['Bucket'], parameters['Bucket']), ('b1', 'b1'))
+            createBucket.assert_called_once()
+
+            # 修改了无法复位的配置，不再放回池中
+            bucketPool.touch('PutBucketVersioning', 'b1')
+            bucketPool.release('b1', 'suite-2')
+        client.delete_bucket.assert_called_once_with(Bucket='b1')
+        stats = bucketPool.summary()
+        self.assertEqual((stats['hits'], stats['misses'], stats['resets'], stats['drops']), (1, 1, 1, 1))
+        serviceModel.tearDown()
+
+    def testAioHttpTransport(self):
+        import asyncio
+        import http.server
+        from botocore.exceptions import ClientError
+        from core.async_engine import AioHttpTransport
+        from core.predefind import newAwsClient
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith('/missing'):
+                    status, body = 404, b'<Error><Code>NoSuchBucket</Code><Message>missing</Message></Error>'
+                else:
+                    status, body = 200, b'<ListAllMyBucketsResult><Buckets><Bucket><Name>b1</Name></Bucket></Buckets></ListAllMyBucketsResult>'
+                self.send_response(status)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        client = newAwsClient('s3', {'region_name': 'us-east-1', 'endpoint_url': f'http://127.0.0.1:{server.server_port}',
+                                     'aws_access_key_id': 'ak', 'aws_secret_access_key': 'sk'})
+
+        async def run():
+            transport = AioHttpTransport(4)
+            await transport.open(client.meta.config)
+            try:
+                response = await transport.makeApiCall(client, 'ListBuckets', {})
+                with self.assertRaises(ClientError) as cm:
+                    await transport.makeApiCall(client, 'ListObjectsV2', {'Bucket': 'missing'})
+                return response, cm.exception.response
+            finally:
+                await transport.close()
+
+        try:
+            response, errorResponse = asyncio.run(run())
+        finally:
+            server.shutdown()
+        self.assertEqual(response['Buckets'][0]['Name'], 'b1')
+        self.assertEqual(errorResponse['Error']['Code'], 'NoSuchBucket')
+        self.assertEqual(errorResponse['ResponseMetadata']['HTTPStatusCode'], 404)
+
+        # 没有 identity 时 asyncio 引擎同样可以执行预置函数
+        suites = [[{'title': 'Suite-%d' % i, 'operation': 'SetVars', 'parameters': {'Index': str(i)}}] for i in range(2)]
+        serviceModel = ServiceTestModel('s3', None, {}, {}, [], [], True, suites, executionEngine=const.EXECUTION_ENGINE_ASYNC)
+        serviceModel.setUp()
+        serviceModel.run()
+        serviceModel.tearDown()
+        self.assertEqual(len(serviceModel.suite_pass), 2)
+
+    def testShardSuites(self):
+        import pickle
+        suites = [[{'title': 'Case-%d' % i, 'operation': 'SetVars'}] for i in range(7)]
+        merged = ServiceTestModel('s3', None, {}, {}, [], [], True, None)
+        for workerIndex in range(3):
+            serviceModel = ServiceTestModel('s3', None, {}, {}, [], [], True, None)
+            serviceModel.shard = (workerIndex, 3)
+            for suite in serviceModel.filterSuiteModel('m', SuiteModel(compileSuites(copy.deepcopy(suites)))):
+                serviceModel.suite_pass.append(suite)
+            merged.mergeShardResult(pickle.loads(pickle.dumps(serviceModel.shardResult())))
+        suiteIds = sorted(suite[0][const.SUITE_ID] for suite in merged.suite_pass)
+        self.assertEqual(suiteIds, sorted('__s3__@m@__%d__' % i for i in range(1, 8)))
+
+    def testDistributedRun(self):
+        from core.distributed import Coordinator, Worker
+        suites = [[{'title': 'Suite-%d' % i, 'operation': 'SetVars', 'parameters': {'Index': str(i)}}] for i in range(20)]
+        suites.append([{'title': 'Undefined', 'operation': 'Undefined'}])
+        serviceModel = ServiceTestModel('s3', None, {}, {}, [], [], True, suites, concurrency=2)
+        coordinator = Coordinator({'s3': serviceModel}, host='127.0.0.1', port=0)
+        config = {'identities': {}, 'client_config': {}, 'concurrency': 2}
+        workers = [threading.Thread(target=Worker(config, coordinator.address, f'worker-{i}').run) for i in range(3)]
+        for worker in workers:
+            worker.start()
+        coordinator.run(timeout=60)
+        for worker in workers:
+            worker.join()
+        self.assertEqual(len(serviceModel.suite_pass), 20)
+        self.assertEqual(len(serviceModel.suite_failed), 1)
+        self.assertEqual(sorted(suite[0]['parameters']['Index'] for suite in serviceModel.suite_pass), sorted(str(i) for i in range(20)))
+        self.assertEqual(len(coordinator.workers), 3)
+
+    def testDistributedSteal(self):
+        from core.distributed import Coordinator, Worker
+        suites = [[{'title': 'Suite-%d' % i, 'operation': 'SetVars', 'parameters': {'Index': str(i)}}] for i in range(6)]
+        serviceModel = ServiceTestModel('s3', None, {}, {}, [], [], True, suites, concurrency=2)
+        coordinator = Coordinator({'s3': serviceModel}, host='127.0.0.1', port=0)
+        try:
+            coordinator.load()
+            taskIds = list(coordinator.pending)
+            leased = coordinator.lease({'worker': 'a', 'capacity': 1})['suites']
+            # 超时收回后重新入队的 suite 已经有结果时不再分配
+            coordinator.pending.appendleft(leased[0]['taskId'])
+            coordinator.results({'worker': 'a', 'results': [{'taskId': leased[0]['taskId'], 'service': 's3', 'status': 'pass', 'suite': []}]})
+            self.assertNotIn(leased[0]['taskId'], [item['taskId'] for item in coordinator.lease({'worker': 'a', 'capacity': 1})['suites']])
+
+            # 被收回的 suite 即使已经提交到线程池，也不会在原 worker 上执行
+            coordinator.pending.clear()
+            coordinator.leases['a'] = dict.fromkeys(taskIds[2:])
+            stolen = [item['taskId'] for item in coordinator.lease({'worker': 'b', 'capacity': 4})['suites']]
+            self.assertEqual(stolen, taskIds[-2:])
+            worker = Worker({}, coordinator.address, 'a')
+            worker.post = lambda path, payload: coordinator.results(payload)
+            worker.stopped.set()
+            worker.reportLoop()
+            model = mock.Mock()
+            for taskId in taskIds[2:]:
+                worker.runSuite(model, taskId, 's3', [])
+            self.assertEqual([c.args[0] for c in model.doRun.call_args_list], taskIds[2:4])
+        finally:
+            coordinator.server.server_close()
+            serviceModel.tearDown()
+
+        # 没有 worker 连接时 coordinator 不会一直等待
+        serviceModel = ServiceTestModel('s3', None, {}, {}, [], [], True, suites, concurrency=2)
+        with mock.patch('core.distributed.WORKER_TIMEOUT', 0.5):
+            with self.assertRaises(TimeoutError):
+                Coordinator({'s3': serviceModel}, host='127.0.0.1', port=0).run()
+
+    def testBenchmark(self):
+        from core.benchmark import Benchmark, LatencyHistogram
+        histogram = LatencyHistogram()
+        for micros in range(1, 100001):
+            histogram.record(micros)
+        for percentile in (50, 90, 99, 99.9):
+            expected = percentile / 100 * 100000
+            self.assertLessEqual(abs(histogram.percentile(percentile) - expected) / expected, 0.01)
+        self.assertEqual(histogram.percentile(100), 100000)
+
+        suites = [[{'title': 'Suite-%d' % i, 'operation': 'SetVars', 'parameters': {'Index': str(i)}}] for i in range(5)]
+        suites.append([{'title': 'Undefined', 'operation': 'Undefined'}])
+        serviceModel = ServiceTestModel('s3', None, {}, {}, [], [], True, suites, concurrency=2,
+                                        benchmark={'enabled': True, 'duration': 0, 'iterations': 3})
+        serviceModel.setUp()
+        serviceModel.run()
+        serviceModel.tearDown()
+        # 只保留第一轮的执行结果
+        self.assertEqual(len(serviceModel.suite_pass), 5)
+        self.assertEqual(len(serviceModel.suite_failed), 1)
+        stats = serviceModel.benchmark.stats.summary()
+        self.assertEqual((stats['iterations'], stats['suites'], stats['suitesFailed']), (3, 18, 3))
+
+        # 第一轮边过滤边执行，之后每轮重新展开，不预先展开并保留全部 suite
+        import collections
+        expanded = []
+
+        def expandSuites():
+            for i in range(3):
+                expanded.append(i)
+                yield '__s3__@m@__%d__' % (i + 1), [collections.ChainMap({}, {'title': 'Suite-%d' % i})]
+
+        def filteredSuites():
+            for suiteId, suite in expandSuites():
+                if suiteId != '__s3__@m@__2__':
+                    suite[0][const.SUITE_ID] = suiteId
+                    yield suite
+
+        suites = Benchmark(duration=0, iterations=2).iterSuites({'m': filteredSuites()}, expandSuites)
+        next(suites)
+        self.assertEqual(expanded, [0])
+        rest = list(suites)
+        self.assertEqual([suite[0][const.SUITE_ID] for suite in rest], ['__s3__@m@__3__', '__s3__@m@__1__', '__s3__@m@__3__'])
+        self.assertEqual([suite[0].get(const.BENCHMARK_ITERATION) for suite in rest], [None, 1, 1])
+
+        benchmark = Benchmark(rate=100)
+        benchmark.nextSend = time.perf_counter()
+        call = mock.Mock(operationName='GetObject')
+        start = time.perf_counter()
+        for status in (200, 404, 500):
+            benchmark.call(lambda c: {'ResponseMetadata': {'HTTPStatusCode': status}}, call)
+        self.assertGreaterEqual(time.perf_counter() - start, 0.015)
+        benchmark.finish()
+        stats = benchmark.stats.summary()['operations']['GetObject']
+        self.assertEqual((stats['requests'], stats['errors'], stats['clientErrors']), (3, 1, 1))
+
+    def testCaseTiming(self):
+        import http.server
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                time.sleep(0.05)
+                body = b'<ListAllMyBucketsResult><Buckets><Bucket><Name>b1</Name></Bucket></Buckets></ListAllMyBucketsResult>'
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        suites = [[{'title': 'Init', 'operation': 'SetVars', 'parameters': {'Expected': 'b1'}},
+                   {'title': 'ListBuckets', 'operation': 'ListBuckets', 'clientName': 'admin', 'assertion': {'Buckets': [{'Name': '${Expected}'}]}}]]
+        serviceModel = ServiceTestModel('s3', None, {'admin': {'aws_access_key_id': 'ak', 'aws_secret_access_key': 'sk'}},
+                                        {'region_name': 'us-east-1', 'endpoint_url': f'http://127.0.0.1:{server.server_port}'}, [], [], True, suites)
+        try:
+            serviceModel.setUp()
+            serviceModel.run()
+            serviceModel.tearDown()
+        finally:
+            server.shutdown()
+        self.assertEqual(len(serviceModel.suite_pass), 1)
+        timing = serviceModel.suite_pass[0][1][const.CASE_TIMING]
+        self.assertGreaterEqual(timing['network'], 50)
+        self.assertTrue(all(phase in timing for phase in ('build', 'parse', 'assertion')))
+        stats = serviceModel.timingStats.summary()
+        self.assertEqual(stats['operations']['ListBuckets']['count'], 1)
+        self.assertEqual(stats['identities']['admin']['count'], 1)
+        self.assertEqual(stats['slowestOperations'][0]['operation'], 'ListBuckets')
+        self.assertEqual(len(stats['slowestSuites']), 1)
+        # 计时使用 client 上的事件，不启用 botocore 进程级的 history recorder
+        import botocore.history
+        # noinspection PyProtectedMember
+        self.assertFalse(botocore.history.get_global_history_recorder()._enabled)
+
+    def testMetrics(self):
+        import urllib.request
+        from core.metrics import Metrics
+        suites = [[{'title': 'Suite-%d' % i, 'operation': 'SetVars', 'parameters': {'Index': str(i)}}] for i in range(3)]
+        suites.append([{'title': 'Undefined', 'operation': 'Undefined'}])
+        serviceModel = ServiceTestModel('s3', None, {}, {}, [], [], True, suites, concurrency=2)
+        with tempfile.TemporaryDirectory() as tmpDir:
+            textfile = os.path.join(tmpDir, 'metrics', 'aws_tests.prom')
+            metrics = Metrics(listen='127.0.0.1:0', textfile=textfile, interval=0.05)
+            metrics.start({'s3': serviceModel})
+            try:
+                serviceModel.setUp()
+                serviceModel.run()
+                serviceModel.tearDown()
+                metrics.observe('request_duration_seconds', (('service', 's3'), ('operation', 'GetObject')), 0.02)
+                with urllib.request.urlopen('http://127.0.0.1:%d/metrics' % metrics.server.server_port) as response:
+                    body = response.read().decode('utf-8')
+            finally:
+                metrics.stop()
+            with open(textfile) as f:
+                self.assertEqual(f.read(), body)
+        self.assertIn('aws_tests_cases_started_total{service="s3",operation="SetVars"} 3', body)
+        self.assertIn('aws_tests_cases_passed_total{service="s3",operation="SetVars"} 3', body)
+        self.assertIn('aws_tests_cases_failed_total{service="s3",operation="Undefined"} 1', body)
+        self.assertIn('aws_tests_suites_passed{service="s3"} 3', body)
+        self.assertIn('aws_tests_threadpool_queue_depth{service="s3"} 0', body)
+        self.assertIn('aws_tests_request_duration_seconds_bucket{service="s3",operation="GetObject",le="0.01"} 0', body)
+        self.assertIn('aws_tests_request_duration_seconds_bucket{service="s3",operation="GetObject",le="0.025"} 1', body)
+        self.assertIn('# TYPE aws_tests_request_duration_seconds histogram', body)
+
+    def testAdaptiveLimiter(self):
+        from core.concurrency import AdaptiveLimiter, MIN_WINDOW_SAMPLES, isThrottled
+        self.assertTrue(isThrottled({'Error': {'Code': 'SlowDown'}, 'ResponseMetadata': {'HTTPStatusCode': 503}}))
+        self.assertFalse(isThrottled({'Error': {'Code': 'NoSuchKey'}, 'ResponseMetadata': {'HTTPStatusCode': 404}}))
+
+        limiter = AdaptiveLimiter(32, initial=2, window=10)
+        clock = itertools.count(time.perf_counter() + 10, 10)
+
+        def window(latency, saturated=True):
+            acquired = limiter.limit if saturated else 0
+            for _ in range(acquired):
+                limiter.acquire()
+            for _ in range(MIN_WINDOW_SAMPLES):
+                limiter.observe(latency, False)
+            for _ in range(acquired):
+                limiter.release()
+            with limiter.condition:
+                limiter.adjust(next(clock))
+
+        # slow start：每个窗口翻倍
+        window(0.01)
+        self.assertEqual(limiter.limit, 4)
+        window(0.01)
+        self.assertEqual(limiter.limit, 8)
+        limiter.observe(0.01, True)
+        self.assertEqual(limiter.limit, 4)
+        # 出现限流的窗口不增加，之后每个窗口加 1
+        window(0.01)
+        self.assertEqual(limiter.limit, 4)
+        window(0.01)
+        self.assertEqual(limiter.limit, 5)
+        # p99 超过基线两倍时回退
+        window(0.1)
+        self.assertEqual(limiter.limit, 2)
+        # 并发没有达到上限时不增加
+        window(0.01, saturated=False)
+        self.assertEqual(limiter.limit, 2)
+        summary = limiter.summary()
+        self.assertEqual((summary['minLimit'], summary['maxLimit'], summary['decreases'], summary['throttled']), (2, 8, 2, 1))
+        self.assertEqual([point['limit'] for point in summary['history']], [2, 4, 8, 4, 5, 2])
+
+    def testRateLimiter(self):
+        from core.rate_limit import RateLimiter
+        rateLimiter = RateLimiter({'global': 1000, 'identities': {'anonymous': {'rate': 50, 'burst': 1}}, 'operations': {'PutObject': 100}})
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(lambda _: rateLimiter.wait('anonymous', 'GetObject'), range(11)))
+        # 第一个请求使用 burst，之后每 20ms 一个
+        self.assertGreaterEqual(time.time() - start, 0.18)
+        self.assertEqual(rateLimiter.reserve('admin', 'GetObject'), 0)
+        summary = rateLimiter.summary()
+        self.assertEqual(summary['waits'], 10)
+        self.assertEqual(summary['limiters']['identity:anonymous']['requests'], 11)
+        self.assertEqual(summary['limiters']['global']['requests'], 12)
+        self.assertEqual(summary['limiters']['operation:PutObject']['requests'], 0)
+        self.assertGreater(summary['waitSeconds'], 0.5)
+
+        # client 上的所有请求（预置函数、bucket 池等）都经过限流
+        import botocore.session
+        from botocore.awsrequest import AWSResponse
+        from core.async_engine import BufferedRaw
+        from core.rate_limit import DEFERRED_WAIT
+        rateLimiter = RateLimiter({'operations': {'ListBuckets': {'rate': 50, 'burst': 1}}})
+        client = botocore.session.get_session().create_client('s3', region_name='us-east-1', aws_access_key_id='ak', aws_secret_access_key='sk')
+        client.identityConfig = {'identity_name': 'admin'}
+        rateLimiter.registerHandler(client)
+        client.meta.events.register('before-send.s3.ListBuckets',
+                                    lambda request, **kwargs: AWSResponse(request.url, 200, {}, BufferedRaw(b'<ListAllMyBucketsResult/>')))
+        start = time.time()
+        for _ in range(3):
+            client.list_buckets()
+        self.assertGreaterEqual(time.time() - start, 0.035)
+        # asyncio 引擎只预占令牌，由协程等待
+        token = DEFERRED_WAIT.set(0.0)
+        try:
+            start = time.time()
+            client.list_buckets()
+            self.assertLess(time.time() - start, 0.015)
+            self.assertGreater(DEFERRED_WAIT.get(), 0)
+        finally:
+            DEFERRED_WAIT.reset(token)
+        self.assertEqual(rateLimiter.summary()['limiters']['operation:ListBuckets']['requests'], 4)
+
+        # 分布式执行时速率限制随活跃的 worker 数平分
+        from core.distributed import Worker
+        worker = Worker({}, 'localhost:8700', 'w')
+        worker.serviceModels['s3'] = mock.Mock(rateLimiter=RateLimiter({'global': 100}))
+        worker.scaleRateLimits(4)
+        self.assertEqual(worker.serviceModels['s3'].rateLimiter.buckets['global'].rate, 25)
+        worker.scaleRateLimits(2)
+        self.assertEqual(worker.serviceModels['s3'].rateLimiter.buckets['global'].rate, 50)
+
+    def testResultsStore(self):
+        from core.results_store import RERUN_FAILED, RERUN_SINCE_LAST, ResultsStore, saveResults
+        storePath = os.path.join(tempfile.mkdtemp(), 'results', 'results.json')
+
+        def runSuites(suites, rerun=None):
+            serviceModel = ServiceTestModel('s3', None, {}, {}, [], [], True, copy.deepcopy(suites), concurrency=2, resultsStore=ResultsStore(storePath), rerun=rerun)
+            serviceModel.setUp()
+            serviceModel.run()
+            serviceModel.tearDown()
+            saveResults({'s3': serviceModel})
+            return sorted(suite[0]['title'] for suite in serviceModel.suite_pass + serviceModel.suite_failed)
+
+        suites = [[{'title': 'Suite-%d' % i, 'operation': 'SetVars'}] for i in range(3)] + [[{'title': 'Undefined', 'operation': 'Undefined'}]]
+        self.assertEqual(len(runSuites(suites)), 4)
+        records = ResultsStore(storePath).services['s3']
+        self.assertEqual(sorted(record['status'] for record in records.values()), ['failed', 'pass', 'pass', 'pass'])
+        self.assertTrue(next(record['error'] for record in records.values() if record['status'] == 'failed'))
+        # 新增的 suite 改变了位置序号，不影响已有 suite 的标识
+        suites.insert(0, [{'title': 'Suite-New', 'operation': 'SetVars'}])
+        self.assertEqual(runSuites(suites, RERUN_FAILED), ['Undefined'])
+        self.assertEqual(runSuites(suites, RERUN_SINCE_LAST), ['Suite-New', 'Undefined'])
+        self.assertEqual(runSuites(suites, RERUN_SINCE_LAST), ['Undefined'])
+        self.assertEqual(len(ResultsStore(storePath).services['s3']), 5)
+
+    def testIncrementalRun(self):
+        from core.results_store import RERUN_CHANGED, ResultsStore, saveResults
+        storePath = os.path.join(tempfile.mkdtemp(), 'results.json')
+
+        def runSuites(suites, endpoint='http://127.0.0.1:8333'):
+            serviceModel = ServiceTestModel('s3', None, {}, {'endpoint_url': endpoint}, [], [], True, copy.deepcopy(suites), concurrency=2,
+                                            resultsStore=ResultsStore(storePath), rerun=RERUN_CHANGED)
+            serviceModel.setUp()
+            serviceModel.run()
+            serviceModel.tearDown()
+            saveResults({'s3': serviceModel})
+            return sorted(suite[0]['title'] for suite in serviceModel.suite_pass + serviceModel.suite_failed), sorted(suite[0]['title'] for suite in serviceModel.suite_cached)
+
+        suites = [[{'title': 'Suite-%d' % i, 'operation': 'SetVars', 'parameters': {'Index': str(i)}}] for i in range(3)] + [[{'title': 'Undefined', 'operation': 'Undefined'}]]
+        self.assertEqual(runSuites(suites), (['Suite-0', 'Suite-1', 'Suite-2', 'Undefined'], []))
+        self.assertEqual(runSuites(suites), (['Undefined'], ['Suite-0', 'Suite-1', 'Suite-2']))
+        # 参数变化的 suite 重新执行，endpoint 变化时全部重新执行
+        suites[1][0]['parameters']['Index'] = 'changed'
+        self.assertEqual(runSuites(suites), (['Suite-1', 'Undefined'], ['Suite-0', 'Suite-2']))
+        self.assertEqual(runSuites(suites, 'http://127.0.0.1:8334'), (['Suite-0', 'Suite-1', 'Suite-2', 'Undefined'], []))
+
+    def testResultSink(self):
+        from core.result_sink import ResultSink, iterSuiteRecords, loadResults
+        sinkPath = os.path.join(tempfile.mkdtemp(), 'results.jsonl')
+        suites = [[{'title': 'Fork', 'suites': [[{'title': 'Suite-%d' % i, 'operation': 'SetVars', 'parameters': {'Index': str(i)}},
+                                                  {'title': 'Next', 'operation': 'SetVars'}] for i in range(3)]}],
+                  [{'title': 'Undefined', 'operation': 'Undefined'}, {'title': 'Unreached', 'operation': 'SetVars'}]]
+        treeSuites = copy.deepcopy(suites)
+        serviceModel = ServiceTestModel('s3', None, {}, {}, [re.compile('.*Suite-[01].*'), re.compile('.*Undefined.*')], [], True, suites, concurrency=2)
+        resultSink = ResultSink(sinkPath, fsyncBatch=2, dropResponses=True)
+        resultSink.start({'s3': serviceModel})
+        serviceModel.setUp()
+        serviceModel.run()
+        serviceModel.tearDown()
+        resultSink.close()
+        self.assertEqual((len(serviceModel.suite_pass), len(serviceModel.suite_failed), len(serviceModel.suite_skipped)), (2, 1, 1))
+        self.assertTrue(all(const.CASE_RESPONSE not in case for suite in serviceModel.suite_pass for case in suite))
+        records = list(iterSuiteRecords(sinkPath))
+        self.assertEqual(sorted(status for _, status, _ in records), ['failed', 'pass', 'pass', 'skipped'])
+        for _, status, cases in records:
+            if status == 'failed':
+                self.assertEqual([case['title'] for case in cases], ['Undefined', 'Unreached'])
+                self.assertFalse(cases[0][const.CASE_SUCCESS])
+                self.assertNotIn(const.CASE_SUCCESS, cases[1])
+            elif status == 'pass':
+                self.assertEqual([case['title'] for case in cases][1:], [cases[1]['title'], 'Next'])
+                self.assertIn(const.CASE_RESPONSE, cases[1])
+        loadResults(sinkPath, {'s3': serviceModel})
+        self.assertEqual(sorted(suite[0][const.SUITE_ID] for suite in serviceModel.suite_pass), ['__s3__@xmind_indices@__1__', '__s3__@xmind_indices@__2__'])
+
+        # tree 模式：共享前缀只执行一次，case 记录按所属路径写出，suite 记录引用共享节点
+        treePath = os.path.join(os.path.dirname(sinkPath), 'tree.jsonl')
+        serviceModel = ServiceTestModel('s3', None, {}, {}, [re.compile('.*')], [], True, treeSuites, concurrency=2,
+                                        executionMode=const.EXECUTION_MODE_TREE)
+        resultSink = ResultSink(treePath, dropResponses=True)
+        resultSink.start({'s3': serviceModel})
+        serviceModel.setUp()
+        serviceModel.run()
+        serviceModel.tearDown()
+        resultSink.close()
+        expect = {suite[0][const.SUITE_ID]: [case.get('title') for case in suite] for suite in serviceModel.suite_pass + serviceModel.suite_failed}
+        self.assertEqual((len(serviceModel.suite_pass), len(serviceModel.suite_failed)), (3, 1))
+        with open(treePath) as fp:
+            caseRecords = [record for line in fp if (record := json.loads(line))['type'] == 'case']
+        self.assertEqual(len(caseRecords), 8)
+        self.assertTrue(all(const.CASE_RESPONSE not in case for suite in serviceModel.suite_pass for case in suite))
+        loadResults(treePath, {'s3': serviceModel})
+        self.assertEqual({suite[0][const.SUITE_ID]: [case.get('title') for case in suite] for suite in serviceModel.suite_pass + serviceModel.suite_failed}, expect)
+        for suite in serviceModel.suite_pass:
+            self.assertTrue(all(case[const.CASE_SUCCESS] for case in suite[1:]))
+            self.assertIn(const.CASE_RESPONSE, suite[1])
+        self.assertFalse(serviceModel.suite_failed[0][0][const.CASE_SUCCESS])
+
+    def testResponseRetention(self):
+        import io
+        from botocore.response import StreamingBody
+        from core.retention import releaseStreams, retainResponse
+        body = StreamingBody(io.BytesIO(b'content'), 7)
+        response = {'ResponseMetadata': {'HTTPStatusCode': 200, 'RequestId': 'id', 'HTTPHeaders': {'x': 'y'}}, 'Body': body,
+                    'Contents': [{'Key': 'k%d' % i} for i in range(20)], 'ETag': 'e' * 1000}
+        summary = retainResponse(const.RESPONSE_RETENTION_SUMMARY, response, True)
+        self.assertEqual(summary['ResponseMetadata'], {'HTTPStatusCode': 200, 'RequestId': 'id'})
+        self.assertEqual(summary['Body'], 'skipped@StreamingBody')
+        self.assertEqual(len(summary['Contents']), 11)
+        self.assertLess(len(summary['ETag']), 300)
+        self.assertIsNone(retainResponse(const.RESPONSE_RETENTION_FAILURES, response, True))
+        self.assertIs(retainResponse(const.RESPONSE_RETENTION_FAILURES, response, False), response)
+        self.assertIsNone(retainResponse(const.RESPONSE_RETENTION_NONE, response, False))
+        releaseStreams(response)
+        self.assertEqual(response['Body'], 'skipped@StreamingBody')
+        self.assertTrue(body._raw_stream.closed)
+
+        suites = [[{'title': 'Suite-%d' % i, 'operation': 'SetVars', 'parameters': {'Index': str(i)}}] for i in range(3)]
+        suites.append([{'title': 'Failed', 'operation': 'SetVars', 'parameters': {'Index': 'x'}, 'assertion': {'Index': 'y'}}])
+        serviceModel = ServiceTestModel('s3', None, {}, {}, [], [], True, suites, concurrency=2, responseRetention=const.RESPONSE_RETENTION_FAILURES)
+        serviceModel.setUp()
+        serviceModel.run()
+        serviceModel.tearDown()
+        self.assertEqual(len(serviceModel.suite_pass), 3)
+        self.assertTrue(all(const.CASE_RESPONSE not in suite[0] for suite in serviceModel.suite_pass))
+        self.assertEqual(serviceModel.suite_failed[0][0][const.CASE_RESPONSE], {'Index': 'x'})
+
+    def testXmindExporterStream(self):
+        from core.exporters import CaseNote, XmindExporter, renderJsonValue
+        from core.models import reportResult
+        suites = [[{'title': 'Suite-%d' % i, 'operation': 'SetVars', 'parameters': {'Index': str(i)}}] for i in range(3)]
+        suites.append([{'title': 'Failed', 'operation': 'SetVars', 'parameters': {'Index': 'x'}, 'assertion': {'Index': 'y'}},
+                       {'title': 'Skipped', 'operation': 'SetVars', 'parameters': {'Index': 'z'}}])
+        serviceModel = ServiceTestModel('s3', None, {}, {}, [], [], True, suites, concurrency=2)
+        serviceModel.setUp()
+        serviceModel.run()
+        serviceModel.tearDown()
+        serviceModels = {'s3': serviceModel}
+        with tempfile.TemporaryDirectory() as tmpDir:
+            exporter = XmindExporter({'file_path': os.path.join(tmpDir, 'report.xmind'), const.INCLUDE_FIELDS: ['parameters', 'errorInfo']},
+                                     reportResult(serviceModels))
+            exporter.generateReport(serviceModels)
+            with zipfile.ZipFile(exporter.filePath) as zf:
+                content = zf.read('content.json').decode('utf-8')
+        # 流式写入的内容与整体序列化一致，备注在编码时生成
+        expect = exporter.buildXmindData(serviceModels)
+        self.assertEqual(content, json.dumps(expect, default=renderJsonValue))
+        notes = []
+        # 根 topic 的汇总备注为字符串，case topic 的备注为 CaseNote
+        stack = [topic for sheet in expect for topic in sheet['rootTopic']['children']['attached']]
+        while stack:
+            topic = stack.pop()
+            stack.extend(topic.get('children', {}).get('attached', []))
+            if topic.get('notes'):
+                notes.append(topic['notes']['plain']['content'])
+        self.assertTrue(notes and all(isinstance(note, CaseNote) for note in notes))
+        self.assertTrue(any('### Errorinfo ###' in (note.render() or '') for note in notes))
+
+    def testXmindExportBenchmark(self):
+        import glob
+        from core.exporters import XmindExporter
+        from core.models import reportResult
+        # 相同 (title, client, 状态码) 的 case 合并，同一层按 __order__ 排列
+        suites = [[{'title': 'b', const.ORDER: 1, 'operation': 'SetVars', const.CASE_SUCCESS: True}],
+                  [{'title': 'a', const.ORDER: 0, 'operation': 'SetVars', const.CASE_SUCCESS: True},
+                   {'title': 'c', const.ORDER: 0, 'operation': 'SetVars', const.CASE_SUCCESS: True}],
+                  [{'title': 'a', const.ORDER: 0, 'operation': 'SetVars', const.CASE_SUCCESS: True},
+                   {'title': 'd', const.ORDER: 0, 'operation': 'SetVars', const.CASE_SUCCESS: False}]]
+        exporter = XmindExporter({'file_path': os.path.join(tempfile.gettempdir(), 'aggs.xmind')}, {})
+        subTopics = []
+        exporter.appendTopicsAggs(subTopics, True, 'PASS', suites, '#15831C')
+        topics = subTopics[0]['children']['attached']
+        self.assertEqual([topic['title'] for topic in topics], ['a', 'b'])
+        self.assertEqual([topic['title'] for topic in topics[0]['children']['attached']], ['c', 'd'])
+        self.assertTrue(all(const.ORDER not in topic for topic in topics))
+
+        # 隐藏的 case 只有失败时展示
+        hiddenSuites = [[{'title': 'setup', 'operation': 'SetVars', const.HIDE: True, const.CASE_SUCCESS: True},
+                         {'title': 'hidden', 'operation': 'SetVars', const.HIDE: True, const.CASE_SUCCESS: False}]]
+        for append in (exporter.appendTopicsAggs, exporter.appendTopics):
+            subTopics = []
+            append(subTopics, True, 'FAILED', hiddenSuites, '#E32C2D')
+            self.assertEqual([topic['title'] for topic in subTopics[0]['children']['attached']], ['hidden'])
+
+        # 导出内置思维导图展开后的全部 suite，记录耗时
+        serviceModel = ServiceTestModel('s3', None, {}, {}, [], [], True, None)
+        for xmindFile in sorted(glob.glob(os.path.join(os.path.dirname(__file__), '..', 'suites', '*.xmind'))):
+            for serviceSuites in loader.loadXmindData(xmindFile).values():
+                for index, suite in enumerate(parseSuite(serviceSuites)):
+                    suite[0][const.SUITE_ID] = f'{os.path.basename(xmindFile)}@{index}'
+                    for case in suite:
+                        case[const.CASE_SUCCESS] = True
+                    if index % 5 == 0:
+                        suite[-1][const.CASE_SUCCESS] = False
+                        serviceModel.suite_failed.append(suite)
+                    else:
+                        serviceModel.suite_pass.append(suite)
+        serviceModels = {'s3': serviceModel}
+        with tempfile.TemporaryDirectory() as tmpDir:
+            exporter = XmindExporter({'file_path': os.path.join(tmpDir, 'report.xmind'), const.INCLUDE_FIELDS: ['parameters']}, reportResult(serviceModels))
+            start = time.perf_counter()
+            content = exporter.buildXmindData(serviceModels)
+            buildSeconds = time.perf_counter() - start
+            start = time.perf_counter()
+            exporter.generateReport(serviceModels)
+            exportSeconds = time.perf_counter() - start
+            self.assertTrue(os.path.isfile(exporter.filePath))
+        logger.info("xmind export: {} suites, build {:.3f}s, export {:.3f}s", len(serviceModel.suite_pass) + len(serviceModel.suite_failed), buildSeconds, exportSeconds)
+        self.assertEqual([topic['title'] for topic in content[0]['rootTopic']['children']['attached']], ['PASS', 'FAILED'])
+
+    def testJunitJsonExporters(self):
+        import xml.etree.ElementTree as ET
+        from core.exporters import EXPORTER_DICT
+        from core.models import reportResult
+        suites = [[{'title': 'Suite-%d' % i, 'operation': 'SetVars', 'parameters': {'Index': str(i)}}] for i in range(3)]
+        suites.append([{'title': 'Failed', 'operation': 'SetVars', 'parameters': {'Index': 'x'}, 'assertion': {'Index': 'y'}},
+                       {'title': 'Skipped', 'operation': 'SetVars', 'parameters': {'Index': 'z'}}])
+        serviceModel = ServiceTestModel('s3', None, {}, {}, [], [], True, suites, concurrency=2)
+        serviceModel.setUp()
+        serviceModel.run()
+        serviceModel.tearDown()
+        serviceModels = {'s3': serviceModel}
+        summary = reportResult(serviceModels)
+        with tempfile.TemporaryDirectory() as tmpDir:
+            junit = EXPORTER_DICT['junit']({'file_path': os.path.join(tmpDir, 'report.xml')}, summary)
+            junit.generateReport(serviceModels)
+            report = EXPORTER_DICT['json']({'file_path': os.path.join(tmpDir, 'report.json'), const.INCLUDE_FIELDS: ['parameters']}, summary)
+            report.generateReport(serviceModels)
+            testSuite = ET.parse(junit.filePath).getroot().find('testsuite')
+            with open(report.filePath) as fp:
+                content = json.load(fp)
+        self.assertEqual((testSuite.get('tests'), testSuite.get('failures')), ('4', '1'))
+        testCases = {testCase.get('name'): testCase for testCase in testSuite.findall('testcase')}
+        failure = testCases['__s3__@xmind_indices@__4__'].find('failure')
+        self.assertIn('expect: y, actual: x', failure.text)
+        self.assertIn('Skipped [SetVars] SKIPPED', testCases['__s3__@xmind_indices@__4__'].find('system-out').text)
+        self.assertIn('total', testCases['__s3__@xmind_indices@__1__'].find('system-out').text)
+
+        self.assertEqual(content['summary']['s3']['suiteFailedCount'], 1)
+        records = {record['suiteId']: record for record in content['suites']}
+        self.assertEqual(len(records), 4)
+        failed = records['__s3__@xmind_indices@__4__']
+        self.assertEqual(failed['status'], 'failed')
+        self.assertEqual([case['status'] for case in failed['cases']], ['failed', 'skipped'])
+        self.assertIn('expect: y', failed['cases'][0][const.ERROR_INFO])
+        self.assertEqual(failed['cases'][0]['parameters'], {'Index': 'x'})
+        self.assertIn('total', records['__s3__@xmind_indices@__1__']['cases'][0][const.CASE_TIMING])